@@ -0,0 +1,215 @@
+"""
+Admission control with priority lanes.
+
+Under a spike every request would otherwise compete equally, and the list
+refreshes that auction_list.html fires every 30 seconds could starve
+place_bid. Each request is put in a lane, highest priority first:
+
+    bid     POST /api/auctions/{id}/bid
+    auth    login, registration, logout
+    detail  an auction's detail fragment and bid history
+    other   everything not listed
+    list    the auction list and other polled fragments
+
+A worker serves at most ADMISSION_MAX_CONCURRENCY requests at once, and
+each lane at most its ADMISSION_LIMITS share. When a slot frees, it goes
+to the oldest waiter of the highest-priority lane under its limit.
+
+Each lane has a queue-time budget (ADMISSION_BUDGETS_MS). A request whose
+expected wait already exceeds it is shed on arrival. The estimate is the
+waiters ahead of it times the average service time, divided by the
+concurrency. A request still waiting when its budget runs out is shed
+too. Shed requests get 503 with Retry-After.
+
+Static files, /metrics and /healthz are never queued.
+"""
+
+import asyncio
+import math
+import os
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from metrics import Counter, Gauge, Histogram
+
+
+def _per_lane(raw: str) -> Dict[str, float]:
+    return {lane: float(value) for lane, value in (part.split("=") for part in raw.split(","))}
+
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1").lower() in ("1", "true", "yes")
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32"))
+ADMISSION_LIMITS = _per_lane(os.getenv("ADMISSION_LIMITS", "bid=32,auth=16,detail=24,other=16,list=12"))
+ADMISSION_BUDGETS = {
+    lane: ms / 1000
+    for lane, ms in _per_lane(os.getenv("ADMISSION_BUDGETS_MS", "bid=5000,auth=2000,detail=1000,other=1000,list=250")).items()
+}
+
+LANES = ("bid", "auth", "detail", "other", "list")
+BYPASS_PREFIXES = ("/static", "/uploads", "/metrics", "/healthz")
+# (lane, method, path); first match wins
+RULES = [
+    ("bid", "POST", re.compile(r"^/api/auctions/\d+/bid$")),
+    ("auth", "POST", re.compile(r"^/api/(login|register)$")),
+    ("auth", "GET", re.compile(r"^/logout$")),
+    ("detail", "GET", re.compile(r"^/api/auctions/\d+(/bids)?$")),
+    ("list", "GET", re.compile(r"^/api/(auctions/list|me/auctions|user-info|check-(username|email)/.*)$")),
+]
+# Weight of the newest request in the service-time average
+SERVICE_TIME_ALPHA = 0.05
+
+QUEUE_DEPTH = Gauge("admission_queue_depth", "Requests waiting for admission", ["lane"])
+IN_FLIGHT = Gauge("admission_in_flight", "Admitted requests being served", ["lane"])
+SHED = Counter(
+    "admission_shed_total",
+    "Requests rejected with 503; reason is `predicted` (on arrival) or `timeout` (after waiting)",
+    ["lane", "reason"]
+)
+QUEUE_TIME = Histogram(
+    "admission_queue_seconds",
+    "Time admitted requests waited for a slot",
+    ["lane"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+
+def classify(method: str, path: str) -> str:
+    for lane, rule_method, pattern in RULES:
+        if method == rule_method and pattern.match(path):
+            return lane
+    return "other"
+
+
+class Lane:
+    __slots__ = ("name", "limit", "budget", "in_flight", "waiters")
+
+    def __init__(self, name: str, limit: int, budget: float):
+        self.name = name
+        self.limit = limit
+        self.budget = budget
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+
+class Admission:
+    """Slots of one worker; used from its event loop only, so no locking"""
+
+    def __init__(self, max_concurrency: int = ADMISSION_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        # Lanes in priority order
+        self.lanes = [
+            Lane(name, int(ADMISSION_LIMITS.get(name, max_concurrency)), ADMISSION_BUDGETS.get(name, 1.0))
+            for name in LANES
+        ]
+        self.by_name = {lane.name: lane for lane in self.lanes}
+        self.service_time = 0.05
+
+    def expected_wait(self, lane: Lane) -> float:
+        """Seconds a request joining `lane` now would likely wait"""
+        ahead = 0
+        for other in self.lanes:
+            ahead += len(other.waiters)
+            if other is lane:
+                break
+        return ahead * self.service_time / self.max_concurrency
+
+    def _free(self, lane: Lane) -> bool:
+        return self.in_flight < self.max_concurrency and lane.in_flight < lane.limit
+
+    def _admit(self, lane: Lane):
+        self.in_flight += 1
+        lane.in_flight += 1
+        IN_FLIGHT.set(lane.in_flight, lane=lane.name)
+
+    def _dispatch(self):
+        """Hand free slots to waiters, highest priority first"""
+        while self.in_flight < self.max_concurrency:
+            for lane in self.lanes:
+                if lane.waiters and lane.in_flight < lane.limit:
+                    self._admit(lane)
+                    lane.waiters.popleft().set_result(True)
+                    QUEUE_DEPTH.set(len(lane.waiters), lane=lane.name)
+                    break
+            else:
+                return
+
+    async def acquire(self, lane: Lane) -> Optional[str]:
+        """Wait for a slot; returns None once admitted, or why the request was shed"""
+        # Free slots mean no admissible waiter is left (release dispatches), so
+        # only waiters of the same lane come first
+        if not lane.waiters and self._free(lane):
+            self._admit(lane)
+            QUEUE_TIME.observe(0, lane=lane.name)
+            return None
+        if self.expected_wait(lane) > lane.budget:
+            return "predicted"
+
+        started = time.perf_counter()
+        granted = asyncio.get_running_loop().create_future()
+        lane.waiters.append(granted)
+        QUEUE_DEPTH.set(len(lane.waiters), lane=lane.name)
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), lane.budget)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Client went away; give back a slot granted in the meantime
+            if granted.done():
+                self.release(lane, None)
+            else:
+                self._forget(lane, granted)
+            raise
+        if granted.done():
+            QUEUE_TIME.observe(time.perf_counter() - started, lane=lane.name)
+            return None
+        self._forget(lane, granted)
+        return "timeout"
+
+    def _forget(self, lane: Lane, granted: asyncio.Future):
+        granted.cancel()
+        lane.waiters.remove(granted)
+        QUEUE_DEPTH.set(len(lane.waiters), lane=lane.name)
+
+    def release(self, lane: Lane, service_time: Optional[float]):
+        self.in_flight -= 1
+        lane.in_flight -= 1
+        IN_FLIGHT.set(lane.in_flight, lane=lane.name)
+        if service_time is not None:
+            self.service_time += SERVICE_TIME_ALPHA * (service_time - self.service_time)
+        self._dispatch()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware queueing requests by lane and shedding them with 503"""
+
+    def __init__(self, app: ASGIApp, admission: Optional[Admission] = None):
+        self.app = app
+        self.admission = admission or Admission()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if not ADMISSION_ENABLED or scope["type"] != "http" or scope["path"].startswith(BYPASS_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        lane = self.admission.by_name[classify(scope["method"], scope["path"])]
+        shed = await self.admission.acquire(lane)
+        if shed is not None:
+            SHED.inc(lane=lane.name, reason=shed)
+            retry_after = max(1, math.ceil(self.admission.expected_wait(lane)))
+            response = JSONResponse(
+                {"detail": "Server busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.release(lane, time.perf_counter() - started)
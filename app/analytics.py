@@ -0,0 +1,287 @@
+"""
+Bid analytics served from pre-aggregated rollups.
+
+refresh_rollups() folds new bids into `bid_rollups`. For each auction it
+keeps per-minute and per-hour rows with the bid count, the highest amount
+and the number of distinct bidders. Each run only reads bids past the
+highest id already folded in, plus the bids of the buckets those touch, so
+the cost follows the bid rate and not the table size. Buckets are always
+recomputed whole, which makes reprocessing harmless.
+
+`/api/admin/analytics` reads rollups only. Minute rows are used for short
+ranges and hour rows for long ones. The series is then downsampled to at
+most `points` buckets with NumPy. Site-wide series add up the auctions,
+so there `unique_bidders` counts a bidder once per auction.
+
+Usage: python analytics.py [--every 60]   (one run without --every)
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from collections import defaultdict
+from typing import List, Optional
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from log import get_logger
+from metrics import Counter
+from schemas import Bid, BidRollup
+
+
+RESOLUTIONS = (60, 3600)
+ROLLUP_BATCH_SIZE = int(os.getenv("ROLLUP_BATCH_SIZE", "50000"))
+# Concurrent transactions can commit bids out of id order, so each run
+# starts this many ids before the watermark
+ROLLUP_REREAD_IDS = int(os.getenv("ROLLUP_REREAD_IDS", "1000"))
+# Ranges up to this long are charted from minute rows, longer ones from hour rows
+MINUTE_RESOLUTION_SPAN = timedelta(days=2)
+MAX_POINTS = 2000
+# Re-read bids older than this before the oldest new bid were committed long ago
+REREAD_WINDOW = timedelta(minutes=1)
+# Auctions rebuilt per statement (keeps IN lists short)
+AUCTION_CHUNK = 500
+
+EPOCH = datetime(1970, 1, 1)
+
+log = get_logger("analytics")
+
+BIDS_ROLLED_UP = Counter("bids_rolled_up_total", "Bids folded into bid_rollups")
+
+rollups_table = BidRollup.__table__
+
+
+def _to_seconds(times: List[datetime]) -> np.ndarray:
+    return np.array(times, dtype="datetime64[us]").astype("datetime64[s]").astype(np.int64)
+
+
+def _to_datetime(seconds: int) -> datetime:
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+# ============================================================================
+# ROLLUP JOB
+# ============================================================================
+
+def aggregate(auction_ids: np.ndarray, bidder_ids: np.ndarray, amounts: np.ndarray,
+              seconds: np.ndarray, bucket_seconds: int) -> dict:
+    """Group bids by (auction, bucket): count, highest amount and distinct bidders"""
+    buckets = seconds // bucket_seconds * bucket_seconds
+    order = np.lexsort((bidder_ids, buckets, auction_ids))
+    auction_ids, buckets = auction_ids[order], buckets[order]
+    bidder_ids, amounts = bidder_ids[order], amounts[order]
+
+    new_group = np.empty(len(order), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = (auction_ids[1:] != auction_ids[:-1]) | (buckets[1:] != buckets[:-1])
+    # Sorted by bidder within a group, so each change of bidder is a new one
+    new_bidder = new_group.copy()
+    new_bidder[1:] |= bidder_ids[1:] != bidder_ids[:-1]
+
+    starts = np.flatnonzero(new_group)
+    return {
+        "auction_id": auction_ids[starts],
+        "bucket_start": buckets[starts],
+        "bid_count": np.diff(np.append(starts, len(order))),
+        "max_amount_cents": np.maximum.reduceat(amounts, starts),
+        "unique_bidders": np.add.reduceat(new_bidder.astype(np.int64), starts),
+    }
+
+
+def _rebuild(db: Session, auction_ids: List[int], since: datetime, through_bid_id: int):
+    """
+    Recompute every bucket of the given auctions from `since` on, from the
+    bids up to `through_bid_id`; the next batch recomputes what follows
+    """
+    rows = db.execute(
+        select(Bid.auction_id, Bid.bidder_id, Bid.amount_cents, Bid.bid_time)
+        .where(Bid.auction_id.in_(auction_ids), Bid.bid_time >= since, Bid.id <= through_bid_id)
+    ).all()
+    db.execute(
+        delete(BidRollup)
+        .where(BidRollup.auction_id.in_(auction_ids), BidRollup.bucket_start >= since)
+        .execution_options(synchronize_session=False)
+    )
+    if not rows:
+        return
+    columns = list(zip(*rows))
+    bids = (
+        np.array(columns[0], dtype=np.int64),
+        np.array(columns[1], dtype=np.int64),
+        np.array(columns[2], dtype=np.int64),
+        _to_seconds(columns[3]),
+    )
+    for bucket_seconds in RESOLUTIONS:
+        groups = aggregate(*bids, bucket_seconds)
+        db.execute(insert(rollups_table), [
+            {
+                "auction_id": int(auction_id),
+                "bucket_seconds": bucket_seconds,
+                "bucket_start": _to_datetime(bucket_start),
+                "bid_count": int(count),
+                "max_amount_cents": int(max_amount),
+                "unique_bidders": int(bidders),
+                "through_bid_id": through_bid_id,
+            }
+            for auction_id, bucket_start, count, max_amount, bidders in zip(
+                groups["auction_id"], groups["bucket_start"], groups["bid_count"],
+                groups["max_amount_cents"], groups["unique_bidders"],
+            )
+        ])
+
+
+def refresh_rollups(db: Session, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+    """Fold bids placed since the last run into bid_rollups; returns the bids folded"""
+    watermark = db.scalar(select(func.max(BidRollup.through_bid_id))) or 0
+    after = max(0, watermark - ROLLUP_REREAD_IDS)
+    folded = 0
+    while True:
+        new_bids = db.execute(
+            select(Bid.id, Bid.auction_id, Bid.bid_time)
+            .where(Bid.id > after)
+            .order_by(Bid.id)
+            .limit(batch_size)
+        ).all()
+        if not new_bids or new_bids[-1].id <= watermark:
+            break
+        after = new_bids[-1].id
+        unseen = [bid for bid in new_bids if bid.id > watermark]
+        oldest_unseen = min(bid.bid_time for bid in unseen)
+        # Each auction is rebuilt from the start of the hour of its oldest
+        # new bid, so its minute and hour buckets are recomputed complete
+        since = {}
+        for bid in new_bids:
+            if bid.id <= watermark and bid.bid_time < oldest_unseen - REREAD_WINDOW:
+                continue
+            hour = bid.bid_time.replace(minute=0, second=0, microsecond=0)
+            since[bid.auction_id] = min(hour, since.get(bid.auction_id, hour))
+        auctions_since = defaultdict(list)
+        for auction_id, hour in since.items():
+            auctions_since[hour].append(auction_id)
+        for hour, auction_ids in auctions_since.items():
+            auction_ids.sort()
+            for start in range(0, len(auction_ids), AUCTION_CHUNK):
+                _rebuild(db, auction_ids[start:start + AUCTION_CHUNK], hour, after)
+        db.commit()
+        count = len(unseen)
+        BIDS_ROLLED_UP.inc(count)
+        folded += count
+        if len(new_bids) < batch_size:
+            break
+    if folded:
+        log.info("rollups_refreshed", bids=folded, through_bid_id=after)
+    return folded
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def downsample(seconds: np.ndarray, counts: np.ndarray, max_amounts: np.ndarray,
+               bidders: np.ndarray, start: int, width: int) -> dict:
+    """Merge sorted buckets into `width`-second bins starting at `start`"""
+    bins = (seconds - start) // width
+    starts = np.flatnonzero(np.diff(bins, prepend=-1))
+    return {
+        "t": start + bins[starts] * width,
+        "bid_count": np.add.reduceat(counts, starts),
+        "max_amount_cents": np.maximum.reduceat(max_amounts, starts),
+        # Distinct bidders do not add up across buckets; report the busiest one
+        "unique_bidders": np.maximum.reduceat(bidders, starts),
+    }
+
+
+def heatmap(seconds: np.ndarray, counts: np.ndarray) -> List[List[int]]:
+    """Bids per weekday (Monday first) and UTC hour of day"""
+    grid = np.zeros((7, 24), dtype=np.int64)
+    days = seconds // 86400
+    # 1970-01-01 was a Thursday
+    np.add.at(grid, ((days + 3) % 7, seconds % 86400 // 3600), counts)
+    return grid.tolist()
+
+
+def report(db: Session, start: datetime, end: datetime,
+           auction_id: Optional[int] = None, points: int = 500) -> dict:
+    """Price and activity series plus heatmap for one auction or the whole site"""
+    bucket_seconds = RESOLUTIONS[0] if end - start <= MINUTE_RESOLUTION_SPAN else RESOLUTIONS[1]
+    query = (
+        select(
+            BidRollup.bucket_start,
+            func.sum(BidRollup.bid_count),
+            func.max(BidRollup.max_amount_cents),
+            func.sum(BidRollup.unique_bidders),
+        )
+        .where(
+            BidRollup.bucket_seconds == bucket_seconds,
+            BidRollup.bucket_start >= start,
+            BidRollup.bucket_start < end,
+        )
+        .group_by(BidRollup.bucket_start)
+        .order_by(BidRollup.bucket_start)
+    )
+    if auction_id is not None:
+        query = query.where(BidRollup.auction_id == auction_id)
+    rows = db.execute(query).all()
+
+    result = {
+        "auction_id": auction_id,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "bucket_seconds": bucket_seconds,
+        "series": {"t": [], "bid_count": [], "max_amount": [], "unique_bidders": []},
+        "heatmap": [[0] * 24 for _ in range(7)],
+    }
+    if not rows:
+        return result
+
+    columns = list(zip(*rows))
+    seconds = _to_seconds(columns[0])
+    counts = np.array(columns[1], dtype=np.int64)
+    max_amounts = np.array(columns[2], dtype=np.int64)
+    bidders = np.array(columns[3], dtype=np.int64)
+
+    range_start = int(_to_seconds([start])[0]) // bucket_seconds * bucket_seconds
+    span = int((end - start).total_seconds())
+    points = max(1, min(points, MAX_POINTS))
+    # Bins are whole buckets, so no bucket is split between two points
+    per_point = -(-span // points)
+    width = max(bucket_seconds, -(-per_point // bucket_seconds) * bucket_seconds)
+    series = downsample(seconds, counts, max_amounts, bidders, range_start, width)
+
+    result["bucket_seconds"] = width
+    result["series"] = {
+        "t": [_to_datetime(t).isoformat() for t in series["t"]],
+        "bid_count": series["bid_count"].tolist(),
+        "max_amount": (series["max_amount_cents"] / 100).tolist(),
+        "unique_bidders": series["unique_bidders"].tolist(),
+    }
+    result["heatmap"] = heatmap(seconds, counts)
+    return result
+
+
+def run_job(every: Optional[float] = None):
+    while True:
+        db = SessionLocal()
+        try:
+            refresh_rollups(db)
+        except Exception as e:
+            db.rollback()
+            log.exception("rollup_error", error=str(e))
+        finally:
+            db.close()
+        if every is None:
+            return
+        time.sleep(every)
+
+
+if __name__ == "__main__":
+    from log import configure_logging
+
+    parser = argparse.ArgumentParser(description="Refresh bid rollups")
+    parser.add_argument("--every", type=float, default=None, help="keep running, every N seconds")
+    args = parser.parse_args()
+
+    configure_logging()
+    run_job(args.every)
@@ -0,0 +1,90 @@
+"""
+Archival of bids belonging to auctions that closed long ago.
+
+Bids of auctions that ended more than N days ago are moved from the hot
+`bids` table into the compact `bids_archive` table, one transaction per
+batch of auctions. crud.get_auction_bids reads both tables, so callers do
+not need to know where a bid lives.
+
+Usage: python archive.py [--days 30] [--batch-size 500]
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from log import get_logger
+from schemas import Auction, Bid, BidArchive
+
+
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 500
+
+BID_COLUMNS = ["id", "auction_id", "bidder_id", "amount_cents", "bid_time"]
+
+log = get_logger("archive")
+
+
+def get_archivable_auction_ids(db: Session, older_than_days: int = ARCHIVE_AFTER_DAYS) -> List[int]:
+    """Get ids of auctions closed before the cutoff that still have hot bids"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    rows = (
+        db.query(Bid.auction_id)
+        .join(Auction, Auction.id == Bid.auction_id)
+        .filter(Auction.ends_at < cutoff)
+        .distinct()
+        .all()
+    )
+    return [auction_id for (auction_id,) in rows]
+
+
+def archive_auction_bids(db: Session, auction_ids: List[int]) -> int:
+    """Move all bids of the given auctions to the archive table"""
+    if not auction_ids:
+        return 0
+    hot_columns = [getattr(Bid, name) for name in BID_COLUMNS]
+    db.execute(
+        insert(BidArchive).from_select(
+            BID_COLUMNS,
+            select(*hot_columns).where(Bid.auction_id.in_(auction_ids))
+        )
+    )
+    result = db.execute(
+        delete(Bid)
+        .where(Bid.auction_id.in_(auction_ids))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def archive_closed_auctions(
+    db: Session,
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE
+) -> int:
+    """Archive bids of every auction closed more than `older_than_days` ago"""
+    auction_ids = get_archivable_auction_ids(db, older_than_days)
+    moved = 0
+    for start in range(0, len(auction_ids), batch_size):
+        moved += archive_auction_bids(db, auction_ids[start:start + batch_size])
+    log.info("bids_archived", bids=moved, auctions=len(auction_ids))
+    return moved
+
+
+if __name__ == "__main__":
+    from log import configure_logging
+
+    parser = argparse.ArgumentParser(description="Archive bids of closed auctions")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    configure_logging()
+    db = SessionLocal()
+    try:
+        archive_closed_auctions(db, args.days, args.batch_size)
+    finally:
+        db.close()
@@ -0,0 +1,143 @@
+"""
+Username/email availability checks for the registration form.
+
+The form checks on every keystroke. Each worker keeps a Bloom filter of
+the taken usernames and emails: a value the filter has never seen is
+available without touching the database; only possible matches are
+confirmed with a query. Identical checks in flight at the same time (and
+for AVAILABILITY_COALESCE_MS after) share that one query.
+
+The filters are built in the background at startup (checks go to the
+database until then) and updated by the `user_created` events that
+crud.create_user publishes, which reach every worker including its own.
+Deleted users stay in the filter, which only costs a confirming query.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import func, select
+import events
+from bloom import BloomFilter
+from database import SessionLocal
+from log import get_logger
+from metrics import Counter
+from schemas import UserModel
+
+
+BLOOM_ERROR_RATE = float(os.getenv("BLOOM_ERROR_RATE", "0.01"))
+BLOOM_MIN_CAPACITY = int(os.getenv("BLOOM_MIN_CAPACITY", "100000"))
+COALESCE_SECONDS = float(os.getenv("AVAILABILITY_COALESCE_MS", "500")) / 1000
+
+FIELDS = {"username": UserModel.username, "email": UserModel.email}
+
+log = get_logger("availability")
+
+CHECKS = Counter(
+    "availability_checks_total",
+    "Availability checks by how they were answered",
+    ["field", "result"]
+)
+
+# Empty until the first build finished
+_filters: Dict[str, BloomFilter] = {}
+_lock = threading.Lock()
+# Users recorded while a build is scanning the table, replayed into the new filters
+_added_during_build: Optional[List[tuple]] = None
+# (field, value) -> lookup task, shared by identical concurrent checks
+_lookups: Dict[tuple, asyncio.Future] = {}
+
+
+def build_filters():
+    """(Re)build the filters from the users table and swap them in"""
+    global _filters, _added_during_build
+    with _lock:
+        if _added_during_build is not None:
+            return  # another build is running
+        _added_during_build = []
+    started = time.perf_counter()
+    try:
+        with SessionLocal() as db:
+            count = db.scalar(select(func.count(UserModel.id)))
+            capacity = max(BLOOM_MIN_CAPACITY, count * 2)
+            filters = {field: BloomFilter(capacity, BLOOM_ERROR_RATE) for field in FIELDS}
+            rows = db.execute(
+                select(UserModel.username, UserModel.email).execution_options(yield_per=10_000)
+            )
+            for username, email in rows:
+                filters["username"].add(username)
+                filters["email"].add(email)
+    except Exception as e:
+        # Checks keep going to the database
+        log.exception("bloom_build_failed", error=str(e))
+        with _lock:
+            _added_during_build = None
+        return
+
+    with _lock:
+        for username, email in _added_during_build:
+            filters["username"].add(username)
+            filters["email"].add(email)
+        _filters = filters
+        _added_during_build = None
+    log.info(
+        "bloom_built", users=count, capacity=capacity,
+        bits=filters["username"].size, hashes=filters["username"].hashes,
+        ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+
+
+def record_user(username: str, email: str):
+    """Add a new user to this worker's filters"""
+    with _lock:
+        if _added_during_build is not None:
+            _added_during_build.append((username, email))
+        if not _filters:
+            return
+        _filters["username"].add(username)
+        _filters["email"].add(email)
+        saturated = _filters["username"].saturated
+    if saturated:
+        threading.Thread(target=build_filters, name="bloom-rebuild", daemon=True).start()
+
+
+@events.subscribe
+def _on_user_created(batch: List[dict]):
+    for message in batch:
+        if message["kind"] == "user_created":
+            record_user(message["username"], message["email"])
+
+
+def _exists(field: str, value: str) -> bool:
+    with SessionLocal() as db:
+        return db.scalar(select(UserModel.id).where(FIELDS[field] == value).limit(1)) is not None
+
+
+def _forget(key: tuple, lookup: asyncio.Future):
+    if _lookups.get(key) is lookup:
+        del _lookups[key]
+
+
+async def is_available(field: str, value: str) -> bool:
+    bloom = _filters.get(field)
+    if bloom is not None and value not in bloom:
+        CHECKS.inc(field=field, result="bloom_negative")
+        return True
+
+    key = (field, value)
+    lookup = _lookups.get(key)
+    if lookup is None:
+        lookup = asyncio.ensure_future(asyncio.to_thread(_exists, field, value))
+        _lookups[key] = lookup
+        loop = asyncio.get_running_loop()
+        lookup.add_done_callback(lambda _: loop.call_later(COALESCE_SECONDS, _forget, key, lookup))
+        result = "db"
+    else:
+        result = "coalesced"
+
+    # shield: a client hanging up must not cancel the lookup other checks wait on
+    exists = await asyncio.shield(lookup)
+    CHECKS.inc(field=field, result=f"{result}_{'taken' if exists else 'free'}")
+    return not exists
@@ -0,0 +1,193 @@
+"""
+Response compression and precompressed static files.
+
+Dynamic responses (HTML fragments, JSON) are compressed on the fly above
+COMPRESS_MIN_SIZE bytes: Brotli when the optional brotli-asgi package is
+installed (it falls back to gzip for older clients), gzip otherwise.
+
+Files under /static are compressed once, ahead of time: `precompress_static`
+writes `<file>.gz` (and `<file>.br` with the optional brotli package) next
+to every text asset and `PrecompressedStaticFiles` serves the best variant
+the client accepts. Templates link assets through `static_url`, which adds
+a content hash so they can be cached for a year.
+
+Run it at build time (e.g. a `RUN python compression.py` image step) and
+set STATIC_PRECOMPRESS=0. Otherwise each worker runs it at startup; it
+writes through a temporary file and os.replace, so workers starting
+together never see half a file, and an unwritable static directory (a
+read-only image) only logs a warning: the files are then served as is.
+
+Usage: python compression.py   (precompress app/static)
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import stat
+import tempfile
+from functools import lru_cache
+import anyio
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from log import get_logger
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+# Dynamic responses trade ratio for CPU; static files use the maximum levels
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+PRECOMPRESS_EXTENSIONS = (".js", ".css", ".html", ".svg", ".json", ".txt", ".map")
+# Already compressed media, or served precompressed
+SKIP_PREFIXES = ("/uploads", "/static")
+DEVELOPMENT = os.getenv("APP_ENV", "production") == "development"
+# Precompress at startup; turn off when the build already did
+STATIC_PRECOMPRESS = os.getenv("STATIC_PRECOMPRESS", "1").lower() in ("1", "true", "yes")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=300"
+
+log = get_logger("compression")
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+# ============================================================================
+# DYNAMIC RESPONSES
+# ============================================================================
+
+class CompressionMiddleware:
+    """Brotli/gzip for app responses, skipping paths that are already compressed"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        try:
+            from brotli_asgi import BrotliMiddleware
+            self.compressed = BrotliMiddleware(
+                app, quality=BROTLI_QUALITY, minimum_size=minimum_size, gzip_fallback=True
+            )
+        except ImportError:
+            self.compressed = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=GZIP_LEVEL)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and not scope["path"].startswith(SKIP_PREFIXES):
+            await self.compressed(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+# ============================================================================
+# STATIC FILES
+# ============================================================================
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves `.br`/`.gz` siblings when the client accepts them"""
+
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    async def get_response(self, path: str, scope: Scope):
+        response = None
+        if scope["method"] in ("GET", "HEAD"):
+            response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["vary"] = "Accept-Encoding"
+        # static_url() links carry a content hash, so those never change
+        response.headers["cache-control"] = IMMUTABLE if scope.get("query_string") else REVALIDATE
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope):
+        request_headers = Headers(scope=scope)
+        accepted = request_headers.get("accept-encoding", "")
+        for encoding, suffix in self.ENCODINGS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            response = FileResponse(
+                full_path,
+                stat_result=stat_result,
+                media_type=mimetypes.guess_type(path)[0] or "text/plain",
+                headers={"content-encoding": encoding},
+            )
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        return None
+
+
+def _compress_file(path: str, brotli) -> int:
+    """Write the compressed variants of one file if missing or stale; returns files written"""
+    mtime = os.path.getmtime(path)
+    contents = None
+    written = 0
+    variants = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda data: brotli.compress(data, quality=11)))
+    for suffix, compress in variants:
+        target = path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+            continue
+        if contents is None:
+            with open(path, "rb") as f:
+                contents = f.read()
+        # Write then rename, so a concurrently starting worker never serves half a file
+        fd, partial = tempfile.mkstemp(prefix=os.path.basename(target) + ".", suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(compress(contents))
+            os.replace(partial, target)
+        except BaseException:
+            os.unlink(partial)
+            raise
+        written += 1
+    return written
+
+
+def precompress_static(root: str = STATIC_DIR) -> int:
+    """Create .gz/.br variants of the text assets under root; cheap when up to date"""
+    brotli = _brotli()
+    written = 0
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(PRECOMPRESS_EXTENSIONS):
+                try:
+                    written += _compress_file(os.path.join(directory, filename), brotli)
+                except OSError as e:
+                    # Read-only deployment without build-time variants: serve the originals
+                    log.warning("static_precompress_failed", path=os.path.join(directory, filename), error=str(e))
+                    return written
+    if written:
+        log.info("static_precompressed", files=written, brotli=brotli is not None)
+    return written
+
+
+@lru_cache(maxsize=None)
+def _content_hash(path: str) -> str:
+    with open(os.path.join(STATIC_DIR, path), "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def static_url(path: str) -> str:
+    """/static URL with a content hash, so the file can be cached as immutable"""
+    if DEVELOPMENT:
+        return f"/static/{path}"
+    return f"/static/{path}?v={_content_hash(path)}"
+
+
+if __name__ == "__main__":
+    from log import configure_logging
+    configure_logging()
+    precompress_static()
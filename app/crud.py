@@ -1,8 +1,27 @@
-from typing import List, Optional
+import events
+import heapq
+import json
+import notifications
+import sessions
+import usercache
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, case, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from auth import hash_password, verify_password
-from schemas import Auction, Role, UserModel, Bid
-from models import AuctionCreate, AuctionUpdate
+from schemas import Auction, AuctionImage, AuctionSnapshot, Role, UserModel, Bid, BidArchive, BidRollup, Watchlist
+from models import AuctionCreate, AuctionFilter, AuctionUpdate
+from money import to_cents
+
+
+class AuctionConflict(Exception):
+    """The auction was edited after the editor loaded it"""
+
+    def __init__(self, auction: Auction):
+        super().__init__("This auction was changed by someone else")
+        self.auction = auction
+
 
 def get_all_auctions(db: Session, skip: int = 0, limit: int = 10) -> List[Auction]:
     """Get all auctions with pagination"""
@@ -17,43 +36,266 @@ def get_auction_by_id(db: Session, auction_id: int) -> Optional[Auction]:
 def create_auction(db: Session, auction: AuctionCreate) -> Auction:
     """Create a new auction"""
     auction_data = auction.model_dump()
+    image_keys = parse_image_keys(auction_data.pop("image_paths", None))
     if auction_data.get("current_price") is None:
         auction_data['current_price'] = auction_data['start_price']
     if auction_data.get('is_active') is None:
         auction_data['is_active'] = True
     db_auction = Auction(**auction_data)
     db.add(db_auction)
+    db.flush()
+    attach_images(db, db_auction.id, image_keys)
     db.commit()
     db.refresh(db_auction)
     return db_auction
 
 
-def update_auction(db: Session, auction_id: int, auction_update: AuctionUpdate) -> Optional[Auction]:
-    """Update an auction"""
-    db_auction = db.query(Auction).filter(Auction.id == auction_id).first()
-    if db_auction:
-        update_data = auction_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_auction, field, value)
-        db.commit()
-        db.refresh(db_auction)
+def update_auction(
+    db: Session,
+    auction_id: int,
+    auction_update: AuctionUpdate,
+    expected_version: Optional[int] = None,
+) -> Optional[Auction]:
+    """
+    Write the posted fields and bump `version` in one UPDATE ... RETURNING,
+    without reading or locking the row first. With expected_version the
+    UPDATE only matches that version; AuctionConflict carries the current
+    row otherwise. Bids never write these columns, so an edit cannot undo
+    a concurrent price change.
+    """
+    values = auction_update.model_dump(exclude_unset=True)
+    image_keys = values.pop("image_paths", None)
+    if "start_price" in values:
+        start_price = values.pop("start_price")
+        values["start_price_cents"] = None if start_price is None else to_cents(start_price)
+    statement = update(Auction).where(Auction.id == auction_id)
+    if expected_version is not None:
+        statement = statement.where(Auction.version == expected_version)
+    db_auction = db.scalars(
+        statement.values(**values, version=Auction.version + 1, update_at=datetime.utcnow()).returning(Auction)
+    ).first()
+    if db_auction is None:
+        db.rollback()
+        # Missing or edited meanwhile; only a failed edit pays for this read
+        current = get_auction_by_id(db, auction_id)
+        if current is not None and expected_version is not None:
+            raise AuctionConflict(current)
+        return None
+    if image_keys is not None:
+        replace_images(db, auction_id, parse_image_keys(image_keys))
+    events.publish(db, "auction_changed", auction_id=auction_id)
+    # Detached, it keeps the returned values instead of reloading them after commit
+    db.expunge(db_auction)
+    db.commit()
     return db_auction
 
 
 def delete_auction(db: Session, auction_id: int) -> Optional[Auction]:
-    """Delete an auction"""
+    """Delete an auction and its image rows (files are removed by the caller's cleanup task)"""
     db_auction = db.query(Auction).filter(Auction.id == auction_id).first()
     if db_auction:
+        db.query(AuctionImage).filter(AuctionImage.auction_id == auction_id).delete(synchronize_session=False)
         db.delete(db_auction)
+        events.publish(db, "auction_changed", auction_id=auction_id)
         db.commit()
     return db_auction
 
 
+# ============================================================================
+# BULK AUCTION OPERATIONS
+# ============================================================================
+
+# Ids per IN list
+BULK_CHUNK = 500
+
+
+def auction_conditions(auction_filter: AuctionFilter) -> list:
+    """WHERE conditions selecting the auctions of a bulk operation"""
+    conditions = []
+    if auction_filter.ids is not None:
+        conditions.append(Auction.id.in_(auction_filter.ids))
+    if auction_filter.author is not None:
+        conditions.append(Auction.author == auction_filter.author)
+    if auction_filter.is_active is not None:
+        conditions.append(Auction.is_active.is_(auction_filter.is_active))
+    if auction_filter.ends_after is not None:
+        conditions.append(Auction.ends_at >= auction_filter.ends_after)
+    if auction_filter.ends_before is not None:
+        conditions.append(Auction.ends_at < auction_filter.ends_before)
+    if auction_filter.title_contains:
+        conditions.append(Auction.title.contains(auction_filter.title_contains, autoescape=True))
+    if not conditions:
+        # Never let a bulk statement run without a WHERE clause
+        raise ValueError("Bulk operations need at least one filter criterion")
+    return conditions
+
+
+def count_bulk_targets(db: Session, auction_filter: AuctionFilter) -> dict:
+    """Dry run: how many auctions (and their bids) a bulk operation would touch"""
+    matched = select(Auction.id).where(*auction_conditions(auction_filter))
+    auctions = db.scalar(select(func.count()).select_from(matched.subquery()))
+    bids = db.scalar(select(func.count(Bid.id)).where(Bid.auction_id.in_(matched)))
+    return {"auctions": auctions, "bids": bids}
+
+
+def _extended(db: Session, minutes: int):
+    """SQL expression for ends_at moved by `minutes`"""
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite keeps datetimes as text: shift the seconds part, keep the microseconds
+        shifted = func.strftime("%Y-%m-%d %H:%M:%S", Auction.ends_at, f"{minutes:+d} minutes")
+        return shifted.op("||")(func.substr(Auction.ends_at, 20))
+    return Auction.ends_at + timedelta(minutes=minutes)
+
+
+def bulk_update_auctions(
+    db: Session,
+    auction_filter: AuctionFilter,
+    extend_minutes: Optional[int] = None,
+    ends_at=None,
+    is_active: Optional[bool] = None,
+) -> List[int]:
+    """Change every matching auction in one UPDATE ... RETURNING; returns their ids"""
+    values = {}
+    if extend_minutes is not None:
+        values["ends_at"] = _extended(db, extend_minutes)
+    elif ends_at is not None:
+        values["ends_at"] = ends_at
+    if is_active is not None:
+        values["is_active"] = is_active
+    values["update_at"] = datetime.utcnow()
+    # Open edit forms of these auctions now get a 409
+    values["version"] = Auction.version + 1
+    auction_ids = list(db.scalars(
+        update(Auction)
+        .where(*auction_conditions(auction_filter))
+        .values(**values)
+        .returning(Auction.id)
+        .execution_options(synchronize_session=False)
+    ))
+    events.publish_auctions_changed(db, auction_ids)
+    db.commit()
+    return auction_ids
+
+
+def bulk_delete_auctions(db: Session, auction_filter: AuctionFilter) -> List[Tuple[int, Optional[str]]]:
+    """
+    Delete every matching auction in one DELETE ... RETURNING; returns
+    (id, primary image key) pairs. Their bids, images and other rows are
+    left for purge_auction_children, run in the background.
+    """
+    deleted = db.execute(
+        delete(Auction)
+        .where(*auction_conditions(auction_filter))
+        .returning(Auction.id, Auction.image_path)
+        .execution_options(synchronize_session=False)
+    ).all()
+    events.publish_auctions_changed(db, [auction_id for auction_id, _ in deleted])
+    db.commit()
+    return [(auction_id, image_path) for auction_id, image_path in deleted]
+
+
+def purge_auction_children(db: Session, auction_ids: List[int]) -> List[str]:
+    """Delete the rows that belonged to deleted auctions; returns the image keys to remove from storage"""
+    image_keys = []
+    for start in range(0, len(auction_ids), BULK_CHUNK):
+        chunk = auction_ids[start:start + BULK_CHUNK]
+        image_keys.extend(db.scalars(
+            delete(AuctionImage)
+            .where(AuctionImage.auction_id.in_(chunk))
+            .returning(AuctionImage.storage_key)
+            .execution_options(synchronize_session=False)
+        ))
+        for model in (Bid, BidArchive, BidRollup, AuctionSnapshot, Watchlist):
+            db.execute(
+                delete(model)
+                .where(model.auction_id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+        # One transaction per chunk keeps the locks short
+        db.commit()
+    return image_keys
+
+
+# ============================================================================
+# IMAGE OPERATIONS
+# ============================================================================
+
+def parse_image_keys(raw: Optional[str]) -> List[str]:
+    """Image keys posted by the form: a JSON array, or a single bare key"""
+    if not raw:
+        return []
+    try:
+        keys = json.loads(raw)
+    except ValueError:
+        return [raw]
+    if isinstance(keys, str):
+        return [keys]
+    if not isinstance(keys, list):
+        return []
+    return [key for key in keys if isinstance(key, str) and key]
+
+
+def create_image(db: Session, storage_key: str, byte_size: int, sha256: str) -> AuctionImage:
+    """Register an upload that is not attached to an auction yet"""
+    image = AuctionImage(storage_key=storage_key, byte_size=byte_size, sha256=sha256, position=0)
+    db.add(image)
+    db.commit()
+    return image
+
+
+def complete_image(db: Session, storage_key: str, byte_size: int) -> bool:
+    """Record the size of a direct-to-storage upload once it has landed"""
+    updated = db.query(AuctionImage).filter(
+        AuctionImage.storage_key == storage_key, AuctionImage.auction_id.is_(None)
+    ).update({"byte_size": byte_size}, synchronize_session=False)
+    db.commit()
+    return updated > 0
+
+
+def attach_images(db: Session, auction_id: int, storage_keys: List[str]):
+    """Attach uploads to an auction in the given order, in one UPDATE
+
+    Only orphans and images already on this auction are touched; a key that
+    belongs to another auction is left where it is.
+    """
+    if not storage_keys:
+        return
+    positions = {key: position for position, key in enumerate(storage_keys)}
+    db.execute(
+        update(AuctionImage)
+        .where(
+            AuctionImage.storage_key.in_(storage_keys),
+            AuctionImage.auction_id.is_(None) | (AuctionImage.auction_id == auction_id),
+        )
+        .values(auction_id=auction_id, position=case(positions, value=AuctionImage.storage_key))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def replace_images(db: Session, auction_id: int, storage_keys: List[str]):
+    """Make `storage_keys` the auction's images; dropped ones become orphans"""
+    detach = update(AuctionImage).where(AuctionImage.auction_id == auction_id)
+    if storage_keys:
+        detach = detach.where(AuctionImage.storage_key.notin_(storage_keys))
+    db.execute(detach.values(auction_id=None).execution_options(synchronize_session=False))
+    attach_images(db, auction_id, storage_keys)
+
+
+def get_auction_image_keys(db: Session, auction_id: int) -> List[str]:
+    rows = (
+        db.query(AuctionImage.storage_key)
+        .filter(AuctionImage.auction_id == auction_id)
+        .order_by(AuctionImage.position)
+        .all()
+    )
+    return [key for (key,) in rows]
+
+
 # ============================================================================
 # BID CRUD OPERATIONS
 # ============================================================================
 
-def create_bid(db: Session, auction_id: int, bidder_id: int, amount: float) -> Optional['Bid']:
+def create_bid(db: Session, auction_id: int, bidder_id: int, amount_cents: int) -> Optional['Bid']:
     from datetime import datetime
     
     auction = get_auction_by_id(db, auction_id)
@@ -62,27 +304,117 @@ def create_bid(db: Session, auction_id: int, bidder_id: int, amount: float) -> O
     db_bid = Bid(
         auction_id=auction_id, 
         bidder_id=bidder_id, 
-        amount=amount, 
+        amount_cents=amount_cents, 
         bid_time=datetime.utcnow()
     )
     db.add(db_bid)
     db.commit()
     db.refresh(db_bid)
     
-    auction.current_price = amount
+    previous_winner_id = auction.winner_id
+    auction.current_price_cents = amount_cents
     auction.winner_id = bidder_id
+    if previous_winner_id and previous_winner_id != bidder_id:
+        notifications.enqueue(
+            db, "outbid", previous_winner_id, auction_id,
+            title=auction.title, amount_cents=amount_cents
+        )
+    events.publish(
+        db, "bid",
+        auction_id=auction_id,
+        bid_id=db_bid.id,
+        bidder_id=bidder_id,
+        amount_cents=amount_cents
+    )
     db.commit()
     db.refresh(auction)
     
     return db_bid
 
 def get_auction_bids(db: Session, auction_id: int) -> List['Bid']:
-    return db.query(Bid).filter(Bid.auction_id == auction_id).order_by(Bid.bid_time.desc()).all()
+    """Get all bids of an auction, newest first, across hot and archived storage"""
+    hot = db.query(Bid).filter(Bid.auction_id == auction_id).order_by(Bid.bid_time.desc()).all()
+    cold = db.query(BidArchive).filter(BidArchive.auction_id == auction_id).order_by(BidArchive.bid_time.desc()).all()
+    if not cold:
+        return hot
+    return list(heapq.merge(hot, cold, key=lambda bid: bid.bid_time, reverse=True))
 
 
 def get_highest_bid(db: Session, auction_id: int) -> Optional['Bid']:
     """Get the highest bid for an auction"""
-    return db.query(Bid).filter(Bid.auction_id == auction_id).order_by(Bid.amount.desc()).first()
+    return db.query(Bid).filter(Bid.auction_id == auction_id).order_by(Bid.amount_cents.desc()).first()
+
+
+# ============================================================================
+# WATCHLIST OPERATIONS
+# ============================================================================
+
+MY_AUCTION_VIEWS = ("all", "watched", "leading", "outbid")
+
+
+def add_to_watchlist(db: Session, user_id: int, auction_id: int) -> bool:
+    """Watch an auction; returns False if it was already watched"""
+    db.add(Watchlist(user_id=user_id, auction_id=auction_id))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+
+def remove_from_watchlist(db: Session, user_id: int, auction_id: int) -> bool:
+    deleted = db.query(Watchlist).filter(
+        Watchlist.user_id == user_id, Watchlist.auction_id == auction_id
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted > 0
+
+
+def get_my_auctions(
+    db: Session,
+    user_id: int,
+    view: str = "all",
+    after_id: Optional[int] = None,
+    limit: int = 20
+) -> List[Tuple[Auction, Optional[int], bool]]:
+    """
+    Watched / leading / outbid auctions of a user in a single query.
+
+    Returns (auction, user's highest bid in cents or None, watching) rows,
+    newest auction first; pass the last auction id as `after_id` for the
+    next page.
+    """
+    ranked = (
+        select(
+            Bid.auction_id,
+            Bid.amount_cents,
+            func.row_number().over(
+                partition_by=Bid.auction_id, order_by=Bid.amount_cents.desc()
+            ).label("rank")
+        )
+        .where(Bid.bidder_id == user_id)
+        .subquery()
+    )
+    my_bid = select(ranked.c.auction_id, ranked.c.amount_cents).where(ranked.c.rank == 1).subquery()
+    watching = Watchlist.id.isnot(None)
+
+    query = (
+        db.query(Auction, my_bid.c.amount_cents, watching.label("watching"))
+        .outerjoin(my_bid, my_bid.c.auction_id == Auction.id)
+        .outerjoin(Watchlist, and_(Watchlist.auction_id == Auction.id, Watchlist.user_id == user_id))
+    )
+    if view == "watched":
+        query = query.filter(watching)
+    elif view == "leading":
+        query = query.filter(Auction.winner_id == user_id)
+    elif view == "outbid":
+        query = query.filter(my_bid.c.amount_cents.isnot(None), Auction.winner_id != user_id)
+    else:
+        query = query.filter(watching | my_bid.c.amount_cents.isnot(None))
+    if after_id is not None:
+        query = query.filter(Auction.id < after_id)
+    return query.order_by(Auction.id.desc()).limit(limit).all()
 
 
 # ============================================================================
@@ -122,13 +454,15 @@ def create_user(db: Session, username: str, email: str, password: str) -> UserMo
     )
     
     db.add(db_user)
+    # Every worker, this one included, adds the new user to its availability filters
+    events.publish(db, "user_created", username=username, email=email)
     db.commit()
     db.refresh(db_user)
     
     return db_user
 
 def get_user_role(db: Session, user_id: int) -> Optional[Role]:
-    user = get_user_by_id(db, user_id)
+    user = usercache.get_by_id(db, user_id)
     if not user:
         return None
     return user.role
@@ -143,6 +477,9 @@ def update_user_role(db: Session, user_id: int, new_role: str) -> Optional[UserM
         return None
     
     user.role = Role[new_role.upper()]
+    # Sessions carry the role, so the user logs in again with the new one
+    sessions.revoke_user_sessions(db, user.id)
+    usercache.invalidate_user(db, user.id)
     db.commit()
     db.refresh(user)
     
@@ -160,6 +497,8 @@ def delete_user(db: Session, user_id: int) -> Optional[UserModel]:
     user = get_user_by_id(db, user_id=user_id)
     if not user:
         return None
+    sessions.revoke_user_sessions(db, user.id)
+    usercache.invalidate_user(db, user.id)
     db.delete(user)
     db.commit()
     return user
\ No newline at end of file
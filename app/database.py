@@ -1,9 +1,12 @@
-import time
+import asyncio
 import os
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from dotenv import load_dotenv
+from log import get_logger
 
 
 # Load environment variables from .env file
@@ -16,10 +19,28 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME")
 
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-engine = create_engine(DATABASE_URL)
+# DATABASE_URL overrides the pieces above, e.g. sqlite:///bench.db for local benchmarks
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Connectivity checks at startup; schema changes go through Alembic, not the app
+DB_CONNECT_RETRIES = int(os.getenv("DB_CONNECT_RETRIES", "3"))
+# Create missing tables at startup (throwaway SQLite databases only)
+DB_AUTO_CREATE = os.getenv("DB_AUTO_CREATE", "").lower() in ("1", "true", "yes")
+
+# Idle connections kept per worker, and how many more it may open under load
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# The pool holds up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections, open or
+# not; trim_idle_connections() closes the idle ones beyond the idle target.
+# LIFO keeps reusing the open connections on top, closed ones sink.
+engine = create_engine(
+    DATABASE_URL, connect_args=connect_args,
+    pool_size=DB_POOL_SIZE + DB_MAX_OVERFLOW, max_overflow=0, pool_use_lifo=True,
+)
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
+log = get_logger("database")
 
 def get_db():
     db = SessionLocal()
@@ -29,20 +50,116 @@ def get_db():
         db.close()
         
 def init_db():
-    """Initialize database with retries"""
-    max_retries = 5
-    for attempt in range(max_retries):
+    """
+    Create missing tables straight from the models. Only for throwaway
+    databases (tests, local benchmarks); real deployments run
+    `alembic upgrade head` from the app/ directory.
+    """
+    Base.metadata.create_all(bind=engine)
+
+
+def check_connection():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def wait_for_db():
+    """Check connectivity from the lifespan handler without blocking the event loop"""
+    for attempt in range(DB_CONNECT_RETRIES):
         try:
-            print(f"Attempting to connect to database (attempt {attempt + 1}/{max_retries})...")
-            Base.metadata.create_all(bind=engine)
-            print("Database connected and tables created successfully!")
-            return True
+            await asyncio.to_thread(check_connection)
+            log.info("db_ready", attempt=attempt + 1)
+            return
         except Exception as e:
-            print(f"Connection failed: {e}")
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt  # Exponential backoff
-                print(f"Waiting {wait_time} seconds before retry...")
-                time.sleep(wait_time)
-            else:
-                print("Failed to connect to database after all retries!")
-                raise
\ No newline at end of file
+            log.warning("db_connect_failed", attempt=attempt + 1, error=str(e))
+            if attempt == DB_CONNECT_RETRIES - 1:
+                log.error("db_connect_gave_up", attempts=DB_CONNECT_RETRIES)
+                raise
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+
+# Idle connections the pool keeps open; see set_idle_pool_size()
+_idle_target = DB_POOL_SIZE
+# Open DBAPI connections of this worker's pool, checked out or idle
+_open_connections = 0
+_open_lock = threading.Lock()
+
+
+@event.listens_for(engine, "connect")
+def _count_connect(dbapi_connection, connection_record):
+    global _open_connections
+    with _open_lock:
+        _open_connections += 1
+
+
+@event.listens_for(engine, "close")
+@event.listens_for(engine, "detach")
+def _count_close(dbapi_connection, connection_record):
+    global _open_connections
+    with _open_lock:
+        _open_connections -= 1
+
+
+def idle_connections() -> int:
+    """Open connections waiting in the pool"""
+    return max(0, _open_connections - engine.pool.checkedout())
+
+
+def set_idle_pool_size(size: int) -> bool:
+    """
+    Change how many idle connections the pool keeps open (QueuePool only).
+    The total stays capped at DB_POOL_SIZE + DB_MAX_OVERFLOW; when shrinking,
+    the surplus is closed right away.
+    """
+    global _idle_target
+    if not isinstance(engine.pool, QueuePool):
+        return False
+    _idle_target = max(1, min(size, DB_POOL_SIZE + DB_MAX_OVERFLOW))
+    trim_idle_connections()
+    return True
+
+
+def trim_idle_connections() -> int:
+    """Close the idle connections beyond the idle target; returns how many were closed"""
+    pool = engine.pool
+    idle = idle_connections() if isinstance(pool, QueuePool) else 0
+    if idle <= _idle_target:
+        return 0
+    # The open connections are on top of the LIFO queue, most recently used
+    # first. Requests share the pool meanwhile, so only take a connection
+    # while one is waiting (the pool is capped, an empty queue would block),
+    # and stop at the first that had to be opened: the open ones ran out.
+    connections = []
+    try:
+        while len(connections) < idle and pool.checkedin():
+            opened_before = _open_connections
+            connections.append(pool.connect())
+            if _open_connections != opened_before:
+                break
+    finally:
+        # The least recently used ones are closed and go back first, so the
+        # ones kept open end up on top again
+        surplus = connections[_idle_target:]
+        for connection in surplus:
+            connection.invalidate()
+        for connection in reversed(connections):
+            connection.close()
+    return len(surplus)
+
+
+def open_idle_connections(count: int) -> int:
+    """Open up to `count` idle connections ahead of demand; returns how many were opened"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return 0
+    opened_before = _open_connections
+    connections = []
+    try:
+        # Holding them all at once makes the pool reopen the closed ones;
+        # checked before each one, since a full pool would block
+        while len(connections) < count and pool.checkedout() < pool.size():
+            connections.append(pool.connect())
+    finally:
+        for connection in reversed(connections):
+            connection.close()
+    return _open_connections - opened_before
@@ -0,0 +1,266 @@
+"""
+Deterministic synthetic data at production scale.
+
+generate() draws users, auctions and bids from a seeded NumPy generator,
+so the same seed always gives the same dataset:
+
+- user activity is heavy tailed: a few users place most of the bids
+- bids per auction are heavy tailed too: a few auctions draw a large
+  share of all bids
+- bids cluster in the last minutes before ends_at, the rest are spread
+  over the auction's lifetime; amounts rise with every bid
+- auctions end between GEN_PAST_DAYS ago and GEN_FUTURE_DAYS ahead; price
+  and winner_id follow the last bid, as crud.create_bid leaves them
+
+load() writes a dataset with COPY on PostgreSQL and executemany batches
+elsewhere. Ids continue after the rows already in the tables, and every
+generated user shares DATAGEN_PASSWORD, hashed once.
+
+Usage: python datagen.py --users 10000 --auctions 20000 --bids 1000000 [--seed 0]
+"""
+
+import argparse
+import csv
+import io
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import numpy as np
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.engine import Engine
+from auth import hash_password
+from log import get_logger
+from schemas import Auction, Bid, Role, UserModel
+
+
+DATAGEN_PASSWORD = "datagen-password"
+GEN_PAST_DAYS = 30
+GEN_FUTURE_DAYS = 7
+# Share of bids placed in the closing burst, and its mean distance from ends_at
+BURST_SHARE = 0.6
+BURST_SECONDS = 15 * 60
+# Pareto shapes; smaller is more skewed
+USER_ACTIVITY_SHAPE = 1.2
+AUCTION_POPULARITY_SHAPE = 1.1
+LOAD_CHUNK = 50_000
+
+log = get_logger("datagen")
+
+
+class Dataset(NamedTuple):
+    """Column arrays per table; ids are 0-based and offset by load()"""
+    now: datetime
+    users: Dict[str, np.ndarray]
+    auctions: Dict[str, np.ndarray]
+    bids: Dict[str, np.ndarray]
+
+
+def _seconds(now: datetime) -> float:
+    return (now - datetime(1970, 1, 1)).total_seconds()
+
+
+def _datetimes(seconds: np.ndarray) -> List[datetime]:
+    return (seconds * 1e6).astype(np.int64).astype("datetime64[us]").tolist()
+
+
+# ============================================================================
+# GENERATION
+# ============================================================================
+
+def generate(users: int, auctions: int, bids: int, seed: int = 0,
+             now: Optional[datetime] = None) -> Dataset:
+    rng = np.random.default_rng(seed)
+    now = now or datetime.utcnow().replace(microsecond=0)
+    now_s = _seconds(now)
+
+    # Users
+    user_created = now_s - rng.uniform(0, 365 * 86400, users)
+    activity = rng.pareto(USER_ACTIVITY_SHAPE, users) + 1
+
+    # Auctions
+    ends_at = now_s + rng.uniform(-GEN_PAST_DAYS, GEN_FUTURE_DAYS, auctions) * 86400
+    created = np.minimum(ends_at - rng.uniform(1, 7, auctions) * 86400, now_s - 3600)
+    start_price = np.maximum(np.round(rng.lognormal(np.log(2000), 1.0, auctions), -2), 100).astype(np.int64)
+    author = rng.integers(0, users, auctions)
+    popularity = rng.pareto(AUCTION_POPULARITY_SHAPE, auctions) + 1
+    per_auction = rng.multinomial(bids, popularity / popularity.sum())
+
+    # Bids, grouped by auction
+    auction_of = np.repeat(np.arange(auctions), per_auction)
+    # Open auctions are bid on up to now
+    window_end = np.minimum(ends_at, now_s)[auction_of]
+    lifetime = window_end - created[auction_of]
+    offset = np.where(
+        rng.random(bids) < BURST_SHARE,
+        rng.exponential(BURST_SECONDS, bids),
+        rng.uniform(0, 1, bids) * lifetime,
+    )
+    bid_time = window_end - np.minimum(offset, lifetime)
+    bidder = rng.choice(users, size=bids, p=activity / activity.sum())
+
+    # Amounts rise in time order within each auction
+    order = np.lexsort((bid_time, auction_of))
+    auction_of, bid_time, bidder = auction_of[order], bid_time[order], bidder[order]
+    step = np.maximum(np.round(start_price[auction_of] * rng.lognormal(np.log(0.05), 0.5, bids), -2), 100)
+    climb = np.cumsum(step).astype(np.int64)
+    first = np.concatenate(([0], np.cumsum(per_auction)[:-1]))
+    before_first = np.where(first > 0, climb[np.maximum(first - 1, 0)], 0)
+    amount = start_price[auction_of] + climb - np.repeat(before_first, per_auction)
+
+    has_bids = per_auction > 0
+    last = np.cumsum(per_auction) - 1
+    current_price = np.where(has_bids, amount[np.maximum(last, 0)], start_price)
+    is_active = ends_at > now_s
+    winner = np.where(has_bids, bidder[np.maximum(last, 0)], -1)
+
+    # Bid ids follow bid time, as they would in production
+    chronological = np.argsort(bid_time, kind="stable")
+    return Dataset(
+        now=now,
+        users={"create_at": user_created},
+        auctions={
+            "author": author,
+            "start_price_cents": start_price,
+            "current_price_cents": current_price,
+            "is_active": is_active,
+            "winner": winner,
+            "ends_at": ends_at,
+            "create_at": created,
+        },
+        bids={
+            "auction": auction_of[chronological],
+            "bidder": bidder[chronological],
+            "amount_cents": amount[chronological],
+            "bid_time": bid_time[chronological],
+        },
+    )
+
+
+# ============================================================================
+# LOADING
+# ============================================================================
+
+def _copy(connection, table: str, columns: List[str], rows: Iterable[tuple]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow("" if value is None else value for value in row)
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _executemany(connection, table, columns: List[str], rows: List[tuple]):
+    """Plain DBAPI executemany; skips building a parameter dict per row"""
+    dialect = connection.dialect
+    processors = [table.c[column].type.bind_processor(dialect) for column in columns]
+    if any(processors):
+        rows = [
+            tuple(process(value) if process and value is not None else value
+                  for process, value in zip(processors, row))
+            for row in rows
+        ]
+    statement = insert(table).compile(dialect=dialect, column_keys=columns)
+    # The compiled INSERT also lists columns with a Python-side default;
+    # those get their scalar default on every row
+    defaults = {
+        name: table.c[name].default.arg
+        for name in statement.binds
+        if name not in columns and table.c[name].default is not None and table.c[name].default.is_scalar
+    }
+    if statement.positional:
+        order = [columns.index(name) if name in columns else None for name in statement.positiontup]
+        fill = [defaults.get(name) for name in statement.positiontup]
+        rows = [tuple(value if i is None else row[i] for i, value in zip(order, fill)) for row in rows]
+    else:
+        rows = [{**defaults, **dict(zip(columns, row))} for row in rows]
+    connection.exec_driver_sql(str(statement), rows)
+
+
+def _write(connection, model, columns: List[str], rows: List[tuple]):
+    table = model.__table__
+    for start in range(0, len(rows), LOAD_CHUNK):
+        chunk = rows[start:start + LOAD_CHUNK]
+        if connection.dialect.name == "postgresql":
+            _copy(connection, table.name, columns, chunk)
+        else:
+            _executemany(connection, table, columns, chunk)
+
+
+def _next_id(connection, model) -> int:
+    return (connection.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def load(engine: Engine, dataset: Dataset, password: str = DATAGEN_PASSWORD) -> dict:
+    """Insert a generated dataset in one transaction; returns the first id used per table"""
+    started = time.perf_counter()
+    hashed = hash_password(password)
+    postgres = engine.dialect.name == "postgresql"
+    with engine.begin() as connection:
+        first_user = _next_id(connection, UserModel)
+        first_auction = _next_id(connection, Auction)
+        first_bid = _next_id(connection, Bid)
+        user_ids = first_user + np.arange(len(dataset.users["create_at"]))
+        # COPY takes enum labels as stored, the ORM takes members
+        role = Role.USER.name if postgres else Role.USER
+
+        user_created = _datetimes(dataset.users["create_at"])
+        _write(connection, UserModel, ["id", "username", "email", "hashed_password", "role", "create_at", "update_at"], [
+            (int(user_id), f"gen_user_{user_id}", f"gen_user_{user_id}@datagen.local", hashed, role, created, created)
+            for user_id, created in zip(user_ids, user_created)
+        ])
+
+        a = dataset.auctions
+        auction_ids = first_auction + np.arange(len(a["ends_at"]))
+        auction_created = _datetimes(a["create_at"])
+        _write(connection, Auction, [
+            "id", "winner_id", "title", "content", "author", "start_price_cents",
+            "current_price_cents", "is_active", "ends_at", "create_at", "update_at", "version",
+        ], [
+            (int(auction_id), int(user_ids[winner]) if winner >= 0 else None,
+             f"Generated auction {auction_id}", "Generated by datagen.py", f"gen_user_{user_ids[author]}",
+             int(start), int(current), bool(active), ends_at, created, created, 1)
+            for auction_id, winner, author, start, current, active, ends_at, created in zip(
+                auction_ids, a["winner"], a["author"], a["start_price_cents"],
+                a["current_price_cents"], a["is_active"], _datetimes(a["ends_at"]), auction_created,
+            )
+        ])
+
+        b = dataset.bids
+        _write(connection, Bid, ["id", "auction_id", "bidder_id", "amount_cents", "bid_time"], list(zip(
+            (first_bid + np.arange(len(b["bid_time"]))).tolist(),
+            auction_ids[b["auction"]].tolist(),
+            user_ids[b["bidder"]].tolist(),
+            b["amount_cents"].tolist(),
+            _datetimes(b["bid_time"]),
+        )))
+
+        if postgres:
+            # Ids were given explicitly, so move the sequences past them
+            for table in ("users", "auctions", "bids"):
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                ))
+    log.info(
+        "dataset_loaded", users=len(user_ids), auctions=len(auction_ids), bids=len(b["bid_time"]),
+        seconds=round(time.perf_counter() - started, 2),
+    )
+    return {"users": first_user, "auctions": first_auction, "bids": first_bid}
+
+
+if __name__ == "__main__":
+    from database import engine
+    from log import configure_logging
+
+    parser = argparse.ArgumentParser(description="Generate and load a synthetic dataset")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--auctions", type=int, default=20_000)
+    parser.add_argument("--bids", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    configure_logging()
+    load(engine, generate(args.users, args.auctions, args.bids, args.seed))
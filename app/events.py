@@ -0,0 +1,181 @@
+"""
+Cross-worker event fan-out over PostgreSQL LISTEN/NOTIFY.
+
+publish() queues a compact JSON event with pg_notify inside the caller's
+transaction, so it is only delivered if that transaction commits. Each
+worker runs one listener thread on a dedicated LISTEN connection; the
+notifications of a short window are coalesced per (kind, key) and handed
+to local subscribers as one batch, so a burst of 1,000 bids on an auction
+costs its subscribers a single call.
+
+Without PostgreSQL (SQLite benchmarks, single worker) events are
+dispatched locally right after commit.
+"""
+
+import json
+import os
+import select
+import threading
+import time
+from typing import Callable, Dict, List
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from database import SessionLocal, engine
+from log import get_logger
+from metrics import Counter
+
+
+CHANNEL = "auction_events"
+BATCH_WINDOW = float(os.getenv("EVENT_BATCH_WINDOW_MS", "50")) / 1000
+
+log = get_logger("events")
+
+EVENTS_RECEIVED = Counter("events_received_total", "Events received by this worker", ["kind"])
+EVENT_BATCHES = Counter("event_batches_total", "Coalesced event batches dispatched to subscribers")
+
+Subscriber = Callable[[List[dict]], None]
+_subscribers: List[Subscriber] = []
+
+# Auction ids per `auctions_changed` event
+AUCTION_IDS_PER_EVENT = 500
+# Field identifying what an event is about, used to coalesce a batch
+COALESCE_KEYS = {"bid": "auction_id", "sessions_revoked": "user_id", "user_changed": "user_id", "auction_changed": "auction_id"}
+
+
+def subscribe(callback: Subscriber) -> Subscriber:
+    """Register a callback receiving each coalesced batch (usable as a decorator)"""
+    _subscribers.append(callback)
+    return callback
+
+
+def publish(db: Session, kind: str, **payload):
+    """Publish an event when the current transaction of `db` commits"""
+    message = {"kind": kind, **payload}
+    if engine.dialect.name == "postgresql":
+        db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CHANNEL, "payload": json.dumps(message, separators=(",", ":"), default=str)}
+        )
+    else:
+        db.info.setdefault("pending_events", []).append(message)
+
+
+def publish_auctions_changed(db: Session, auction_ids: List[int]):
+    """Publish `auctions_changed` for many auctions, split to fit pg_notify's 8000-byte payloads"""
+    for start in range(0, len(auction_ids), AUCTION_IDS_PER_EVENT):
+        publish(db, "auctions_changed", auction_ids=auction_ids[start:start + AUCTION_IDS_PER_EVENT])
+
+
+def coalesce(messages: List[dict]) -> List[dict]:
+    """Keep only the latest event per (kind, key); events without a key are kept as-is"""
+    latest: Dict[tuple, dict] = {}
+    for position, message in enumerate(messages):
+        key_field = COALESCE_KEYS.get(message["kind"])
+        key = (message["kind"], message.get(key_field)) if key_field else (position,)
+        latest.pop(key, None)
+        latest[key] = message
+    return list(latest.values())
+
+
+def dispatch(messages: List[dict]):
+    for message in messages:
+        EVENTS_RECEIVED.inc(kind=message.get("kind"))
+    batch = coalesce(messages)
+    EVENT_BATCHES.inc()
+    for callback in _subscribers:
+        try:
+            callback(batch)
+        except Exception as e:
+            log.exception("subscriber_error", subscriber=getattr(callback, "__name__", repr(callback)), error=str(e))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _dispatch_local(session: Session):
+    pending = session.info.pop("pending_events", None)
+    if pending:
+        dispatch(pending)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_local(session: Session):
+    session.info.pop("pending_events", None)
+
+
+# ============================================================================
+# LISTENER
+# ============================================================================
+
+class Listener(threading.Thread):
+    """Holds one LISTEN connection per worker and feeds local subscribers"""
+
+    def __init__(self):
+        super().__init__(name="event-listener", daemon=True)
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                log.exception("listener_error", error=str(e))
+                self._stopped.wait(1.0)
+
+    def _listen(self):
+        # Detached from the pool: this connection is never returned
+        pooled = engine.raw_connection()
+        pooled.detach()
+        conn = pooled.driver_connection
+        conn.autocommit = True
+        try:
+            conn.cursor().execute(f"LISTEN {CHANNEL}")
+            log.info("listener_started", channel=CHANNEL)
+            while not self._stopped.is_set():
+                if not self._wait(conn, 1.0):
+                    continue
+                messages = self._drain(conn)
+                deadline = time.monotonic() + BATCH_WINDOW
+                while (remaining := deadline - time.monotonic()) > 0:
+                    if self._wait(conn, remaining):
+                        messages.extend(self._drain(conn))
+                if messages:
+                    dispatch(messages)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _wait(conn, timeout: float) -> bool:
+        readable, _, _ = select.select([conn], [], [], timeout)
+        return bool(readable)
+
+    @staticmethod
+    def _drain(conn) -> List[dict]:
+        conn.poll()
+        messages = []
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            try:
+                messages.append(json.loads(notify.payload))
+            except ValueError:
+                log.warning("bad_event_payload", payload=notify.payload)
+        return messages
+
+
+_listener = None
+
+
+def start_listener():
+    global _listener
+    if engine.dialect.name != "postgresql" or _listener is not None:
+        return
+    _listener = Listener()
+    _listener.start()
+
+
+def stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
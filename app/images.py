@@ -0,0 +1,97 @@
+"""
+Uploaded image files and their cleanup.
+
+Files live in the configured object storage (see storage.py). Requests
+never delete files themselves. They detach or delete `auction_images` rows
+and hand the storage keys to `delete_files` as a background task.
+`collect_orphans` is the safety net: it removes pending uploads that were
+never attached to an auction, and stored objects that no row references
+(left behind by abandoned uploads or interrupted cleanups).
+
+Usage: python images.py [--grace-hours 24]
+"""
+
+import argparse
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Iterable
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from log import get_logger
+from schemas import Auction, AuctionImage
+from storage import LocalStorage, storage
+
+
+ORPHAN_GRACE_HOURS = 24
+
+log = get_logger("images")
+
+
+def save_file(storage_key: str, contents: bytes, content_type: str = None) -> str:
+    """Store an upload; returns its sha256 hex digest"""
+    storage.save(storage_key, contents, content_type)
+    return hashlib.sha256(contents).hexdigest()
+
+
+def delete_files(storage_keys: Iterable[str]):
+    """Remove stored files (run as a background task, never inline)"""
+    keys = [key for key in storage_keys if key]
+    if not keys:
+        return
+    try:
+        storage.delete_many(keys)
+    except Exception as e:
+        log.warning("image_delete_failed", keys=len(keys), error=str(e))
+
+
+def collect_orphans(db: Session, grace_hours: int = ORPHAN_GRACE_HOURS) -> int:
+    """Delete unattached uploads and unreferenced files older than the grace period"""
+    cutoff = datetime.utcnow() - timedelta(hours=grace_hours)
+
+    primary_images = select(Auction.image_path).where(Auction.image_path.isnot(None))
+    pending = db.query(AuctionImage).filter(
+        AuctionImage.auction_id.is_(None),
+        AuctionImage.create_at < cutoff,
+        AuctionImage.storage_key.notin_(primary_images)
+    )
+    stale_keys = [key for (key,) in pending.with_entities(AuctionImage.storage_key)]
+    pending.delete(synchronize_session=False)
+    db.commit()
+    delete_files(stale_keys)
+
+    referenced = {key for (key,) in db.query(AuctionImage.storage_key)}
+    referenced.update(
+        key for (key,) in db.query(Auction.image_path).filter(Auction.image_path.isnot(None))
+    )
+    cutoff_ts = time.time() - grace_hours * 3600
+    unreferenced = [
+        key for key, modified in storage.iter_objects()
+        if key not in referenced and modified < cutoff_ts
+    ]
+    delete_files(unreferenced)
+
+    removed = len(stale_keys) + len(unreferenced)
+    log.info("orphans_collected", pending_rows=len(stale_keys), unreferenced_files=len(unreferenced))
+    return removed
+
+
+if __name__ == "__main__":
+    from log import configure_logging
+
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Remove orphaned uploads")
+    parser.add_argument("--grace-hours", type=int, default=ORPHAN_GRACE_HOURS)
+    args = parser.parse_args()
+
+    if isinstance(storage, LocalStorage):
+        moved = storage.shard_flat_files()
+        if moved:
+            log.info("uploads_sharded", files=moved)
+
+    db = SessionLocal()
+    try:
+        collect_orphans(db, args.grace_hours)
+    finally:
+        db.close()
@@ -0,0 +1,80 @@
+"""
+Bid increment ladders.
+
+A ladder maps price bands to the minimum raise over the current price:
+while the current price is at or above a band's threshold (and below the
+next one), a new bid must be at least current price + that band's increment.
+
+Ladders are written as JSON lists of [threshold, increment] pairs in
+currency units, e.g. '[[0, "0.05"], [1, "0.25"], [5, "0.50"]]'. The global
+ladder comes from BID_INCREMENT_LADDER (or DEFAULT_LADDER); an auction can
+override it with its own `increment_ladder`.
+"""
+
+import json
+import os
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+from money import to_cents
+
+
+DEFAULT_LADDER = [
+    [0, "0.05"],
+    [1, "0.25"],
+    [5, "0.50"],
+    [25, "1.00"],
+    [100, "2.50"],
+    [250, "5.00"],
+    [500, "10.00"],
+    [1000, "25.00"],
+    [2500, "50.00"],
+    [5000, "100.00"],
+]
+
+
+class IncrementLadder:
+    """Price bands as two parallel sorted arrays of cents, looked up with bisect"""
+
+    __slots__ = ("thresholds", "increments")
+
+    def __init__(self, bands: Sequence[Tuple[int, int]]):
+        bands = sorted(bands)
+        if not bands or bands[0][0] != 0:
+            raise ValueError("Increment ladder must start at a threshold of 0")
+        if any(increment <= 0 for _, increment in bands):
+            raise ValueError("Increments must be positive")
+        self.thresholds: List[int] = [threshold for threshold, _ in bands]
+        self.increments: List[int] = [increment for _, increment in bands]
+
+    def increment_for(self, price_cents: int) -> int:
+        index = bisect_right(self.thresholds, price_cents) - 1
+        return self.increments[max(index, 0)]
+
+    def minimum_bid(self, price_cents: int) -> int:
+        return price_cents + self.increment_for(price_cents)
+
+
+@lru_cache(maxsize=1024)
+def parse_ladder(raw: str) -> IncrementLadder:
+    """Parse a JSON ladder; identical ladders share one cached instance"""
+    try:
+        pairs = json.loads(raw)
+        bands = [(to_cents(threshold), to_cents(increment)) for threshold, increment in pairs]
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid increment ladder: {e}")
+    return IncrementLadder(bands)
+
+
+GLOBAL_LADDER = parse_ladder(os.getenv("BID_INCREMENT_LADDER") or json.dumps(DEFAULT_LADDER))
+
+
+def ladder_for(auction) -> IncrementLadder:
+    if auction.increment_ladder:
+        return parse_ladder(auction.increment_ladder)
+    return GLOBAL_LADDER
+
+
+def minimum_bid_cents(auction) -> int:
+    """Smallest acceptable next bid for an auction, in cents"""
+    return ladder_for(auction).minimum_bid(auction.current_price_cents)
@@ -0,0 +1,114 @@
+"""
+Structured, non-blocking logging.
+
+Request handlers only enqueue log records; a QueueListener thread formats
+them as JSON lines and writes them to stdout, so a slow terminal or pipe
+never stalls the event loop.
+
+    log = get_logger("bid")
+    log.info("bid_placed", auction_id=1, amount_cents=1250)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+
+ROOT_LOGGER = "auction"
+
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_handler = None
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _EnqueueHandler(QueueHandler):
+    """Keeps fields and traceback separate instead of pre-formatting the record"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(level: str = None):
+    """Install the queue handler and start the writer thread (idempotent)"""
+    global _handler, _listener
+    if _listener is not None:
+        return
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level or os.getenv("LOG_LEVEL", "INFO"))
+    _handler = _EnqueueHandler(_queue)
+    root.addHandler(_handler)
+    root.propagate = False
+    _listener = QueueListener(_queue, stream)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def _restart_in_child():
+    """The writer thread does not survive a fork (serve.py preloads the app)"""
+    global _queue, _listener
+    if _listener is None:
+        return
+    _queue = queue.SimpleQueue()
+    _handler.queue = _queue
+    _listener = QueueListener(_queue, *_listener.handlers)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+
+class EventLogger:
+    """Logs an event name plus keyword fields"""
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+    def _log(self, level: int, event: str, exc_info=False, **fields):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+    def debug(self, event: str, **fields):
+        self._log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        self._log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        self._log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields):
+        self._log(logging.ERROR, event, **fields)
+
+    def exception(self, event: str, **fields):
+        self._log(logging.ERROR, event, exc_info=True, **fields)
+
+
+def get_logger(name: str) -> EventLogger:
+    return EventLogger(name)
@@ -1,18 +1,67 @@
+import asyncio
+from contextlib import asynccontextmanager
+import os
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles 
-from database import init_db
+from admission import AdmissionMiddleware
+from availability import build_filters
+from compression import STATIC_DIR, STATIC_PRECOMPRESS, CompressionMiddleware, PrecompressedStaticFiles, precompress_static
+from database import DB_AUTO_CREATE, init_db, wait_for_db
+from events import start_listener, stop_listener
+from log import configure_logging
+from metrics import MetricsMiddleware, router_metrics
+from prewarm import start_prewarm, stop_prewarm
+from querycount import QueryCountMiddleware
+from replay import recover_on_startup
+from sessions import SessionMiddleware, start_flusher, stop_flusher
+from storage import LocalStorage, storage
+from templating import warm_templates
 # from routes_image import router_img
 from routes_web import router_web
 from routes import router_auction
+from routes_bid import router_bid
+from routes_watchlist import router_watchlist
+from routes_admin import router_admin
+
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup only checks that the database answers; the schema is managed
+    with `alembic upgrade head`, never by the workers themselves.
+    """
+    await wait_for_db()
+    if DB_AUTO_CREATE:
+        await asyncio.to_thread(init_db)
+    start_listener()
+    # Repairs auction rows from the bid log; in the background if it would take long
+    await recover_on_startup()
+    start_flusher()
+    warm_templates()
+    if STATIC_PRECOMPRESS:
+        await asyncio.to_thread(precompress_static)
+    # Checks fall back to the database until the filters are built
+    app.state.bloom_build = asyncio.create_task(asyncio.to_thread(build_filters))
+    start_prewarm()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    stop_prewarm()
+    await stop_flusher()
+    stop_listener()
 
-init_db()
 
 app = FastAPI(
     title="foo",
     description="foo",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.state.ready = False
 
 # ============================================================================
 # CORS MIDDLEWARE - FIX FOR NETWORK ERRORS
@@ -30,12 +79,26 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+app.add_middleware(CompressionMiddleware)
+# Inside QueryCount so session lookups count towards the request's queries
+app.add_middleware(SessionMiddleware)
+app.add_middleware(QueryCountMiddleware)
+# Sheds before any session lookup or query, but inside Metrics so 503s are counted
+app.add_middleware(AdmissionMiddleware)
+# Outermost so latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
-app.mount("/static", StaticFiles(directory="static"), name="static")
+
+if isinstance(storage, LocalStorage):
+    app.mount("/uploads", StaticFiles(directory=storage.root), name="uploads")
+app.mount("/static", PrecompressedStaticFiles(directory=STATIC_DIR), name="static")
 
 app.include_router(router_auction)
 app.include_router(router_web)
+app.include_router(router_bid)
+app.include_router(router_watchlist)
+app.include_router(router_admin)
+app.include_router(router_metrics)
 
 
 @app.get("/")
@@ -47,6 +110,17 @@ def root():
     }
 
 
+@app.get("/healthz")
+def healthz():
+    """Readiness of this worker: 503 until its lifespan startup has finished"""
+    ready = app.state.ready
+    return JSONResponse(
+        {"status": "ready" if ready else "starting", "pid": os.getpid()},
+        status_code=200 if ready else 503
+    )
+
+
+# Development server; production runs serve.py (multiple workers)
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
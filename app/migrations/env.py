@@ -0,0 +1,42 @@
+"""
+Alembic environment.
+
+Revisions run against the engine from database.py so the app and the
+migrations always agree on the target database. Every revision up to
+0008 checks what already exists before changing it, so a database created
+by the old import-time `create_all` can simply run `alembic upgrade head`.
+"""
+
+from logging.config import fileConfig
+from alembic import context
+from database import Base, engine
+import schemas  # noqa: F401  registers the models on Base.metadata
+
+
+if context.config.config_file_name is not None:
+    fileConfig(context.config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
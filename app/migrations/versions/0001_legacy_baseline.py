@@ -0,0 +1,67 @@
+"""legacy baseline: users, auctions and bids as first released
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("username", sa.String(100), unique=True, index=True),
+            sa.Column("email", sa.String, unique=True, index=True),
+            sa.Column("hashed_password", sa.String),
+            sa.Column("role", sa.Enum("USER", "ADMIN", name="role")),
+            sa.Column("create_at", sa.DateTime, default=datetime.utcnow),
+            sa.Column("update_at", sa.DateTime, default=datetime.utcnow),
+        )
+
+    if not inspector.has_table("auctions"):
+        op.create_table(
+            "auctions",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("winner_id", sa.Integer, nullable=True),
+            sa.Column("title", sa.String(255), index=True, nullable=True),
+            sa.Column("content", sa.Text, nullable=True),
+            sa.Column("author", sa.String(100), nullable=True),
+            sa.Column("start_price", sa.Float),
+            sa.Column("current_price", sa.Float),
+            sa.Column("is_active", sa.Boolean),
+            sa.Column("image_path", sa.String(500), nullable=True),
+            sa.Column("image_paths", sa.Text, nullable=True),
+            sa.Column("ends_at", sa.DateTime),
+            sa.Column("create_at", sa.DateTime),
+            sa.Column("update_at", sa.DateTime),
+        )
+
+    if not inspector.has_table("bids"):
+        op.create_table(
+            "bids",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("auction_id", sa.Integer, index=True),
+            sa.Column("bidder_id", sa.Integer),
+            sa.Column("amount", sa.Float),
+            sa.Column("bid_time", sa.DateTime),
+        )
+
+
+def downgrade():
+    op.drop_table("bids")
+    op.drop_table("auctions")
+    op.drop_table("users")
+    sa.Enum(name="role").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,59 @@
+"""replace Float price/amount columns with BIGINT cents columns
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+MONEY_COLUMNS = {
+    "auctions": ("start_price", "current_price"),
+    "bids": ("amount",),
+    "bids_archive": ("amount",),
+}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, names in MONEY_COLUMNS.items():
+        if not inspector.has_table(table):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        legacy = [name for name in names if name in existing]
+        if not legacy:
+            continue
+        with op.batch_alter_table(table) as batch:
+            for name in legacy:
+                if f"{name}_cents" not in existing:
+                    batch.add_column(sa.Column(f"{name}_cents", sa.BigInteger))
+        for name in legacy:
+            op.execute(
+                f"UPDATE {table} SET {name}_cents = CAST(ROUND({name} * 100) AS BIGINT) "
+                f"WHERE {name} IS NOT NULL"
+            )
+        with op.batch_alter_table(table) as batch:
+            for name in legacy:
+                batch.drop_column(name)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, names in MONEY_COLUMNS.items():
+        if not inspector.has_table(table):
+            continue
+        with op.batch_alter_table(table) as batch:
+            for name in names:
+                batch.add_column(sa.Column(name, sa.Float))
+        for name in names:
+            op.execute(f"UPDATE {table} SET {name} = {name}_cents / 100.0")
+        with op.batch_alter_table(table) as batch:
+            for name in names:
+                batch.drop_column(f"{name}_cents")
@@ -0,0 +1,26 @@
+"""per-auction bid increment ladder override
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("auctions")}
+    if "increment_ladder" not in existing:
+        op.add_column("auctions", sa.Column("increment_ladder", sa.Text, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("auctions") as batch:
+        batch.drop_column("increment_ladder")
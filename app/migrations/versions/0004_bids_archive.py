@@ -0,0 +1,34 @@
+"""cold storage table for bids of long closed auctions, bidder index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table("bids_archive"):
+        op.create_table(
+            "bids_archive",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("auction_id", sa.Integer, index=True),
+            sa.Column("bidder_id", sa.Integer),
+            sa.Column("amount_cents", sa.BigInteger),
+            sa.Column("bid_time", sa.DateTime),
+        )
+    # Used by the "my auctions" views
+    op.execute("CREATE INDEX IF NOT EXISTS ix_bids_bidder_id ON bids (bidder_id)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_bids_bidder_id")
+    op.drop_table("bids_archive")
@@ -0,0 +1,51 @@
+"""durable notification queue and user watchlists
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("notification_jobs"):
+        op.create_table(
+            "notification_jobs",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("kind", sa.String(32)),
+            sa.Column("user_id", sa.Integer, index=True),
+            sa.Column("auction_id", sa.Integer),
+            sa.Column("payload", sa.Text, nullable=True),
+            sa.Column("status", sa.Enum("PENDING", "DONE", "FAILED", name="jobstatus")),
+            sa.Column("attempts", sa.Integer),
+            sa.Column("run_after", sa.DateTime),
+            sa.Column("last_error", sa.Text, nullable=True),
+            sa.Column("create_at", sa.DateTime),
+        )
+        op.create_index("ix_notification_jobs_due", "notification_jobs", ["status", "run_after"])
+
+    if not inspector.has_table("watchlist"):
+        op.create_table(
+            "watchlist",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer),
+            sa.Column("auction_id", sa.Integer, index=True),
+            sa.Column("create_at", sa.DateTime),
+        )
+        op.create_index("ix_watchlist_user_auction", "watchlist", ["user_id", "auction_id"], unique=True)
+
+
+def downgrade():
+    op.drop_table("watchlist")
+    op.drop_table("notification_jobs")
+    sa.Enum(name="jobstatus").drop(op.get_bind(), checkfirst=True)
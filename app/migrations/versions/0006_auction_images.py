@@ -0,0 +1,79 @@
+"""move the JSON auctions.image_paths column into auction_images rows
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+
+import hashlib
+import json
+import os
+from alembic import op
+import sqlalchemy as sa
+from storage import UPLOAD_DIR, LocalStorage
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def _read_upload(key):
+    """Size and sha256 of a local upload, in the flat or the sharded layout"""
+    for path in (os.path.join(UPLOAD_DIR, key), os.path.join(UPLOAD_DIR, LocalStorage.shard(key))):
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                contents = f.read()
+            return len(contents), hashlib.sha256(contents).hexdigest()
+    return None, None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not inspector.has_table("auction_images"):
+        op.create_table(
+            "auction_images",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("auction_id", sa.Integer, nullable=True),
+            sa.Column("position", sa.Integer),
+            sa.Column("storage_key", sa.String(255), unique=True),
+            sa.Column("variants", sa.Text, nullable=True),
+            sa.Column("byte_size", sa.Integer, nullable=True),
+            sa.Column("sha256", sa.String(64), nullable=True),
+            sa.Column("create_at", sa.DateTime),
+        )
+        op.create_index("ix_auction_images_auction_position", "auction_images", ["auction_id", "position"])
+
+    if "image_paths" not in {column["name"] for column in inspector.get_columns("auctions")}:
+        return
+
+    images = sa.table(
+        "auction_images",
+        sa.column("auction_id"), sa.column("position"), sa.column("storage_key"),
+        sa.column("byte_size"), sa.column("sha256"),
+    )
+    rows = bind.execute(sa.text(
+        "SELECT id, image_paths FROM auctions WHERE image_paths IS NOT NULL AND image_paths <> ''"
+    )).all()
+    for auction_id, raw in rows:
+        try:
+            keys = json.loads(raw)
+        except ValueError:
+            keys = [raw]
+        for position, key in enumerate(k for k in keys if isinstance(k, str)):
+            byte_size, sha256 = _read_upload(os.path.basename(key))
+            bind.execute(images.insert().values(
+                auction_id=auction_id, position=position, storage_key=key,
+                byte_size=byte_size, sha256=sha256,
+            ))
+
+    with op.batch_alter_table("auctions") as batch:
+        batch.drop_column("image_paths")
+
+
+def downgrade():
+    op.add_column("auctions", sa.Column("image_paths", sa.Text, nullable=True))
+    op.drop_table("auction_images")
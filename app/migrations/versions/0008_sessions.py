@@ -0,0 +1,33 @@
+"""server-side login sessions
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "sessions",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column("user_id", sa.Integer, index=True),
+        sa.Column("username", sa.String(100)),
+        sa.Column("role", sa.Enum("USER", "ADMIN", name="role", create_type=False)),
+        sa.Column("refresh_hash", sa.String(64), unique=True),
+        sa.Column("expires_at", sa.DateTime),
+        sa.Column("refresh_expires_at", sa.DateTime, index=True),
+        sa.Column("create_at", sa.DateTime),
+    )
+
+
+def downgrade():
+    op.drop_table("sessions")
@@ -0,0 +1,33 @@
+"""per-auction bid rollups for analytics
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "bid_rollups",
+        sa.Column("auction_id", sa.Integer, primary_key=True),
+        sa.Column("bucket_seconds", sa.Integer, primary_key=True),
+        sa.Column("bucket_start", sa.DateTime, primary_key=True),
+        sa.Column("bid_count", sa.Integer),
+        sa.Column("max_amount_cents", sa.BigInteger),
+        sa.Column("unique_bidders", sa.Integer),
+        sa.Column("through_bid_id", sa.Integer),
+    )
+    op.create_index("ix_bid_rollups_range", "bid_rollups", ["bucket_seconds", "bucket_start"])
+
+
+def downgrade():
+    op.drop_table("bid_rollups")
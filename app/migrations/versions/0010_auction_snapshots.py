@@ -0,0 +1,32 @@
+"""per-auction snapshots of bid-derived state for replay
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "auction_snapshots",
+        sa.Column("auction_id", sa.Integer, primary_key=True),
+        sa.Column("through_bid_id", sa.Integer, primary_key=True),
+        sa.Column("through_bid_time", sa.DateTime),
+        sa.Column("current_price_cents", sa.BigInteger),
+        sa.Column("winner_id", sa.Integer, nullable=True),
+        sa.Column("bid_count", sa.Integer),
+        sa.Column("create_at", sa.DateTime),
+    )
+
+
+def downgrade():
+    op.drop_table("auction_snapshots")
@@ -0,0 +1,23 @@
+"""version column on auctions for optimistic-concurrency edits
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("auctions", sa.Column("version", sa.Integer, nullable=False, server_default="1"))
+
+
+def downgrade():
+    op.drop_column("auctions", "version")
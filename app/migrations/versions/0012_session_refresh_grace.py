@@ -0,0 +1,27 @@
+"""previous refresh hash on sessions for the refresh grace window
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("sessions", sa.Column("previous_refresh_hash", sa.String(64)))
+    op.add_column("sessions", sa.Column("rotated_at", sa.DateTime))
+    op.create_index("ix_sessions_previous_refresh_hash", "sessions", ["previous_refresh_hash"])
+
+
+def downgrade():
+    op.drop_index("ix_sessions_previous_refresh_hash", table_name="sessions")
+    op.drop_column("sessions", "rotated_at")
+    op.drop_column("sessions", "previous_refresh_hash")
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr, field_validator
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, EmailStr, field_validator, model_validator
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List, Optional
 from schemas import Role
+from increments import parse_ladder
 
 
 # ============================================================================
@@ -9,7 +11,7 @@ from schemas import Role
 # ============================================================================
 class BidCreate(BaseModel):
     bidder_id: int
-    amount: float
+    amount: Decimal
 
 class BidResponse(BaseModel):
     id: int
@@ -30,20 +32,29 @@ class AuctionCreate(BaseModel):
     title: str
     content: str
     author: str
-    start_price: float
+    start_price: Decimal
     ends_at: datetime
     image_path: Optional[str] = None
     image_paths: Optional[str] = None
-    current_price: Optional[float] = None
+    current_price: Optional[Decimal] = None
     is_active: Optional[bool] = True
     winner_id: Optional[int] = None
+    increment_ladder: Optional[str] = None
+
+    @field_validator('increment_ladder')
+    @classmethod
+    def validate_increment_ladder(cls, v):
+        """Reject ladders the bid engine could not evaluate"""
+        if v:
+            parse_ladder(v)
+        return v
 
 class AuctionUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
     author: Optional[str] = None
-    start_price: Optional[float] = None
-    ends_at: Optional[float] = None
+    start_price: Optional[Decimal] = None
+    ends_at: Optional[datetime] = None
     image_path: Optional[str] = None
     image_paths: Optional[str] = None
     
@@ -56,7 +67,6 @@ class AuctionResponse(BaseModel):
     is_active: bool
     winner_id: Optional[int]
     image_path: Optional[str] = None
-    image_paths: Optional[str] = None
     ends_at: datetime
     create_at: datetime
     update_at: datetime
@@ -64,6 +74,69 @@ class AuctionResponse(BaseModel):
     class config:
         from_attributes = True
 
+# ============================================================================
+# Admin Bulk Operations
+# ============================================================================
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+class AuctionFilter(BaseModel):
+    """Which auctions a bulk operation applies to; criteria are ANDed"""
+    ids: Optional[List[int]] = None
+    author: Optional[str] = None
+    is_active: Optional[bool] = None
+    ends_after: Optional[datetime] = None
+    ends_before: Optional[datetime] = None
+    title_contains: Optional[str] = None
+
+    @field_validator("ends_after", "ends_before")
+    @classmethod
+    def to_naive_utc(cls, v):
+        """Auction times are stored as naive UTC"""
+        return naive_utc(v)
+
+    @field_validator("ids", "author", "title_contains")
+    @classmethod
+    def reject_empty(cls, v):
+        """An empty value would count as a criterion without narrowing anything"""
+        if v is not None and not (v.strip() if isinstance(v, str) else v):
+            raise ValueError("must not be empty")
+        return v
+
+    @model_validator(mode="after")
+    def require_criteria(self):
+        """An empty filter would match every auction"""
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("Filter needs at least one criterion")
+        return self
+
+class BulkAuctionUpdate(BaseModel):
+    filter: AuctionFilter
+    extend_minutes: Optional[int] = None
+    ends_at: Optional[datetime] = None
+    is_active: Optional[bool] = None
+    dry_run: bool = False
+
+    @field_validator("ends_at")
+    @classmethod
+    def to_naive_utc(cls, v):
+        return naive_utc(v)
+
+    @model_validator(mode="after")
+    def require_change(self):
+        if self.extend_minutes is not None and self.ends_at is not None:
+            raise ValueError("Use either extend_minutes or ends_at")
+        if self.extend_minutes is None and self.ends_at is None and self.is_active is None:
+            raise ValueError("Nothing to update")
+        return self
+
+class BulkAuctionDelete(BaseModel):
+    filter: AuctionFilter
+    dry_run: bool = False
+
 # ============================================================================
 # Authenticate Related
 # ============================================================================
@@ -103,16 +176,19 @@ class Token(BaseModel):
     token_type: str
     user: UserResponse
 
-class TokenData(BaseModel):
-    username: Optional[str] = None
-    role: Optional[str] = None
-    user_id: Optional[int] = None 
-    
 class RegisterRequest(BaseModel):
     username: str
     email: str
     password: str
 
+class UploadUrlRequest(BaseModel):
+    filename: str
+    content_type: str
+    size: int
+
+class UploadCompleteRequest(BaseModel):
+    key: str
+
 class LoginRequest(BaseModel):
     username: str
     password: str
\ No newline at end of file
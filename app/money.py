@@ -0,0 +1,49 @@
+"""
+Money helpers.
+
+Prices and bids are stored as integer minor units (cents). Comparisons and
+increments on the bidding path stay in integer arithmetic; Decimal is only
+used at the edges, when parsing user input and when displaying amounts.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Optional
+
+
+CENTS_PER_UNIT = 100
+_CENT = Decimal("0.01")
+
+
+def to_cents(value) -> int:
+    """Parse an amount ("12.5", 12.5, Decimal) into integer cents"""
+    try:
+        amount = Decimal(str(value).strip())
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    return int(amount.quantize(_CENT, rounding=ROUND_HALF_UP).scaleb(2))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Convert integer cents to an exact Decimal with two places"""
+    return Decimal(cents).scaleb(-2)
+
+
+def format_cents(cents: int) -> str:
+    return f"{from_cents(cents):.2f}"
+
+
+def cents_property(cents_attr: str) -> property:
+    """
+    Expose an integer cents column as a Decimal attribute, so templates and
+    schemas can keep reading `auction.current_price`.
+    """
+    def getter(self) -> Optional[Decimal]:
+        cents = getattr(self, cents_attr)
+        return None if cents is None else from_cents(cents)
+
+    def setter(self, value):
+        setattr(self, cents_attr, None if value is None else to_cents(value))
+
+    return property(getter, setter)
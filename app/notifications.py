@@ -0,0 +1,212 @@
+"""
+Outbid and auction-won notifications.
+
+The request path only inserts rows into `notification_jobs`, in the same
+transaction as the bid. This module's worker process claims due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED (so several workers can run side by
+side), merges each user's pending jobs into a single message and delivers
+it. Failed deliveries are retried with exponential backoff.
+
+The worker also closes expired auctions and queues the auction-won jobs.
+
+Delivery goes to SMTP when SMTP_HOST is set (a local stub such as
+`python -m aiosmtpd -n -l localhost:1025` works), otherwise to the log.
+
+Usage: python notifications.py [--batch-size 100] [--poll-interval 2]
+"""
+
+import argparse
+import json
+import os
+import smtplib
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Dict, List
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+import events
+from database import SessionLocal
+from log import get_logger
+from metrics import Counter
+from money import format_cents
+from schemas import Auction, JobStatus, NotificationJob, UserModel
+
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 30
+BATCH_SIZE = 100
+POLL_INTERVAL = 2.0
+
+log = get_logger("notifications")
+
+NOTIFICATIONS = Counter("notifications_total", "Notification jobs by outcome", ["kind", "outcome"])
+
+
+def enqueue(db: Session, kind: str, user_id: int, auction_id: int, **payload):
+    """Queue a notification; committed together with the caller's transaction"""
+    db.add(NotificationJob(
+        kind=kind,
+        user_id=user_id,
+        auction_id=auction_id,
+        payload=json.dumps(payload),
+        status=JobStatus.PENDING,
+        attempts=0,
+        run_after=datetime.utcnow()
+    ))
+
+
+# ============================================================================
+# DELIVERY
+# ============================================================================
+
+class LogSink:
+    def send(self, email: str, subject: str, body: str):
+        log.info("notification", to=email, subject=subject, body=body)
+
+
+class SmtpSink:
+    def __init__(self, host: str, port: int, sender: str):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send(self, email: str, subject: str, body: str):
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = email
+        message["Subject"] = subject
+        message.set_content(body)
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(message)
+
+
+def make_sink():
+    host = os.getenv("SMTP_HOST")
+    if not host:
+        return LogSink()
+    return SmtpSink(host, int(os.getenv("SMTP_PORT", "25")), os.getenv("SMTP_FROM", "auctions@localhost"))
+
+
+def render_message(jobs: List[NotificationJob]):
+    """One message per user; only the latest job per (kind, auction) is mentioned"""
+    latest: Dict[tuple, NotificationJob] = {}
+    for job in jobs:
+        latest[(job.kind, job.auction_id)] = job
+    lines = []
+    for job in latest.values():
+        payload = json.loads(job.payload or "{}")
+        title = payload.get("title", f"auction #{job.auction_id}")
+        amount = format_cents(payload.get("amount_cents", 0))
+        if job.kind == "won":
+            lines.append(f"You won '{title}' for ${amount}.")
+        else:
+            lines.append(f"You have been outbid on '{title}'. The current price is ${amount}.")
+    kinds = {job.kind for job in latest.values()}
+    subject = "You won an auction" if kinds == {"won"} else "Auction updates"
+    return subject, "\n".join(lines)
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def close_expired_auctions(db: Session) -> int:
+    """
+    Deactivate ended auctions in one statement and queue auction-won jobs.
+    Like any other write, closing bumps `version` (a pending edit gets a
+    409) and tells every worker's caches once committed.
+    """
+    closed = db.execute(
+        update(Auction)
+        .where(Auction.is_active.is_(True), Auction.ends_at <= datetime.utcnow())
+        .values(is_active=False, version=Auction.version + 1, update_at=datetime.utcnow())
+        .returning(Auction.id, Auction.winner_id, Auction.title, Auction.current_price_cents)
+        .execution_options(synchronize_session=False)
+    ).all()
+    for auction_id, winner_id, title, price_cents in closed:
+        if winner_id:
+            enqueue(db, "won", winner_id, auction_id, title=title, amount_cents=price_cents)
+    events.publish_auctions_changed(db, [auction_id for auction_id, *_ in closed])
+    db.commit()
+    return len(closed)
+
+
+def process_batch(db: Session, sink, batch_size: int = BATCH_SIZE) -> int:
+    """Claim up to `batch_size` due jobs, deliver them per user and record the outcome"""
+    now = datetime.utcnow()
+    jobs = (
+        db.query(NotificationJob)
+        .filter(NotificationJob.status == JobStatus.PENDING, NotificationJob.run_after <= now)
+        .order_by(NotificationJob.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not jobs:
+        db.commit()
+        return 0
+
+    by_user: Dict[int, List[NotificationJob]] = defaultdict(list)
+    for job in jobs:
+        by_user[job.user_id].append(job)
+    emails = dict(
+        db.query(UserModel.id, UserModel.email).filter(UserModel.id.in_(list(by_user))).all()
+    )
+
+    for user_id, user_jobs in by_user.items():
+        email = emails.get(user_id)
+        try:
+            if email is None:
+                raise LookupError(f"user {user_id} no longer exists")
+            subject, body = render_message(user_jobs)
+            sink.send(email, subject, body)
+        except Exception as e:
+            for job in user_jobs:
+                job.attempts += 1
+                job.last_error = str(e)
+                if job.attempts >= MAX_ATTEMPTS:
+                    job.status = JobStatus.FAILED
+                else:
+                    job.run_after = now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+                NOTIFICATIONS.inc(kind=job.kind, outcome="failed" if job.status == JobStatus.FAILED else "retry")
+            log.warning("notification_failed", user_id=user_id, jobs=len(user_jobs), error=str(e))
+            continue
+        for job in user_jobs:
+            job.status = JobStatus.DONE
+            NOTIFICATIONS.inc(kind=job.kind, outcome="sent")
+
+    db.commit()
+    return len(jobs)
+
+
+def run_worker(batch_size: int = BATCH_SIZE, poll_interval: float = POLL_INTERVAL):
+    sink = make_sink()
+    log.info("notifier_started", sink=type(sink).__name__)
+    while True:
+        db = SessionLocal()
+        try:
+            close_expired_auctions(db)
+            processed = process_batch(db, sink, batch_size)
+        except Exception as e:
+            db.rollback()
+            log.exception("notifier_error", error=str(e))
+            processed = 0
+        finally:
+            db.close()
+        # Keep draining while there is a backlog
+        if processed < batch_size:
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    from log import configure_logging
+
+    parser = argparse.ArgumentParser(description="Notification worker")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL)
+    args = parser.parse_args()
+
+    configure_logging()
+    run_worker(args.batch_size, args.poll_interval)
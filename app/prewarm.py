@@ -0,0 +1,250 @@
+"""
+Pre-warming of auctions about to close.
+
+Traffic on an auction peaks in its last minutes, and the close times are
+known in advance. Every PREWARM_INTERVAL seconds each worker looks
+PREWARM_LOOKAHEAD_MINUTES ahead. For the auctions ending in that window it
+renders the detail fragment and loads the bid history into memory, so
+those requests are answered without the database. The fragment is
+rendered once for all users: the username is a placeholder filled in per
+response.
+
+A `bid`, `auction_changed` or `auctions_changed` (bulk edit, closing) event drops
+an auction's warm copy. The next request or pass renders it again.
+Auctions leave the window when they end.
+
+While any auction is in the window, the worker's connection pool keeps
+DB_POOL_SIZE + DB_MAX_OVERFLOW idle connections, opened ahead of time,
+instead of DB_POOL_SIZE. Afterwards it shrinks back, and connections
+opened for a burst of requests are closed on the next pass.
+`closing_request_seconds{state}` compares warm and cold requests for
+closing auctions.
+"""
+
+import asyncio
+import json
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from markupsafe import escape
+from sqlalchemy import select
+import crud
+import events
+from database import (
+    DB_MAX_OVERFLOW, DB_POOL_SIZE, SessionLocal, open_idle_connections, set_idle_pool_size,
+    trim_idle_connections,
+)
+from increments import minimum_bid_cents
+from log import get_logger
+from metrics import Gauge, Histogram
+from money import from_cents
+from schemas import Auction
+from storage import storage
+from templating import env
+
+
+PREWARM_LOOKAHEAD = timedelta(minutes=float(os.getenv("PREWARM_LOOKAHEAD_MINUTES", "10")))
+PREWARM_INTERVAL = float(os.getenv("PREWARM_INTERVAL", "15"))
+PREWARM_MAX_AUCTIONS = int(os.getenv("PREWARM_MAX_AUCTIONS", "200"))
+
+DETAIL_TEMPLATE = "components/auction_detail.html"
+# Stands in for the username in shared renders; random so no auction text can contain it
+USERNAME_SLOT = f"prewarm-{secrets.token_hex(8)}"
+
+log = get_logger("prewarm")
+
+CLOSING_LATENCY = Histogram(
+    "closing_request_seconds",
+    "Latency of requests for auctions in the pre-warm window",
+    ["endpoint", "state"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+WARM_AUCTIONS = Gauge("prewarm_auctions", "Auctions ending soon that this worker keeps warm")
+IDLE_POOL_SIZE = Gauge("db_pool_idle_target", "Idle connections the pool keeps")
+
+
+class WarmAuction:
+    __slots__ = ("ends_at", "detail", "bids", "generation")
+
+    def __init__(self, ends_at: datetime):
+        self.ends_at = ends_at
+        self.detail: Optional[str] = None
+        self.bids: Optional[bytes] = None
+        # Bumped by invalidations, so a render that raced one is not kept
+        self.generation = 0
+
+
+_lock = threading.Lock()
+_warm: Dict[int, WarmAuction] = {}
+_pool_grown = False
+_task: Optional[asyncio.Task] = None
+
+
+# ============================================================================
+# RENDERING
+# ============================================================================
+
+def render_detail(db, auction: Auction) -> str:
+    """The detail fragment with USERNAME_SLOT in place of the username"""
+    return env.get_template(DETAIL_TEMPLATE).render(
+        auction=auction,
+        username=USERNAME_SLOT,
+        minimum_bid=from_cents(minimum_bid_cents(auction)),
+        image_urls=[storage.url(key) for key in crud.get_auction_image_keys(db, auction.id)],
+    )
+
+
+def personalize(html: str, username: str) -> str:
+    return html.replace(USERNAME_SLOT, str(escape(username)))
+
+
+def bids_payload(db, auction_id: int) -> bytes:
+    return json.dumps([
+        {
+            "id": bid.id,
+            "auction_id": bid.auction_id,
+            "bid_id": bid.bidder_id,
+            "amount": float(bid.amount),
+            "bid_time": bid.bid_time.isoformat() if bid.bid_time else None,
+        } for bid in crud.get_auction_bids(db, auction_id)
+    ]).encode()
+
+
+# ============================================================================
+# WARM COPIES
+# ============================================================================
+
+def generation(auction_id: int) -> Optional[int]:
+    """Current generation of a warm auction; pass it to remember_* after loading"""
+    entry = _warm.get(auction_id)
+    return entry.generation if entry is not None else None
+
+
+def warm_detail(auction_id: int) -> Optional[str]:
+    entry = _warm.get(auction_id)
+    return entry.detail if entry is not None else None
+
+
+def warm_bids(auction_id: int) -> Optional[bytes]:
+    entry = _warm.get(auction_id)
+    return entry.bids if entry is not None else None
+
+
+def remember_detail(auction_id: int, loaded_generation: Optional[int], html: str):
+    with _lock:
+        entry = _warm.get(auction_id)
+        if entry is not None and entry.generation == loaded_generation:
+            entry.detail = html
+
+
+def remember_bids(auction_id: int, loaded_generation: Optional[int], payload: bytes):
+    with _lock:
+        entry = _warm.get(auction_id)
+        if entry is not None and entry.generation == loaded_generation:
+            entry.bids = payload
+
+
+def is_closing(ends_at: Optional[datetime]) -> bool:
+    now = datetime.utcnow()
+    return ends_at is not None and now < ends_at <= now + PREWARM_LOOKAHEAD
+
+
+def observe(endpoint: str, started: float, warm: bool):
+    CLOSING_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, state="warm" if warm else "cold")
+
+
+@events.subscribe
+def _on_auction_event(batch: List[dict]):
+    changed = set()
+    for message in batch:
+        if message["kind"] in ("bid", "auction_changed"):
+            changed.add(message["auction_id"])
+        elif message["kind"] == "auctions_changed":
+            changed.update(message["auction_ids"])
+    with _lock:
+        for auction_id in changed:
+            entry = _warm.get(auction_id)
+            if entry is not None:
+                entry.generation += 1
+                entry.detail = None
+                entry.bids = None
+
+
+# ============================================================================
+# LOOKAHEAD
+# ============================================================================
+
+def _resize_pool(grow: bool):
+    global _pool_grown
+    if grow == _pool_grown:
+        if not grow:
+            # Connections opened for a burst stay idle in the pool until trimmed
+            closed = trim_idle_connections()
+            if closed:
+                log.info("pool_trimmed", closed=closed)
+        return
+    size = DB_POOL_SIZE + DB_MAX_OVERFLOW if grow else DB_POOL_SIZE
+    if set_idle_pool_size(size):
+        opened = open_idle_connections(size) if grow else 0
+        IDLE_POOL_SIZE.set(size)
+        log.info("pool_resized", idle=size, opened=opened)
+    _pool_grown = grow
+
+
+def warm_pass() -> int:
+    """Track the auctions ending soon and render the ones not warm yet; returns how many were rendered"""
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        closing = db.execute(
+            select(Auction.id, Auction.ends_at)
+            .where(Auction.is_active.is_(True), Auction.ends_at > now, Auction.ends_at <= now + PREWARM_LOOKAHEAD)
+            .order_by(Auction.ends_at)
+            .limit(PREWARM_MAX_AUCTIONS)
+        ).all()
+        with _lock:
+            window = {auction_id: ends_at for auction_id, ends_at in closing}
+            for auction_id in list(_warm):
+                if auction_id not in window:
+                    del _warm[auction_id]
+            for auction_id, ends_at in window.items():
+                entry = _warm.setdefault(auction_id, WarmAuction(ends_at))
+                entry.ends_at = ends_at
+            stale = [(auction_id, entry.generation) for auction_id, entry in _warm.items()
+                     if entry.detail is None or entry.bids is None]
+        WARM_AUCTIONS.set(len(window))
+        _resize_pool(bool(window))
+
+        for auction_id, loaded_generation in stale:
+            auction = crud.get_auction_by_id(db, auction_id)
+            if auction is None:
+                continue
+            remember_detail(auction_id, loaded_generation, render_detail(db, auction))
+            remember_bids(auction_id, loaded_generation, bids_payload(db, auction_id))
+    if stale:
+        log.info("auctions_prewarmed", rendered=len(stale), warm=len(window))
+    return len(stale)
+
+
+async def _warm_loop():
+    while True:
+        try:
+            await asyncio.to_thread(warm_pass)
+        except Exception as e:
+            log.exception("prewarm_failed", error=str(e))
+        await asyncio.sleep(PREWARM_INTERVAL)
+
+
+def start_prewarm():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_warm_loop())
+
+
+def stop_prewarm():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
@@ -0,0 +1,174 @@
+"""
+Per-request SQL query accounting.
+
+SQLAlchemy cursor events add the count and duration of every statement to
+the QueryStats of the current request, tracked in a ContextVar.
+QueryCountMiddleware logs requests that exceed the query budget and, when
+APP_ENV=development, reports the totals in a `Server-Timing` header.
+Transaction control (BEGIN, SAVEPOINT, RELEASE, ROLLBACK TO) is not counted.
+
+N+1 patterns show up as the same statement over and over: statements are
+counted per request after normalization (placeholders and IN lists
+collapsed), and a request running one more than QUERY_REPEAT_WARN times
+logs `query_repeated` with the statement.
+
+Tests pin an endpoint's query budget with:
+
+    with assert_max_queries(3):
+        client.post("/api/auctions/1/bid", json={"amount": "12.50"})
+"""
+
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from database import engine
+from log import get_logger
+from metrics import Counter, Histogram, route_label
+
+
+QUERY_COUNT_WARN = int(os.getenv("QUERY_COUNT_WARN", "10"))
+QUERY_TIME_WARN_MS = float(os.getenv("QUERY_TIME_WARN_MS", "100"))
+QUERY_REPEAT_WARN = int(os.getenv("QUERY_REPEAT_WARN", "5"))
+SERVER_TIMING = os.getenv("APP_ENV", "production") == "development"
+
+log = get_logger("sql")
+
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ["route"])
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements per HTTP request", ["route"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55)
+)
+DB_TIME = Histogram("db_time_per_request_seconds", "Time spent in SQL per HTTP request", ["route"])
+DB_REPEATED = Counter(
+    "db_repeated_queries_total",
+    "Requests running one statement more than QUERY_REPEAT_WARN times (likely N+1)",
+    ["route"]
+)
+
+TRANSACTION_CONTROL = ("BEGIN", "SAVEPOINT", "RELEASE", "ROLLBACK")
+_PLACEHOLDER = re.compile(r"\?|%\(\w+\)s|%s")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize(statement: str) -> str:
+    """The statement with placeholders and IN lists collapsed, so repeats compare equal"""
+    statement = _PLACEHOLDER_LIST.sub("(?)", _PLACEHOLDER.sub("?", statement))
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryStats:
+    __slots__ = ("count", "duration", "statements", "repeats")
+
+    def __init__(self, keep_statements: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Optional[List[str]] = [] if keep_statements else None
+        self.repeats: Dict[str, int] = {}
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        key = normalize(statement)
+        self.repeats[key] = self.repeats.get(key, 0) + 1
+        if self.statements is not None:
+            self.statements.append(statement)
+
+    def most_repeated(self) -> Tuple[Optional[str], int]:
+        """(statement, times) of the statement run most often, or (None, 0)"""
+        if not self.repeats:
+            return None, 0
+        statement = max(self.repeats, key=self.repeats.__getitem__)
+        return statement, self.repeats[statement]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Process-wide collectors opened by assert_max_queries; they also see
+# queries run on other threads (e.g. the app side of a TestClient)
+_captures: List[QueryStats] = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    if statement.lstrip()[:9].upper().startswith(TRANSACTION_CONTROL):
+        return
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    for capture in _captures:
+        capture.record(statement, duration)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+class QueryCountMiddleware:
+    """ASGI middleware tracking the queries issued while serving each request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message):
+            if SERVER_TIMING and message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = route_label(scope)
+            DB_QUERIES.inc(stats.count, route=route)
+            DB_QUERIES_PER_REQUEST.observe(stats.count, route=route)
+            DB_TIME.observe(stats.duration, route=route)
+            if stats.count > QUERY_COUNT_WARN or stats.duration * 1000 > QUERY_TIME_WARN_MS:
+                log.warning(
+                    "query_budget_exceeded",
+                    route=route,
+                    queries=stats.count,
+                    db_ms=round(stats.duration * 1000, 1)
+                )
+            statement, times = stats.most_repeated()
+            if times > QUERY_REPEAT_WARN:
+                DB_REPEATED.inc(route=route)
+                log.warning("query_repeated", route=route, times=times, statement=statement[:500])
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Fail if the block executes more than `limit` SQL statements"""
+    stats = QueryStats(keep_statements=True)
+    _captures.append(stats)
+    try:
+        yield stats
+    finally:
+        _captures.remove(stats)
+    if stats.count > limit:
+        listing = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(stats.statements))
+        raise AssertionError(f"{stats.count} queries executed, budget is {limit}:\n{listing}")
@@ -0,0 +1,383 @@
+"""
+Auction state rebuilt from the bid log.
+
+`bids` is append-only and its ids are a monotonic sequence, so it doubles
+as the event log of every auction. crud.create_bid projects each bid onto
+the auction row in place: the latest bid sets current_price_cents and
+winner_id. This module rebuilds that projection from the log.
+
+take_snapshots() stores each auction's folded state in `auction_snapshots`
+once it has SNAPSHOT_EVERY_BIDS new bids. Only bids older than
+SNAPSHOT_SETTLE are folded: concurrent transactions commit ids out of
+order, and a snapshot must not skip a bid that commits later. Current
+state is the latest snapshot plus the bids after it. state_at() starts
+from the latest snapshot before the requested point instead. Folding
+ignores bids at or before a state's through_bid_id, so replays can
+overlap safely.
+
+At startup recover() replays the live auctions and repairs rows that
+disagree with the log. The number of pending bids is counted first. If
+REPLAY_EVENTS_PER_SECOND (measure it with benchmarks/bench_replay.py)
+says replaying them exceeds RECOVERY_BUDGET_SECONDS, recovery runs in the
+background instead of delaying startup.
+
+Usage: python replay.py [--every 300]   (snapshot job, one run without --every)
+       python replay.py --recover
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy import and_, func, insert, select, union_all, update
+from sqlalchemy.orm import Session
+import events
+from database import SessionLocal
+from log import get_logger
+from metrics import Counter
+from schemas import Auction, AuctionSnapshot, Bid, BidArchive
+
+
+SNAPSHOT_EVERY_BIDS = int(os.getenv("SNAPSHOT_EVERY_BIDS", "500"))
+SNAPSHOT_SETTLE = timedelta(minutes=1)
+REPLAY_ON_STARTUP = os.getenv("REPLAY_ON_STARTUP", "1").lower() in ("1", "true", "yes")
+REPLAY_EVENTS_PER_SECOND = float(os.getenv("REPLAY_EVENTS_PER_SECOND", "100000"))
+RECOVERY_BUDGET_SECONDS = float(os.getenv("RECOVERY_BUDGET_SECONDS", "5"))
+# Bids folded per round trip
+REPLAY_BATCH = 100_000
+# Auctions snapshotted per statement (keeps IN lists short)
+AUCTION_CHUNK = 500
+
+log = get_logger("replay")
+
+EVENTS_REPLAYED = Counter("bid_events_replayed_total", "Bids folded into auction state by replay")
+
+_recovery: Optional[asyncio.Task] = None
+
+
+class AuctionState(NamedTuple):
+    current_price_cents: int
+    winner_id: Optional[int]
+    bid_count: int
+    # Last bid folded in; 0 before the first
+    through_bid_id: int
+    through_bid_time: Optional[datetime]
+
+
+# ============================================================================
+# FOLDING
+# ============================================================================
+
+def fold(states: Dict[int, AuctionState], auction_ids: np.ndarray, bid_ids: np.ndarray,
+         bidder_ids: np.ndarray, amounts: np.ndarray, bid_times: np.ndarray) -> int:
+    """
+    Apply bids to `states` in place, as crud.create_bid does: the latest bid
+    sets the price and the winner. Bids of auctions not in `states`, and
+    bids already folded in, are skipped. Returns how many were applied.
+    """
+    if not len(bid_ids):
+        return 0
+    keys, inverse = np.unique(auction_ids, return_inverse=True)
+    known = np.array([key in states for key in keys.tolist()])
+    through = np.array([states[key].through_bid_id if key in states else 0 for key in keys.tolist()], dtype=np.int64)
+    fresh = known[inverse] & (bid_ids > through[inverse])
+    if not fresh.any():
+        return 0
+    auction_ids, bid_ids = auction_ids[fresh], bid_ids[fresh]
+    bidder_ids, amounts, bid_times = bidder_ids[fresh], amounts[fresh], bid_times[fresh]
+
+    order = np.lexsort((bid_ids, auction_ids))
+    auction_ids = auction_ids[order]
+    last = np.flatnonzero(np.append(auction_ids[1:] != auction_ids[:-1], True))
+    counts = np.diff(np.append(-1, last))
+    latest = order[last]
+    for auction_id, index, count, bid_time in zip(
+        auction_ids[last].tolist(), latest.tolist(), counts.tolist(), bid_times[latest].tolist()
+    ):
+        states[auction_id] = AuctionState(
+            int(amounts[index]), int(bidder_ids[index]), states[auction_id].bid_count + count,
+            int(bid_ids[index]), bid_time,
+        )
+    return len(bid_ids)
+
+
+def _fold_rows(states: Dict[int, AuctionState], rows: List[tuple]) -> int:
+    if not rows:
+        return 0
+    columns = list(zip(*rows))
+    return fold(
+        states,
+        np.array(columns[0], dtype=np.int64),
+        np.array(columns[1], dtype=np.int64),
+        np.array(columns[2], dtype=np.int64),
+        np.array(columns[3], dtype=np.int64),
+        np.array(columns[4], dtype="datetime64[us]"),
+    )
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+def _latest_snapshots():
+    return select(
+        AuctionSnapshot.auction_id, func.max(AuctionSnapshot.through_bid_id).label("through_bid_id")
+    ).group_by(AuctionSnapshot.auction_id).subquery()
+
+
+def _initial_states(db: Session, condition) -> Tuple[Dict[int, AuctionState], Dict[int, tuple]]:
+    """Latest snapshot (or the start price) per matching auction, and the stored (price, winner)"""
+    latest = _latest_snapshots()
+    rows = db.execute(
+        select(
+            Auction.id, Auction.start_price_cents, Auction.current_price_cents, Auction.winner_id,
+            AuctionSnapshot.current_price_cents, AuctionSnapshot.winner_id, AuctionSnapshot.bid_count,
+            AuctionSnapshot.through_bid_id, AuctionSnapshot.through_bid_time,
+        )
+        .outerjoin(latest, latest.c.auction_id == Auction.id)
+        .outerjoin(AuctionSnapshot, and_(
+            AuctionSnapshot.auction_id == latest.c.auction_id,
+            AuctionSnapshot.through_bid_id == latest.c.through_bid_id,
+        ))
+        .where(condition)
+    ).all()
+    states, stored = {}, {}
+    for auction_id, start, price, winner, snap_price, snap_winner, snap_count, snap_through, snap_time in rows:
+        if snap_through is None:
+            states[auction_id] = AuctionState(start, None, 0, 0, None)
+        else:
+            states[auction_id] = AuctionState(snap_price, snap_winner, snap_count, snap_through, snap_time)
+        stored[auction_id] = (price, winner)
+    return states, stored
+
+
+def _pending_bids(condition, through_bid_id: Optional[int] = None):
+    """Hot and archived bids of matching auctions after their latest snapshot, in log order"""
+    latest = _latest_snapshots()
+    parts = []
+    for model in (Bid, BidArchive):
+        query = (
+            select(model.auction_id, model.id, model.bidder_id, model.amount_cents, model.bid_time)
+            .join(Auction, Auction.id == model.auction_id)
+            .outerjoin(latest, latest.c.auction_id == model.auction_id)
+            .where(condition, model.id > func.coalesce(latest.c.through_bid_id, 0))
+        )
+        if through_bid_id is not None:
+            query = query.where(model.id <= through_bid_id)
+        parts.append(query)
+    pending = union_all(*parts).subquery()
+    return select(pending).order_by(pending.c.id)
+
+
+def _replay(db: Session, condition, through_bid_id: Optional[int] = None):
+    states, stored = _initial_states(db, condition)
+    folded = 0
+    result = db.execute(
+        _pending_bids(condition, through_bid_id).execution_options(yield_per=REPLAY_BATCH)
+    )
+    for rows in result.partitions():
+        folded += _fold_rows(states, rows)
+    EVENTS_REPLAYED.inc(folded)
+    return states, stored, folded
+
+
+def replay(db: Session, condition, through_bid_id: Optional[int] = None) -> Tuple[Dict[int, AuctionState], int]:
+    """Current state of the matching auctions from snapshots and the bids after them; returns (states, bids folded)"""
+    states, _, folded = _replay(db, condition, through_bid_id)
+    return states, folded
+
+
+def state_at(db: Session, auction_id: int, through_bid_id: Optional[int] = None,
+             at: Optional[datetime] = None) -> Optional[AuctionState]:
+    """An auction's state after bid `through_bid_id` and/or at time `at`"""
+    auction = db.get(Auction, auction_id)
+    if auction is None:
+        return None
+    query = select(AuctionSnapshot).where(AuctionSnapshot.auction_id == auction_id)
+    if through_bid_id is not None:
+        query = query.where(AuctionSnapshot.through_bid_id <= through_bid_id)
+    if at is not None:
+        query = query.where(AuctionSnapshot.through_bid_time <= at)
+    snapshot = db.scalars(query.order_by(AuctionSnapshot.through_bid_id.desc()).limit(1)).first()
+    if snapshot is None:
+        state = AuctionState(auction.start_price_cents, None, 0, 0, None)
+    else:
+        state = AuctionState(
+            snapshot.current_price_cents, snapshot.winner_id, snapshot.bid_count,
+            snapshot.through_bid_id, snapshot.through_bid_time,
+        )
+
+    parts = []
+    for model in (Bid, BidArchive):
+        query = select(model.auction_id, model.id, model.bidder_id, model.amount_cents, model.bid_time).where(
+            model.auction_id == auction_id, model.id > state.through_bid_id
+        )
+        if through_bid_id is not None:
+            query = query.where(model.id <= through_bid_id)
+        if at is not None:
+            query = query.where(model.bid_time <= at)
+        parts.append(query)
+    states = {auction_id: state}
+    _fold_rows(states, db.execute(union_all(*parts)).all())
+    return states[auction_id]
+
+
+# ============================================================================
+# SNAPSHOTS
+# ============================================================================
+
+def take_snapshots(db: Session, every: int = SNAPSHOT_EVERY_BIDS) -> int:
+    """Snapshot the auctions with at least `every` settled bids since their last snapshot; returns how many"""
+    cutoff = datetime.utcnow() - SNAPSHOT_SETTLE
+    settled = db.scalar(
+        select(Bid.id).where(Bid.bid_time <= cutoff).order_by(Bid.id.desc()).limit(1)
+    )
+    if settled is None:
+        return 0
+    latest = _latest_snapshots()
+    auction_ids = db.scalars(
+        select(Bid.auction_id)
+        .outerjoin(latest, latest.c.auction_id == Bid.auction_id)
+        .where(Bid.id > func.coalesce(latest.c.through_bid_id, 0), Bid.id <= settled)
+        .group_by(Bid.auction_id)
+        .having(func.count() >= every)
+        .order_by(Bid.auction_id)
+    ).all()
+
+    taken = 0
+    for start in range(0, len(auction_ids), AUCTION_CHUNK):
+        chunk = auction_ids[start:start + AUCTION_CHUNK]
+        states, _ = replay(db, Auction.id.in_(chunk), through_bid_id=settled)
+        now = datetime.utcnow()
+        rows = [
+            {
+                "auction_id": auction_id,
+                "through_bid_id": state.through_bid_id,
+                "through_bid_time": state.through_bid_time,
+                "current_price_cents": state.current_price_cents,
+                "winner_id": state.winner_id,
+                "bid_count": state.bid_count,
+                "create_at": now,
+            }
+            for auction_id, state in states.items() if state.through_bid_id
+        ]
+        if rows:
+            db.execute(insert(AuctionSnapshot.__table__), rows)
+        db.commit()
+        taken += len(rows)
+    if taken:
+        log.info("snapshots_taken", auctions=taken, through_bid_id=settled)
+    return taken
+
+
+# ============================================================================
+# RECOVERY
+# ============================================================================
+
+LIVE = Auction.is_active.is_(True)
+
+
+def count_pending(db: Session) -> int:
+    """Bids recovery would replay"""
+    pending = _pending_bids(LIVE).subquery()
+    return db.scalar(select(func.count()).select_from(pending))
+
+
+def recover(db: Session) -> dict:
+    """Replay the live auctions and repair the rows that disagree with the log"""
+    started = time.perf_counter()
+    states, stored, folded = _replay(db, LIVE)
+    repaired = []
+    for auction_id, state in states.items():
+        price, winner = stored[auction_id]
+        if not state.bid_count or (price, winner) == (state.current_price_cents, state.winner_id):
+            continue
+        # Only if no bid landed since the read; that bid's projection wins
+        result = db.execute(
+            update(Auction)
+            .where(
+                Auction.id == auction_id,
+                Auction.current_price_cents == price,
+                Auction.winner_id.is_not_distinct_from(winner),
+            )
+            .values(current_price_cents=state.current_price_cents, winner_id=state.winner_id)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            repaired.append(auction_id)
+            events.publish(db, "auction_changed", auction_id=auction_id)
+    db.commit()
+    seconds = time.perf_counter() - started
+    summary = {
+        "auctions": len(states),
+        "bids": folded,
+        "repaired": len(repaired),
+        "seconds": round(seconds, 3),
+        "bids_per_second": round(folded / seconds) if seconds else 0,
+    }
+    if repaired:
+        log.warning("auctions_repaired", auction_ids=repaired[:50], **summary)
+    else:
+        log.info("recovery_done", **summary)
+    return summary
+
+
+def _recover_job():
+    with SessionLocal() as db:
+        try:
+            recover(db)
+        except Exception as e:
+            db.rollback()
+            log.exception("recovery_failed", error=str(e))
+
+
+async def recover_on_startup():
+    """Run recovery before serving if it fits RECOVERY_BUDGET_SECONDS, else in the background"""
+    global _recovery
+    if not REPLAY_ON_STARTUP:
+        return
+    try:
+        with SessionLocal() as db:
+            pending = await asyncio.to_thread(count_pending, db)
+    except Exception as e:
+        log.exception("recovery_failed", error=str(e))
+        return
+    estimate = pending / REPLAY_EVENTS_PER_SECOND
+    if estimate <= RECOVERY_BUDGET_SECONDS:
+        await asyncio.to_thread(_recover_job)
+        return
+    log.warning("recovery_in_background", bids=pending, estimated_seconds=round(estimate, 1))
+    _recovery = asyncio.create_task(asyncio.to_thread(_recover_job))
+
+
+def run_job(every: Optional[float] = None):
+    while True:
+        db = SessionLocal()
+        try:
+            take_snapshots(db)
+        except Exception as e:
+            db.rollback()
+            log.exception("snapshot_error", error=str(e))
+        finally:
+            db.close()
+        if every is None:
+            return
+        time.sleep(every)
+
+
+if __name__ == "__main__":
+    from log import configure_logging
+
+    parser = argparse.ArgumentParser(description="Snapshot auction state, or replay the bid log")
+    parser.add_argument("--every", type=float, default=None, help="keep snapshotting, every N seconds")
+    parser.add_argument("--recover", action="store_true", help="replay live auctions and repair their rows")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.recover:
+        _recover_job()
+    else:
+        run_job(args.every)
@@ -6,48 +6,114 @@ This ensures only admins can create auctions
 
 import os
 import crud
+import images
+import prewarm
+import time
+import usercache
 import uuid
 from datetime import datetime
-from fastapi.templating import Jinja2Templates
-from fastapi import APIRouter, Request, Depends, UploadFile, File, HTTPException
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Request, Depends, UploadFile, File, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse
 from sqlalchemy.orm import Session
 from database import get_db
-from models import AuctionCreate, AuctionUpdate 
+from log import get_logger
+from models import AuctionCreate, AuctionUpdate, UploadCompleteRequest, UploadUrlRequest
+from money import from_cents, to_cents
+from schemas import Role
+from sessions import current_username
+from storage import storage
+from templating import templates
 
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-TEMPLATES_DIR = os.path.join(BASE_DIR, "app", "templates")
-UPLOAD_DIR = os.path.join(BASE_DIR, "app", "uploads")
-templates = Jinja2Templates(directory=TEMPLATES_DIR)
-
 router_auction = APIRouter(tags=["posts"])
+log = get_logger("auction")
 
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
+
+def _uploader_error(request: Request, db: Session) -> Optional[JSONResponse]:
+    """401/403 response unless an admin (the only role creating auctions) is logged in"""
+    user = usercache.current_user(request, db)
+    if user is None:
+        return JSONResponse({"detail": "Not authenticated"}, status_code=401)
+    if user.role != Role.ADMIN:
+        log.warning("upload_forbidden", username=user.username, role=user.role.value)
+        return JSONResponse({"detail": "Admin role required"}, status_code=403)
+    return None
+
+
 # ============================================================================
 # AUCTION CRUD API ROUTES
 # ============================================================================
 
 @router_auction.post("/api/auctions/upload-image")
-async def upload_image(file: UploadFile = File(...)):
+async def upload_image(request: Request, file: UploadFile = File(...), db: Session = Depends(get_db)):
+    error = _uploader_error(request, db)
+    if error is not None:
+        return error
     ext = os.path.splitext(file.filename)[1].lower()
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Invalid format")
     
     filename = f"{uuid.uuid4()}{ext}"
-    filepath = os.path.join(UPLOAD_DIR, filename)
      
     contents = await file.read()
-    with open(filepath, "wb") as f:
-        f.write(contents)
+    if len(contents) > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="File too large")
+    sha256 = images.save_file(filename, contents, file.content_type)
+    crud.create_image(db, filename, len(contents), sha256)
         
     return JSONResponse({
         "success": True,
         "filename": filename,
         "size": len(contents),
-        "path": filepath
+        "path": storage.url(filename)
+    })
+
+
+@router_auction.post("/api/auctions/upload-url")
+async def create_upload_url(request: Request, data: UploadUrlRequest, db: Session = Depends(get_db)):
+    """
+    Presigned direct-to-storage upload target.
+
+    Returns {"direct": false} when the storage backend has no direct uploads;
+    the client then posts the file to /api/auctions/upload-image instead.
+    """
+    error = _uploader_error(request, db)
+    if error is not None:
+        return error
+    ext = os.path.splitext(data.filename)[1].lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Invalid format")
+    if data.size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=400, detail="File too large")
+    
+    key = f"{uuid.uuid4()}{ext}"
+    upload = storage.presign_upload(key, data.content_type, MAX_FILE_SIZE)
+    if upload is None:
+        return JSONResponse({"direct": False})
+    
+    crud.create_image(db, key, None, None)
+    return JSONResponse({"direct": True, "key": key, "upload": upload})
+
+
+@router_auction.post("/api/auctions/upload-complete")
+async def complete_upload(request: Request, data: UploadCompleteRequest, db: Session = Depends(get_db)):
+    """Confirm a direct upload landed in storage"""
+    error = _uploader_error(request, db)
+    if error is not None:
+        return error
+    size = storage.size(data.key)
+    if size is None or not crud.complete_image(db, data.key, size):
+        raise HTTPException(status_code=400, detail="Upload not found")
+    
+    return JSONResponse({
+        "success": True,
+        "filename": data.key,
+        "size": size,
+        "path": storage.url(data.key)
     })
     
 @router_auction.get("/api/auctions/list", response_class=HTMLResponse)
@@ -58,7 +124,7 @@ async def get_auctions_list(
     db: Session = Depends(get_db)
 ):
     """Get auctions list as HTML (for HTMX)"""
-    username = request.cookies.get("username")
+    username = current_username(request)
     if not username:
         return HTMLResponse(status_code=401)
     
@@ -73,13 +139,10 @@ async def get_auctions_list(
 @router_auction.get("/api/auctions/create-form", response_class=HTMLResponse)
 async def get_create_form(request: Request):
     """Get create form for auction"""
-    username = request.cookies.get("username")
+    username = current_username(request)
     if not username:
         return HTMLResponse(status_code=401)
-     
-    print(f"[DEBUG CREATE-FORM] Loading create form for user: {username}")
 
-    
     return templates.TemplateResponse(
         "components/auction_form.html",
         {
@@ -100,25 +163,22 @@ async def create_auction(
     Updated: Now checks admin role before creating
     """
     
-    username = request.cookies.get("username")
-    print(f"[DEBUG CREATE] Starting create_auction for user: {username}")
+    username = current_username(request)
     
     if not username:
-        print("[DEBUG CREATE] No username - returning 401")
         return HTMLResponse(status_code=401)
     
     # ========================================================================
     # GET USER AND CHECK ROLE ← IMPORTANT
     # ========================================================================
-    user = crud.get_user_by_name(db, username=username)
+    user = usercache.get_by_name(db, username)
     
     if not user:
-        print("[DEBUG CREATE] User not found in DB")
         return HTMLResponse(status_code=404)
     
     # ← CHECK IF ADMIN (use .value to get enum string)
     if user.role.value != "admin":
-        print(f"[DEBUG CREATE] Unauthorized: {username} is not admin (role: {user.role.value})")
+        log.warning("create_auction_forbidden", username=username, role=user.role.value)
         return HTMLResponse(
             status_code=403,
             content="<p class='text-red-600 font-semibold'>Only administrators can create auctions</p>"
@@ -127,7 +187,6 @@ async def create_auction(
     # User is admin, continue with creation...
     try:
         form_data = await request.form()
-        print(f"[DEBUG CREATE] Form keys: {list(form_data.keys())}")
         
         title = form_data.get("title", "").strip()
         content = form_data.get("content", "").strip()
@@ -135,19 +194,19 @@ async def create_auction(
         ends_at_str = form_data.get("ends_at", "").strip()
         image_filename = form_data.get("image_filename", "").strip()
         image_filenames_json = form_data.get("image_filenames", "").strip()
+        increment_ladder = form_data.get("increment_ladder", "").strip()
         
         try:
-            start_price = float(start_price_str)
+            start_price = from_cents(to_cents(start_price_str))
             if start_price < 0:
                 raise ValueError("Start price must be positive")
             ends_at = datetime.fromisoformat(ends_at_str)
             if ends_at <= datetime.utcnow():
                 raise ValueError("End time must be in future")
         except ValueError as e:
-            print(e)
+            log.info("create_auction_invalid", username=username, error=str(e))
         
         if not title or not content:
-            print("[DEBUG CREATE] Validation failed")
             return templates.TemplateResponse(
                 "components/auction_form.html",
                 {
@@ -164,12 +223,12 @@ async def create_auction(
             start_price=start_price,
             ends_at=ends_at,
             image_path = image_filename if image_filename else None,
-            image_paths=image_filenames_json
+            image_paths=image_filenames_json,
+            increment_ladder=increment_ladder or None
         )
         
-        print("[DEBUG CREATE] Creating auction in DB")
         new_auction = crud.create_auction(db, auction)
-        print(f"[DEBUG CREATE] ✓ SUCCESS - id={new_auction.id}, title={new_auction.title}, by admin {username}")
+        log.info("auction_created", auction_id=new_auction.id, username=username)
         
         return templates.TemplateResponse(
             "components/auction_item.html",
@@ -177,9 +236,7 @@ async def create_auction(
         )
     
     except Exception as e:
-        print(f"[DEBUG CREATE] ERROR: {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"[DEBUG CREATE] Traceback: {traceback.format_exc()}")
+        log.exception("create_auction_error", username=username, error=f"{type(e).__name__}: {e}")
         return templates.TemplateResponse(
             "components/auction_form.html",
             {
@@ -197,7 +254,7 @@ async def edit_auction_form(
     db: Session = Depends(get_db)
 ):
     """Get edit form for auction"""
-    username = request.cookies.get("username")
+    username = current_username(request)
     if not username:
         return HTMLResponse(status_code=401)
     
@@ -223,7 +280,7 @@ async def update_auction(
     db: Session = Depends(get_db)
 ):
     """Update auction (form submission via HTMX)"""
-    username = request.cookies.get("username")
+    username = current_username(request)
     if not username:
         return HTMLResponse(status_code=401)
     
@@ -234,15 +291,17 @@ async def update_auction(
         content = form_data.get("content", "").strip()
         image_filename = form_data.get("image_filename", "").strip()
         image_filenames_json = form_data.get("image_filenames", "").strip()
+        version = form_data.get("version", "").strip()
         
-        if not title or not content:
+        if not title or not content or not version.isdigit():
             auction = crud.get_auction_by_id(db, auction_id)
             return templates.TemplateResponse(
                 "components/auction_form.html",
                 {
                     "request": request,
                     "auction": auction,
-                    "error": "Title and content are required",
+                    "error": "Title and content are required" if version.isdigit()
+                             else "This form is outdated, please reopen the auction to edit it",
                     "mode": "edit",
                     "auction_id": auction_id
                 }
@@ -255,7 +314,22 @@ async def update_auction(
             image_paths=image_filenames_json if image_filenames_json else None
         )
         
-        updated_auction = crud.update_auction(db, auction_id, auction_update)
+        try:
+            updated_auction = crud.update_auction(db, auction_id, auction_update, expected_version=int(version))
+        except crud.AuctionConflict as conflict:
+            # auction_form.js swaps 409s in, showing the current values
+            return templates.TemplateResponse(
+                "components/auction_form.html",
+                {
+                    "request": request,
+                    "auction": conflict.auction,
+                    "error": "Someone else changed this auction meanwhile. Its current values are shown; "
+                             "apply your changes again.",
+                    "mode": "edit",
+                    "auction_id": auction_id
+                },
+                status_code=409
+            )
         
         if not updated_auction:
             return HTMLResponse("<p class='text-red-600'>Auction not found</p>", status_code=404)
@@ -266,7 +340,7 @@ async def update_auction(
         )
     
     except Exception as e:
-        print(f"[DEBUG UPDATE] Error: {str(e)}")
+        log.exception("update_auction_error", auction_id=auction_id, error=str(e))
         auction = crud.get_auction_by_id(db, auction_id)
         return templates.TemplateResponse(
             "components/auction_form.html",
@@ -284,42 +358,28 @@ async def update_auction(
 async def delete_auction(
     request: Request,
     auction_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Delete auction"""
-    username = request.cookies.get("username")
+    username = current_username(request)
     if not username:
         return HTMLResponse(status_code=401)
     
     try:
+        image_keys = crud.get_auction_image_keys(db, auction_id)
         auction = crud.delete_auction(db, auction_id)
         
         if not auction:
             return HTMLResponse("<p class='text-red-600'>Auction not found</p>", status_code=404)
         
-        # Delete image file if exist
+        # Files are removed after the response is sent
         if auction.image_path:
-            image_path = os.path.join(UPLOAD_DIR, auction.image_path)
-            try:
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-            except Exception:
-                print("Could not delete the image file")
-        
-        # Delete multiple images
-        if auction.image_paths:
-            import json
-            try:
-                image_paths = json.loads(auction.image_paths)
-                for img_filename in image_paths:
-                    image_path = os.path.join(UPLOAD_DIR, img_filename)
-                    if os.path.exists(image_path):
-                        os.remove(image_path)
-            except json.JSONDecodeError:
-                pass
+            image_keys.append(auction.image_path)
+        background_tasks.add_task(images.delete_files, image_keys)
     
     except Exception as e:
-        print(f"[DEBUG DELETE] Error: {str(e)}")
+        log.exception("delete_auction_error", auction_id=auction_id, error=str(e))
         return HTMLResponse(f"<p class='text-red-600'>Error: {str(e)}</p>", status_code=500)
 
 
@@ -329,21 +389,25 @@ async def get_auction_detail(
     auction_id: int,
     db: Session = Depends(get_db)
 ):
-    """Get auction detail view"""
-    username = request.cookies.get("username")
+    """Get auction detail view (pre-rendered for auctions about to close, see prewarm.py)"""
+    started = time.perf_counter()
+    username = current_username(request)
     if not username:
         return HTMLResponse(status_code=401)
     
+    html = prewarm.warm_detail(auction_id)
+    if html is not None:
+        prewarm.observe("detail", started, warm=True)
+        return HTMLResponse(prewarm.personalize(html, username))
+    
+    loaded_generation = prewarm.generation(auction_id)
     auction = crud.get_auction_by_id(db, auction_id)
     
     if not auction:
         return HTMLResponse("<p class='text-red-600'>Auction not found</p>", status_code=404)
     
-    return templates.TemplateResponse(
-        "components/auction_detail.html",
-        {
-            "request": request, 
-            "auction": auction,
-            "username": username,
-        }
-    )
\ No newline at end of file
+    html = prewarm.render_detail(db, auction)
+    prewarm.remember_detail(auction_id, loaded_generation, html)
+    if prewarm.is_closing(auction.ends_at):
+        prewarm.observe("detail", started, warm=False)
+    return HTMLResponse(prewarm.personalize(html, username))
\ No newline at end of file
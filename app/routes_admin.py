@@ -0,0 +1,103 @@
+import analytics
+import crud
+import images
+import usercache
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Request, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from database import SessionLocal, get_db
+from log import get_logger
+from models import BulkAuctionDelete, BulkAuctionUpdate, naive_utc
+from schemas import Role
+
+
+router_admin = APIRouter(tags=["admin"])
+log = get_logger("admin")
+
+
+def _admin_error(request: Request, db: Session) -> Optional[JSONResponse]:
+    """401/403 response unless the request comes from an admin"""
+    user = usercache.current_user(request, db)
+    if user is None:
+        return JSONResponse({"detail": "Not authenticated"}, status_code=401)
+    if user.role != Role.ADMIN:
+        return JSONResponse({"detail": "Admin role required"}, status_code=403)
+    return None
+
+
+# ============================================================================
+# ANALYTICS
+# ============================================================================
+
+@router_admin.get("/api/admin/analytics")
+async def get_analytics(
+    request: Request,
+    auction_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    points: int = 500,
+    db: Session = Depends(get_db)
+):
+    """Bid activity series and weekday/hour heatmap, from bid_rollups only (default: last 24h, whole site)"""
+    error = _admin_error(request, db)
+    if error:
+        return error
+    end = naive_utc(end) if end else datetime.utcnow()
+    start = naive_utc(start) if start else end - timedelta(days=1)
+    if start >= end:
+        return JSONResponse({"detail": "start must be before end"}, status_code=400)
+    return JSONResponse(analytics.report(db, start, end, auction_id=auction_id, points=points))
+
+
+# ============================================================================
+# BULK AUCTION OPERATIONS
+# ============================================================================
+
+def _purge_deleted(auction_ids: List[int], primary_image_keys: List[str]):
+    """Background cleanup after a bulk delete: child rows, then image files"""
+    with SessionLocal() as db:
+        image_keys = crud.purge_auction_children(db, auction_ids)
+    images.delete_files(image_keys + primary_image_keys)
+    log.info("bulk_delete_purged", auctions=len(auction_ids), files=len(image_keys) + len(primary_image_keys))
+
+
+@router_admin.post("/api/admin/auctions/bulk-update")
+async def bulk_update_auctions(request: Request, data: BulkAuctionUpdate, db: Session = Depends(get_db)):
+    """Extend, reschedule or (de)activate every matching auction in one statement"""
+    error = _admin_error(request, db)
+    if error:
+        return error
+    if data.dry_run:
+        return JSONResponse({"dry_run": True, **crud.count_bulk_targets(db, data.filter)})
+    auction_ids = crud.bulk_update_auctions(
+        db, data.filter,
+        extend_minutes=data.extend_minutes,
+        ends_at=data.ends_at,
+        is_active=data.is_active,
+    )
+    log.info("bulk_update", auctions=len(auction_ids), extend_minutes=data.extend_minutes, is_active=data.is_active)
+    return JSONResponse({"dry_run": False, "updated": len(auction_ids), "auction_ids": auction_ids})
+
+
+@router_admin.post("/api/admin/auctions/bulk-delete")
+async def bulk_delete_auctions(
+    request: Request,
+    data: BulkAuctionDelete,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """Delete every matching auction in one statement; bids and images are removed in the background"""
+    error = _admin_error(request, db)
+    if error:
+        return error
+    if data.dry_run:
+        return JSONResponse({"dry_run": True, **crud.count_bulk_targets(db, data.filter)})
+    deleted = crud.bulk_delete_auctions(db, data.filter)
+    auction_ids = [auction_id for auction_id, _ in deleted]
+    primary_image_keys = [image_path for _, image_path in deleted if image_path]
+    if auction_ids:
+        background_tasks.add_task(_purge_deleted, auction_ids, primary_image_keys)
+    log.info("bulk_delete", auctions=len(auction_ids))
+    return JSONResponse({"dry_run": False, "deleted": len(auction_ids), "auction_ids": auction_ids})
@@ -1,30 +1,40 @@
 import crud
+import prewarm
+import time
+import usercache
 from datetime import datetime
 from fastapi import APIRouter, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
 from database import get_db
+from increments import ladder_for
+from log import get_logger
+from metrics import Counter
+from money import format_cents, from_cents, to_cents
+from sessions import current_username
 
 
 router_bid = APIRouter(tags=["bidding"])
+log = get_logger("bid")
+
+BIDS = Counter("auction_bids_total", "Bid attempts by outcome", ["outcome"])
 
 @router_bid.post("/api/auctions/{auction_id}/bid", response_model=dict)
 async def place_bid(request: Request, auction_id: int, db: Session=Depends(get_db)):
-    username = request.cookies.get("username")
-    print(f"[BID] username: {username}")
+    username = current_username(request)
     if not username:
-        print("[BID] No username found")
+        BIDS.inc(outcome="unauthenticated")
         return JSONResponse(
             status_code=401,
             content={"detail": "You must be logged in to place a bid"}
         )
     try:
-        user = crud.get_user_by_name(db, username)
+        user = usercache.get_by_name(db, username)
         auction = crud.get_auction_by_id(db, auction_id)
 
         # Check auction is_active
         if not auction.is_active:
-            print("[BID] Auction not active")
+            BIDS.inc(outcome="inactive")
             return JSONResponse(
                 status_code=400,
                 content={"detail": "Auction not active"}
@@ -32,7 +42,7 @@ async def place_bid(request: Request, auction_id: int, db: Session=Depends(get_d
 
         # Check auction expired
         if datetime.utcnow() >= auction.ends_at:
-            print("[BID] Auction is expired")
+            BIDS.inc(outcome="expired")
             return JSONResponse(
                 status_code=400,
                 content={"detail": "Auction has expired"}
@@ -42,57 +52,60 @@ async def place_bid(request: Request, auction_id: int, db: Session=Depends(get_d
         bid_amount_str = body.get("amount")
        
         try:
-            bid_amount = float(bid_amount_str)
-        except Exception:
-            print(f"[BID] Invalid bid amount: {bid_amount_str}")
+            bid_cents = to_cents(bid_amount_str)
+        except ValueError:
+            BIDS.inc(outcome="invalid")
+            log.info("bid_invalid_amount", auction_id=auction_id, amount=bid_amount_str)
             return JSONResponse(
                 status_code=400,
                 content={"detail": "Bid amount must be a valid number"}
             )
-        min_bid = auction.current_price + 1.0
-        if bid_amount < min_bid:
-            print(f"[BID] Bid too low: {bid_amount} < {min_bid}")
+        ladder = ladder_for(auction)
+        min_bid_cents = ladder.minimum_bid(auction.current_price_cents)
+        if bid_cents < min_bid_cents:
+            BIDS.inc(outcome="too_low")
             return JSONResponse(
                 status_code=400,
                 content={
-                    "detail": f"Bid must be at least ${min_bid:.2f}",
-                    "minimum_bid": min_bid,
-                    "current_price": auction.current_price
+                    "detail": f"Bid must be at least ${format_cents(min_bid_cents)}",
+                    "minimum_bid": float(from_cents(min_bid_cents)),
+                    "current_price": float(auction.current_price)
                 }
             )
         
-        if bid_amount <= 0:
-            print(f"[BID] Negative bid: {bid_amount}")
+        if bid_cents <= 0:
+            BIDS.inc(outcome="invalid")
             return JSONResponse(
                 status_code=400,
                 content={"detail": "Bid amount must be positive"}
             )
         
-        bid = crud.create_bid(db, auction_id, user.id, bid_amount)
+        bid = crud.create_bid(db, auction_id, user.id, bid_cents)
         if not bid:
-            print("[BID] Failed to create bid")
+            BIDS.inc(outcome="error")
+            log.error("bid_create_failed", auction_id=auction_id, user_id=user.id)
             return JSONResponse(
                 status_code=500,
                 content={"detail": "Failed to place bid"}
             )
         
-        print(f"[BID] Placed: User {username} (ID: {user.id}) bid ${bid_amount:.2f} on auction {auction_id}")
+        BIDS.inc(outcome="accepted")
+        log.info("bid_placed", auction_id=auction_id, user_id=user.id, amount_cents=bid_cents)
         
         return JSONResponse(
             status_code=200,
             content={
                 "success": True,
-                "message": f"Bid of ${bid_amount:.2f} placed successfully!",
+                "message": f"Bid of ${format_cents(bid_cents)} placed successfully!",
                 "bid_id": bid.id,
-                "amount": bid.amount,
-                "new_minimum": bid_amount + 1.00
+                "amount": float(bid.amount),
+                "new_minimum": float(from_cents(ladder.minimum_bid(bid_cents)))
             }
         )
             
     except Exception as e:
-        print(f"[BID] ✗ Error: {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        BIDS.inc(outcome="error")
+        log.exception("bid_error", auction_id=auction_id, error=f"{type(e).__name__}: {e}")
         
         return JSONResponse(
             status_code=500,
@@ -102,19 +115,18 @@ async def place_bid(request: Request, auction_id: int, db: Session=Depends(get_d
 
 @router_bid.get("/api/auctions/{auction_id}/bids")
 async def get_auction_bids(auction_id: int, db: Session=Depends(get_db)):
-    bids = crud.get_auction_bids(db, auction_id)
-    bid_list = [
-        {
-            "id": bid.id,
-            "auction_id": bid.auction_id,
-            "bid_id": bid.bidder_id,
-            "amount": float(bid.amount),
-            "bid_time": bid.bid_time.isoformat() if bid.bid_time else None,
-        } for bid in bids
-    ]
-    return JSONResponse(
-        status_code=200,
-        content=bid_list
-    )
+    """Bid history, served from memory for auctions about to close (see prewarm.py)"""
+    started = time.perf_counter()
+    payload = prewarm.warm_bids(auction_id)
+    if payload is not None:
+        prewarm.observe("bids", started, warm=True)
+        return Response(payload, media_type="application/json")
+
+    loaded_generation = prewarm.generation(auction_id)
+    payload = prewarm.bids_payload(db, auction_id)
+    prewarm.remember_bids(auction_id, loaded_generation, payload)
+    if loaded_generation is not None:
+        prewarm.observe("bids", started, warm=False)
+    return Response(payload, media_type="application/json")
 
 
@@ -0,0 +1,91 @@
+import crud
+import usercache
+from fastapi import APIRouter, Request, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from database import get_db
+from money import from_cents
+from sessions import current_username
+
+
+router_watchlist = APIRouter(tags=["watchlist"])
+
+MAX_PAGE_SIZE = 100
+
+
+def _current_user(request: Request, db: Session):
+    username = current_username(request)
+    if not username:
+        return None
+    return usercache.get_by_name(db, username)
+
+
+@router_watchlist.post("/api/watchlist/{auction_id}")
+async def watch_auction(request: Request, auction_id: int, db: Session = Depends(get_db)):
+    """Add an auction to the current user's watchlist"""
+    user = _current_user(request, db)
+    if not user:
+        return JSONResponse({"detail": "Not authenticated"}, status_code=401)
+    if not crud.get_auction_by_id(db, auction_id):
+        return JSONResponse({"detail": "Auction not found"}, status_code=404)
+    added = crud.add_to_watchlist(db, user.id, auction_id)
+    return JSONResponse({"watching": True, "added": added}, status_code=201 if added else 200)
+
+
+@router_watchlist.delete("/api/watchlist/{auction_id}")
+async def unwatch_auction(request: Request, auction_id: int, db: Session = Depends(get_db)):
+    """Remove an auction from the current user's watchlist"""
+    user = _current_user(request, db)
+    if not user:
+        return JSONResponse({"detail": "Not authenticated"}, status_code=401)
+    removed = crud.remove_from_watchlist(db, user.id, auction_id)
+    return JSONResponse({"watching": False, "removed": removed})
+
+
+@router_watchlist.get("/api/me/auctions")
+async def my_auctions(
+    request: Request,
+    view: str = "all",
+    after: int = None,
+    limit: int = 20,
+    db: Session = Depends(get_db)
+):
+    """
+    Watched, leading and outbid auctions of the current user.
+
+    Keyset paginated: pass `next_after` from the previous page as `after`.
+    """
+    user = _current_user(request, db)
+    if not user:
+        return JSONResponse({"detail": "Not authenticated"}, status_code=401)
+    if view not in crud.MY_AUCTION_VIEWS:
+        return JSONResponse(
+            {"detail": f"view must be one of: {', '.join(crud.MY_AUCTION_VIEWS)}"},
+            status_code=400
+        )
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    rows = crud.get_my_auctions(db, user.id, view=view, after_id=after, limit=limit)
+    items = []
+    for auction, my_bid_cents, watching in rows:
+        if auction.winner_id == user.id:
+            status = "leading"
+        elif my_bid_cents is not None:
+            status = "outbid"
+        else:
+            status = "watching"
+        items.append({
+            "id": auction.id,
+            "title": auction.title,
+            "current_price": float(auction.current_price),
+            "my_bid": float(from_cents(my_bid_cents)) if my_bid_cents is not None else None,
+            "status": status,
+            "watching": bool(watching),
+            "is_active": auction.is_active,
+            "ends_at": auction.ends_at.isoformat() if auction.ends_at else None,
+        })
+
+    return JSONResponse({
+        "items": items,
+        "next_after": items[-1]["id"] if len(items) == limit else None,
+    })
@@ -4,22 +4,19 @@ Updated: Login route now sets role cookie and returns role in response
 Admin-only button functionality depends on this file
 """
 
+import availability
 import crud
-import os
 from fastapi import APIRouter, Request, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from datetime import timedelta
-from auth import create_access_token
 from models import RegisterRequest, LoginRequest
 from database import get_db
-
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-TEMPLATES_DIR = os.path.join(BASE_DIR, "app", "templates")
-templates = Jinja2Templates(directory=TEMPLATES_DIR)
+from log import get_logger
+from sessions import clear_session_cookies, create_session, current_session, revoke_session, set_session_cookies
+from templating import templates
 
 router_web = APIRouter(tags=["web"])
+log = get_logger("web")
 
 # ============================================================================
 # PAGE ROUTES
@@ -46,36 +43,28 @@ async def register_page(request: Request):
 @router_web.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request):
     """Dashboard page - requires authentication"""
-    token = request.cookies.get("access_token")
-    username = request.cookies.get("username")
-    
-    print(f"[DEBUG] Dashboard access - Token: {bool(token)}, Username: {bool(username)}")
+    session = current_session(request)
     
-    if not token or not username:
+    if not session:
         return RedirectResponse(url="/login", status_code=302)
     
     return templates.TemplateResponse(
         "dashboard.html",
-        {"request": request, "username": username}
+        {"request": request, "username": session.username}
     )
 
 
 @router_web.get("/auctions", response_class=HTMLResponse)
-async def auctions_page(request: Request, db: Session = Depends(get_db)):
+async def auctions_page(request: Request):
     """Auctions page - requires authentication"""
-    username = request.cookies.get("username")
-    token = request.cookies.get("access_token")
-    
-    if not token or not username:
-        return RedirectResponse(url="/login", status_code=302)
+    session = current_session(request)
     
-    user = crud.get_user_by_name(db, username=username)
-    if not user:
+    if not session:
         return RedirectResponse(url="/login", status_code=302)
     
     return templates.TemplateResponse(
         "auctions.html",
-        {"request": request, "username": username, "user_id": user.id}
+        {"request": request, "username": session.username, "user_id": session.user_id}
     )
 
 # ============================================================================
@@ -125,7 +114,7 @@ async def register_user(
         )
 
     except Exception as e:
-        print(f"[REGISTER] Error: {str(e)}")
+        log.exception("register_error", error=str(e))
         return JSONResponse(
             {"detail": "An error occurred during registration. Please try again."},
             status_code=500
@@ -162,15 +151,7 @@ async def login_user(
                 status_code=401
             )
         
-        access_token_expires = timedelta(minutes=30)
-        access_token = create_access_token(
-            data={
-                "sub": db_user.username,
-                "role": db_user.role.value,  # ← INCLUDE ROLE
-                "user_id": db_user.id
-            },
-            expires_delta=access_token_expires
-        )
+        issued = create_session(db, db_user)
         
         response = JSONResponse(
             {
@@ -182,48 +163,27 @@ async def login_user(
             status_code=200
         )
         
-        response.set_cookie(
-            key="access_token",
-            value=access_token,
-            httponly=True,
-            max_age=1800,
-            samesite="Lax"
-        )
-    
-        response.set_cookie(
-            key="username",
-            value=db_user.username,
-            httponly=True,
-            max_age=1800,
-            samesite="Lax"
-        )
-        
-        # ← NEW: Set role cookie for frontend
-        response.set_cookie(
-            key="role",
-            value=db_user.role.value,
-            httponly=False,  # Not HTTPOnly so JS can read it
-            max_age=1800,
-            samesite="Lax"
-        )
+        # Opaque session + refresh tokens, and the role cookie for the frontend
+        set_session_cookies(response, issued)
         
-        print(f"[LOGIN] Success: {db_user.username} (role: {db_user.role.value})")
+        log.info("login", username=db_user.username, role=db_user.role.value)
         return response
 
     except Exception as e:
-        print(f"[LOGIN] Error: {str(e)}")
+        log.exception("login_error", error=str(e))
         return JSONResponse(
             {"detail": "An error occurred during login. Please try again."},
             status_code=500
         )
 
 @router_web.get("/logout")
-async def logout():
-    """Logout - clear cookies and redirect"""
+async def logout(request: Request, db: Session = Depends(get_db)):
+    """Logout - end the server-side session, clear cookies and redirect"""
+    session = current_session(request)
+    if session:
+        revoke_session(db, session)
     response = RedirectResponse(url="/login", status_code=302)
-    response.delete_cookie("access_token")
-    response.delete_cookie("username")
-    response.delete_cookie("role")  # ← DELETE ROLE COOKIE
+    clear_session_cookies(response)
     return response
 
 # ============================================================================
@@ -233,9 +193,9 @@ async def logout():
 @router_web.get("/api/user-info", response_class=HTMLResponse)
 async def user_info(request: Request):
     """Get user info for navbar"""
-    username = request.cookies.get("username")
+    session = current_session(request)
     
-    if not username:
+    if not session:
         return templates.TemplateResponse(
             "components/navbar_guest.html",
             {"request": request}
@@ -243,21 +203,20 @@ async def user_info(request: Request):
     
     return templates.TemplateResponse(
         "components/navbar_user.html",
-        {"request": request, "username": username}
+        {"request": request, "username": session.username}
     )
 
 
 @router_web.get("/api/profile", response_class=HTMLResponse)
 async def profile_info(request: Request, db: Session = Depends(get_db)):
     """Get user profile info"""
-    username = request.cookies.get("username")
-    token_str = request.cookies.get("access_token")
+    session = current_session(request)
     
-    if not username or not token_str:
+    if not session:
         return HTMLResponse(status_code=401)
     
     try:
-        user = crud.get_user_by_name(db, username=username)
+        user = crud.get_user_by_id(db, user_id=session.user_id)
         
         if not user:
             return HTMLResponse(status_code=404)
@@ -273,39 +232,39 @@ async def profile_info(request: Request, db: Session = Depends(get_db)):
             """
         )
     except Exception as e:
-        print(f"[PROFILE] Error: {str(e)}")
+        log.exception("profile_error", error=str(e))
         return HTMLResponse(status_code=500)
 
 
 @router_web.get("/api/check-username/{username}")
-async def check_username_available(username: str, db: Session = Depends(get_db)):
-    """Check if username is available"""
+async def check_username_available(username: str):
+    """Check if username is available (no DB query when the filter rules it out)"""
     if len(username) < 3:
         return JSONResponse(
             {"available": False, "message": "Username too short"},
             status_code=400
         )
     
-    existing = crud.get_user_by_name(db, username=username)
+    available = await availability.is_available("username", username)
     
     return JSONResponse({
-        "available": existing is None,
+        "available": available,
         "username": username
     })
 
 
 @router_web.get("/api/check-email/{email}")
-async def check_email_available(email: str, db: Session = Depends(get_db)):
-    """Check if email is available"""
+async def check_email_available(email: str):
+    """Check if email is available (no DB query when the filter rules it out)"""
     if "@" not in email:
         return JSONResponse(
             {"available": False, "message": "Invalid email"},
             status_code=400
         )
     
-    existing = crud.get_user_by_email(db, email=email)
+    available = await availability.is_available("email", email)
     
     return JSONResponse({
-        "available": existing is None,
+        "available": available,
         "email": email
     })
\ No newline at end of file
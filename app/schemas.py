@@ -1,21 +1,36 @@
 import enum
+import os
 from sqlalchemy import (
     Column,
+    BigInteger,
     Boolean,
-    Float, 
+    DDL,
     Integer, 
     String, 
     Text, 
     DateTime, 
-    Enum
+    Enum,
+    Index,
+    event
     )
 from datetime import datetime
-from database import Base
+from database import Base, engine
+from money import cents_property
+
+
+# Number of hash partitions for the bids table (PostgreSQL only, 0 disables)
+BID_PARTITIONS = int(os.getenv("BID_PARTITIONS", "8"))
+BIDS_PARTITIONED = engine.dialect.name == "postgresql" and BID_PARTITIONS > 0
 
 
 class Role(str, enum.Enum):
     USER = 'user'
     ADMIN = 'admin'
+
+class JobStatus(str, enum.Enum):
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
     
 class UserModel(Base):
     __tablename__ = "users"
@@ -36,21 +51,168 @@ class Auction(Base):
     title = Column(String(255), index=True, nullable=True)
     content = Column(Text, nullable=True)
     author = Column(String(100), nullable=True)
-    start_price = Column(Float)
-    current_price = Column(Float)
+    start_price_cents = Column(BigInteger)
+    current_price_cents = Column(BigInteger)
     is_active = Column(Boolean)
     image_path = Column(String(500), nullable=True)
-    image_paths = Column(Text, nullable=True)
+    increment_ladder = Column(Text, nullable=True)
     ends_at = Column(DateTime)
+    # Bumped by every edit; edits only apply to the version the editor loaded
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     create_at = Column(DateTime, default=datetime.utcnow)
     update_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    start_price = cents_property("start_price_cents")
+    current_price = cents_property("current_price_cents")
+
 class Bid(Base):
+    """
+    Hot bids of live and recently closed auctions.
+
+    On PostgreSQL the table is hash partitioned by auction_id, so the
+    partition key has to be part of the primary key.
+    """
     __tablename__ = "bids"
+    __table_args__ = (
+        {"postgresql_partition_by": "HASH (auction_id)"} if BIDS_PARTITIONED else {}
+    )
     
-    id = Column(Integer, index=True, primary_key=True)
+    id = Column(Integer, index=True, primary_key=True, autoincrement=True)
+    auction_id = Column(Integer, index=True, primary_key=BIDS_PARTITIONED)
+    bidder_id = Column(Integer, index=True)
+    amount_cents = Column(BigInteger)
+    bid_time = Column(DateTime)
+
+    amount = cents_property("amount_cents")
+
+
+class BidArchive(Base):
+    """Cold storage for bids of auctions closed long ago (see archive.py)"""
+    __tablename__ = "bids_archive"
+
+    id = Column(Integer, primary_key=True)
     auction_id = Column(Integer, index=True)
     bidder_id = Column(Integer)
-    amount = Column(Float)
+    amount_cents = Column(BigInteger)
     bid_time = Column(DateTime)
-    
\ No newline at end of file
+
+    amount = cents_property("amount_cents")
+
+
+
+class BidRollup(Base):
+    """
+    Bids aggregated per auction per time bucket (analytics.py), so charts
+    never scan `bids`. bucket_seconds is 60 (minute) or 3600 (hour).
+    """
+    __tablename__ = "bid_rollups"
+    __table_args__ = (
+        Index("ix_bid_rollups_range", "bucket_seconds", "bucket_start"),
+    )
+
+    auction_id = Column(Integer, primary_key=True)
+    bucket_seconds = Column(Integer, primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    bid_count = Column(Integer)
+    max_amount_cents = Column(BigInteger)
+    unique_bidders = Column(Integer)
+    # Highest bid id folded in when the row was written; the job resumes after it
+    through_bid_id = Column(Integer)
+
+
+class AuctionSnapshot(Base):
+    """
+    An auction's bid-derived state after folding its bids up to
+    through_bid_id (replay.py). Later bids replayed on top of the latest
+    snapshot give the current state; older snapshots give past states.
+    """
+    __tablename__ = "auction_snapshots"
+
+    auction_id = Column(Integer, primary_key=True)
+    through_bid_id = Column(Integer, primary_key=True)
+    through_bid_time = Column(DateTime)
+    current_price_cents = Column(BigInteger)
+    winner_id = Column(Integer, nullable=True)
+    bid_count = Column(Integer)
+    create_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AuctionImage(Base):
+    """
+    Uploaded image files. Rows with a NULL auction_id are uploads not (or no
+    longer) attached to an auction; images.collect_orphans removes them.
+    """
+    __tablename__ = "auction_images"
+    __table_args__ = (
+        Index("ix_auction_images_auction_position", "auction_id", "position"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    auction_id = Column(Integer, nullable=True)
+    position = Column(Integer, default=0)
+    storage_key = Column(String(255), unique=True)
+    variants = Column(Text, nullable=True)
+    byte_size = Column(Integer, nullable=True)
+    sha256 = Column(String(64), nullable=True)
+    create_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Watchlist(Base):
+    __tablename__ = "watchlist"
+    __table_args__ = (
+        Index("ix_watchlist_user_auction", "user_id", "auction_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer)
+    auction_id = Column(Integer, index=True)
+    create_at = Column(DateTime, default=datetime.utcnow)
+
+
+class NotificationJob(Base):
+    """Durable queue of user notifications, consumed by notifications.py"""
+    __tablename__ = "notification_jobs"
+    __table_args__ = (
+        Index("ix_notification_jobs_due", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32))
+    user_id = Column(Integer, index=True)
+    auction_id = Column(Integer)
+    payload = Column(Text, nullable=True)
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING)
+    attempts = Column(Integer, default=0)
+    run_after = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    create_at = Column(DateTime, default=datetime.utcnow)
+
+class UserSession(Base):
+    """
+    Server-side login sessions (see sessions.py). Only SHA-256 hashes of
+    the session and refresh tokens are stored, never the tokens themselves.
+    """
+    __tablename__ = "sessions"
+
+    id = Column(String(64), primary_key=True)
+    user_id = Column(Integer, index=True)
+    username = Column(String(100))
+    role = Column(Enum(Role))
+    refresh_hash = Column(String(64), unique=True)
+    # The refresh hash before the last rotation, honoured for a short grace window
+    previous_refresh_hash = Column(String(64), index=True)
+    rotated_at = Column(DateTime)
+    expires_at = Column(DateTime)
+    refresh_expires_at = Column(DateTime, index=True)
+    create_at = Column(DateTime, default=datetime.utcnow)
+
+if BIDS_PARTITIONED:
+    for remainder in range(BID_PARTITIONS):
+        event.listen(
+            Bid.__table__,
+            "after_create",
+            DDL(
+                f"CREATE TABLE IF NOT EXISTS bids_p{remainder} PARTITION OF bids "
+                f"FOR VALUES WITH (MODULUS {BID_PARTITIONS}, REMAINDER {remainder})"
+            ).execute_if(dialect="postgresql")
+        )
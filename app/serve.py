@@ -0,0 +1,106 @@
+"""
+Production launcher: N uvicorn workers behind a gunicorn master.
+
+The app is imported once in the master (preload) and forked, so workers
+start in milliseconds. Every worker then runs the lifespan handler on its
+own and reports readiness on /healthz. The engine created at import is
+disposed in each child right after the fork, so no pooled connection is
+shared across processes.
+
+uvicorn picks uvloop and httptools automatically when they are installed.
+Graceful reload: `kill -HUP <master pid>` starts fresh workers and lets the
+old ones finish their requests (with PRELOAD_APP=0 this also loads new
+code). Without gunicorn (e.g. on Windows) it falls back to
+`uvicorn.run(workers=N)`.
+
+Usage: python serve.py [--workers 4] [--host 0.0.0.0] [--port 8000]
+"""
+
+import argparse
+import importlib.util
+import os
+from log import configure_logging, get_logger
+
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1
+PRELOAD_APP = os.getenv("PRELOAD_APP", "1").lower() in ("1", "true", "yes")
+# Seconds a worker gets to finish in-flight requests on reload/shutdown
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+KEEPALIVE = int(os.getenv("KEEPALIVE", "5"))
+
+APP = "main:app"
+
+log = get_logger("serve")
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def worker_class() -> str:
+    # uvicorn.workers is deprecated in favour of the uvicorn-worker package
+    if _installed("uvicorn_worker"):
+        return "uvicorn_worker.UvicornWorker"
+    return "uvicorn.workers.UvicornWorker"
+
+
+def post_fork(server, worker):
+    """Drop the pooled connections inherited from the master without closing them"""
+    from database import engine
+    engine.dispose(close=False)
+
+
+def run_gunicorn(host: str, port: int, workers: int):
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                "worker_class": worker_class(),
+                "preload_app": PRELOAD_APP,
+                "graceful_timeout": GRACEFUL_TIMEOUT,
+                "keepalive": KEEPALIVE,
+                "post_fork": post_fork,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+    Application().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the app with multiple workers")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    configure_logging()
+    gunicorn = _installed("gunicorn") and os.name != "nt"
+    log.info(
+        "serve_start", workers=args.workers, bind=f"{args.host}:{args.port}",
+        server="gunicorn" if gunicorn else "uvicorn",
+        uvloop=_installed("uvloop"), httptools=_installed("httptools"),
+        preload=PRELOAD_APP and gunicorn,
+    )
+    if gunicorn:
+        run_gunicorn(args.host, args.port, args.workers)
+    else:
+        import uvicorn
+        uvicorn.run(
+            APP, host=args.host, port=args.port, workers=args.workers,
+            loop="auto", http="auto", timeout_keep_alive=KEEPALIVE,
+            timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        )
+
+
+if __name__ == "__main__":
+    main()
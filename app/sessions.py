@@ -0,0 +1,470 @@
+"""
+Server-side login sessions.
+
+Login issues two opaque random tokens in httponly cookies: a `session`
+token that is valid while the user keeps being active (sliding expiry of
+SESSION_IDLE_TTL) and a `refresh` token that outlives it (REFRESH_TTL).
+The database only stores SHA-256 hashes of both, in the `sessions` table.
+
+Each worker keeps the sessions it has seen in an LRU of SESSION_CACHE_SIZE
+entries, so an authenticated request normally costs a dictionary lookup.
+Sliding the expiry only touches that cache; the new expiry times are
+written back in one batch every SESSION_FLUSH_SECONDS. Entries are
+re-read from the database after SESSION_CACHE_TTL, and a flush whose
+UPDATE finds no row evicts the session, so a revocation this worker
+missed (see below) still takes effect. When a session has
+expired, SessionMiddleware swaps the refresh token for a new pair of
+tokens, with no password check. Parallel requests (HTMX fires several)
+often carry the same refresh token: the first one rotates it, the others
+find the session by its previous refresh hash for REFRESH_GRACE_SECONDS
+and go through without new cookies, since the first response sets them.
+
+revoke_user_sessions() deletes every session of a user and tells the other
+workers through a `sessions_revoked` event to drop their cached copies.
+"""
+
+import asyncio
+import hashlib
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import events
+from database import SessionLocal
+from log import get_logger
+from metrics import Counter, Gauge
+from schemas import Role, UserModel, UserSession
+
+
+SESSION_IDLE_TTL = timedelta(seconds=int(os.getenv("SESSION_IDLE_TTL", "1800")))
+REFRESH_TTL = timedelta(seconds=int(os.getenv("REFRESH_TTL", str(14 * 24 * 3600))))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_FLUSH_SECONDS = float(os.getenv("SESSION_FLUSH_SECONDS", "15"))
+# Cached sessions are confirmed against the database at least this often
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "60"))
+# How long a rotated refresh token still resolves to the session it was rotated into
+REFRESH_GRACE = timedelta(seconds=float(os.getenv("REFRESH_GRACE_SECONDS", "10")))
+# Expiry moves forward at most once per step, so reads do not all become writes
+SLIDE_STEP = min(timedelta(seconds=60), SESSION_IDLE_TTL / 10)
+# Rows past their refresh expiry are deleted every this many flushes
+PURGE_EVERY = 20
+
+SESSION_COOKIE = "session"
+REFRESH_COOKIE = "refresh"
+ROLE_COOKIE = "role"
+# Cookies of the old cookie-only login, cleared on logout
+LEGACY_COOKIES = ("access_token", "username")
+SKIP_PREFIXES = ("/static", "/uploads")
+
+sessions_table = UserSession.__table__
+
+log = get_logger("sessions")
+
+SESSION_LOOKUPS = Counter(
+    "session_lookups_total",
+    "Session cookie resolutions by how they were answered",
+    ["result"]
+)
+SESSION_CACHE_ENTRIES = Gauge("session_cache_entries", "Sessions cached by this worker")
+
+
+class SessionRecord:
+    __slots__ = ("id", "user_id", "username", "role", "expires_at", "loaded_at")
+
+    def __init__(self, id: str, user_id: int, username: str, role: Role, expires_at: datetime):
+        self.id = id
+        self.user_id = user_id
+        self.username = username
+        self.role = role
+        self.expires_at = expires_at
+        # Monotonic time the record was read from (or written to) the database
+        self.loaded_at = time.monotonic()
+
+
+class IssuedSession(NamedTuple):
+    # None when a concurrent refresh already issued the tokens
+    token: Optional[str]
+    refresh_token: Optional[str]
+    record: SessionRecord
+
+
+_lock = threading.Lock()
+_cache: "OrderedDict[str, SessionRecord]" = OrderedDict()
+# session id -> expiry not yet written to the database
+_dirty: Dict[str, datetime] = {}
+_flusher: Optional[asyncio.Task] = None
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def _remember(record: SessionRecord):
+    with _lock:
+        _cache[record.id] = record
+        _cache.move_to_end(record.id)
+        while len(_cache) > SESSION_CACHE_SIZE:
+            _cache.popitem(last=False)
+        SESSION_CACHE_ENTRIES.set(len(_cache))
+
+
+def _forget(session_ids: List[str]):
+    with _lock:
+        for session_id in session_ids:
+            _cache.pop(session_id, None)
+            _dirty.pop(session_id, None)
+        SESSION_CACHE_ENTRIES.set(len(_cache))
+
+
+def _forget_users(user_ids: set):
+    with _lock:
+        stale = [record.id for record in _cache.values() if record.user_id in user_ids]
+    _forget(stale)
+
+
+def _slide(record: SessionRecord, now: datetime):
+    expires_at = now + SESSION_IDLE_TTL
+    if expires_at - record.expires_at >= SLIDE_STEP:
+        with _lock:
+            record.expires_at = expires_at
+            _dirty[record.id] = expires_at
+
+
+@events.subscribe
+def _on_sessions_revoked(batch: List[dict]):
+    user_ids = {message["user_id"] for message in batch if message["kind"] == "sessions_revoked"}
+    if user_ids:
+        _forget_users(user_ids)
+
+
+# ============================================================================
+# SESSIONS
+# ============================================================================
+
+def _new_tokens(now: datetime) -> dict:
+    token = secrets.token_urlsafe(32)
+    refresh_token = secrets.token_urlsafe(32)
+    return {
+        "token": token,
+        "refresh_token": refresh_token,
+        "id": _hash(token),
+        "refresh_hash": _hash(refresh_token),
+        "expires_at": now + SESSION_IDLE_TTL,
+        "refresh_expires_at": now + REFRESH_TTL,
+    }
+
+
+def create_session(db: Session, user: UserModel) -> IssuedSession:
+    """Start a session for a user who just proved their password"""
+    now = datetime.utcnow()
+    tokens = _new_tokens(now)
+    db.add(UserSession(
+        id=tokens["id"],
+        user_id=user.id,
+        username=user.username,
+        role=user.role,
+        refresh_hash=tokens["refresh_hash"],
+        expires_at=tokens["expires_at"],
+        refresh_expires_at=tokens["refresh_expires_at"],
+        create_at=now,
+    ))
+    db.commit()
+    record = SessionRecord(tokens["id"], user.id, user.username, user.role, tokens["expires_at"])
+    _remember(record)
+    return IssuedSession(tokens["token"], tokens["refresh_token"], record)
+
+
+def _load(session_id: str, now: datetime) -> Optional[SessionRecord]:
+    with SessionLocal() as db:
+        row = db.execute(
+            select(
+                sessions_table.c.user_id, sessions_table.c.username,
+                sessions_table.c.role, sessions_table.c.expires_at,
+            ).where(sessions_table.c.id == session_id)
+        ).first()
+    if row is None:
+        return None
+    # This worker may have slid the expiry further without flushing it yet
+    with _lock:
+        pending = _dirty.get(session_id)
+    expires_at = max(row.expires_at, pending) if pending else row.expires_at
+    if expires_at <= now:
+        return None
+    return SessionRecord(session_id, row.user_id, row.username, row.role, expires_at)
+
+
+async def resolve(token: str) -> Optional[SessionRecord]:
+    """The live session for a session cookie, sliding its expiry"""
+    session_id = _hash(token)
+    now = datetime.utcnow()
+    with _lock:
+        record = _cache.get(session_id)
+        if record is not None:
+            _cache.move_to_end(session_id)
+    if record is not None and record.expires_at > now and time.monotonic() - record.loaded_at < SESSION_CACHE_TTL:
+        SESSION_LOOKUPS.inc(result="cache")
+    else:
+        # Another worker may have slid the expiry or revoked the session, so
+        # expired and old copies are re-read
+        record = await asyncio.to_thread(_load, session_id, now)
+        if record is None:
+            _forget([session_id])
+            SESSION_LOOKUPS.inc(result="invalid")
+            return None
+        _remember(record)
+        SESSION_LOOKUPS.inc(result="db")
+    _slide(record, now)
+    return record
+
+
+def _rotated(db: Session, refresh_hash: str, now: datetime) -> Optional[IssuedSession]:
+    """The session a concurrent request just rotated `refresh_hash` into"""
+    row = db.execute(
+        select(
+            sessions_table.c.id, sessions_table.c.user_id, sessions_table.c.username,
+            sessions_table.c.role, sessions_table.c.expires_at,
+        ).where(
+            sessions_table.c.previous_refresh_hash == refresh_hash,
+            sessions_table.c.rotated_at > now - REFRESH_GRACE,
+        )
+    ).first()
+    if row is None:
+        return None
+    SESSION_LOOKUPS.inc(result="refresh_grace")
+    return IssuedSession(None, None, SessionRecord(row.id, row.user_id, row.username, row.role, row.expires_at))
+
+
+def refresh(refresh_token: str) -> Optional[IssuedSession]:
+    """
+    Exchange a refresh token for a new session. Each refresh token is
+    rotated once; within REFRESH_GRACE of that, it still resolves to the
+    new session, but without tokens of its own.
+    """
+    refresh_hash = _hash(refresh_token)
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        row = db.execute(
+            select(
+                sessions_table.c.id, sessions_table.c.user_id,
+                sessions_table.c.username, sessions_table.c.role,
+            ).where(
+                sessions_table.c.refresh_hash == refresh_hash,
+                sessions_table.c.refresh_expires_at > now,
+            )
+        ).first()
+        if row is None:
+            issued = _rotated(db, refresh_hash, now)
+            if issued is None:
+                SESSION_LOOKUPS.inc(result="refresh_invalid")
+            return issued
+        tokens = _new_tokens(now)
+        rotated = db.execute(
+            update(sessions_table)
+            .where(sessions_table.c.refresh_hash == refresh_hash)
+            .values(
+                id=tokens["id"],
+                refresh_hash=tokens["refresh_hash"],
+                previous_refresh_hash=refresh_hash,
+                rotated_at=now,
+                expires_at=tokens["expires_at"],
+                refresh_expires_at=tokens["refresh_expires_at"],
+            )
+        )
+        if rotated.rowcount != 1:
+            # A concurrent request rotated it first
+            db.rollback()
+            issued = _rotated(db, refresh_hash, now)
+            if issued is None:
+                SESSION_LOOKUPS.inc(result="refresh_invalid")
+            return issued
+        db.commit()
+
+    _forget([row.id])
+    record = SessionRecord(tokens["id"], row.user_id, row.username, row.role, tokens["expires_at"])
+    _remember(record)
+    SESSION_LOOKUPS.inc(result="refreshed")
+    return IssuedSession(tokens["token"], tokens["refresh_token"], record)
+
+
+def revoke_session(db: Session, record: SessionRecord):
+    """Logout: end one session"""
+    db.execute(delete(sessions_table).where(sessions_table.c.id == record.id))
+    db.commit()
+    _forget([record.id])
+
+
+def revoke_user_sessions(db: Session, user_id: int) -> int:
+    """
+    End every session of a user, in every worker, when the caller commits.
+    Used when the user is deleted or their role changes.
+    """
+    revoked = db.execute(delete(sessions_table).where(sessions_table.c.user_id == user_id)).rowcount
+    events.publish(db, "sessions_revoked", user_id=user_id)
+    _forget_users({user_id})
+    return revoked
+
+
+# ============================================================================
+# WRITE-BEHIND
+# ============================================================================
+
+def flush() -> int:
+    """Write the slid expiry times to the database in one statement"""
+    global _dirty
+    with _lock:
+        dirty, _dirty = _dirty, {}
+    if not dirty:
+        return 0
+    try:
+        with SessionLocal() as db:
+            result = db.execute(
+                update(sessions_table)
+                .where(
+                    sessions_table.c.id == bindparam("session_id"),
+                    sessions_table.c.expires_at < bindparam("new_expiry"),
+                )
+                .values(expires_at=bindparam("new_expiry")),
+                [{"session_id": session_id, "new_expiry": expiry} for session_id, expiry in dirty.items()]
+            )
+            db.commit()
+            if not result.supports_sane_multi_rowcount() or result.rowcount < len(dirty):
+                # Some rows did not match: slid further elsewhere, or deleted
+                existing = set(db.scalars(select(sessions_table.c.id).where(sessions_table.c.id.in_(list(dirty)))))
+                deleted = [session_id for session_id in dirty if session_id not in existing]
+                if deleted:
+                    _forget(deleted)
+                    log.info("sessions_evicted", sessions=len(deleted))
+    except Exception as e:
+        log.exception("session_flush_failed", sessions=len(dirty), error=str(e))
+        with _lock:
+            for session_id, expiry in dirty.items():
+                _dirty.setdefault(session_id, expiry)
+        return 0
+    return len(dirty)
+
+
+def purge_expired() -> int:
+    with SessionLocal() as db:
+        purged = db.execute(
+            delete(sessions_table).where(sessions_table.c.refresh_expires_at <= datetime.utcnow())
+        ).rowcount
+        db.commit()
+    if purged:
+        log.info("sessions_purged", sessions=purged)
+    return purged
+
+
+async def _flush_loop():
+    flushes = 0
+    while True:
+        await asyncio.sleep(SESSION_FLUSH_SECONDS)
+        await asyncio.to_thread(flush)
+        flushes += 1
+        if flushes % PURGE_EVERY == 0:
+            try:
+                await asyncio.to_thread(purge_expired)
+            except Exception as e:
+                log.exception("session_purge_failed", error=str(e))
+
+
+def start_flusher():
+    global _flusher
+    if _flusher is None:
+        _flusher = asyncio.create_task(_flush_loop())
+
+
+async def stop_flusher():
+    """Cancel the background flush and write what is still pending"""
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        _flusher = None
+    await asyncio.to_thread(flush)
+
+
+# ============================================================================
+# COOKIES AND REQUESTS
+# ============================================================================
+
+def set_session_cookies(response: Response, issued: IssuedSession):
+    # No max_age: the session cookie ends with the browser, the refresh cookie does not
+    response.set_cookie(SESSION_COOKIE, issued.token, httponly=True, samesite="Lax")
+    response.set_cookie(
+        REFRESH_COOKIE, issued.refresh_token,
+        httponly=True, max_age=int(REFRESH_TTL.total_seconds()), samesite="Lax"
+    )
+    # Not HTTPOnly so JS can read it
+    response.set_cookie(
+        ROLE_COOKIE, issued.record.role.value,
+        httponly=False, max_age=int(REFRESH_TTL.total_seconds()), samesite="Lax"
+    )
+
+
+def clear_session_cookies(response: Response):
+    for name in (SESSION_COOKIE, REFRESH_COOKIE, ROLE_COOKIE, *LEGACY_COOKIES):
+        response.delete_cookie(name)
+
+
+def current_session(request: Request) -> Optional[SessionRecord]:
+    """The session SessionMiddleware resolved for this request, if any"""
+    return getattr(request.state, "session", None)
+
+
+def current_username(request: Request) -> Optional[str]:
+    record = current_session(request)
+    return record.username if record is not None else None
+
+
+class SessionMiddleware:
+    """Resolves the session cookie into `request.state.session`, refreshing it when expired"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(SKIP_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        cookie_header = MutableHeaders(scope=scope).get("cookie")
+        cookies = cookie_parser(cookie_header) if cookie_header else {}
+        record = None
+        issued = None
+        if cookies.get(SESSION_COOKIE):
+            record = await resolve(cookies[SESSION_COOKIE])
+        if record is None and cookies.get(REFRESH_COOKIE):
+            issued = await asyncio.to_thread(refresh, cookies[REFRESH_COOKIE])
+            if issued is not None:
+                record = issued.record
+        scope.setdefault("state", {})["session"] = record
+
+        if issued is None or issued.token is None:
+            await self.app(scope, receive, send)
+            return
+
+        carrier = Response()
+        set_session_cookies(carrier, issued)
+        set_cookies = [value for name, value in carrier.raw_headers if name == b"set-cookie"]
+
+        async def send_with_cookies(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for value in set_cookies:
+                    headers.append("set-cookie", value.decode("latin-1"))
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookies)
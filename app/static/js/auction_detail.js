@@ -0,0 +1,321 @@
+// ============================================================================
+// AUCTION DETAIL - carousel, countdown, bid history and bidding
+//
+// Loaded once by the page. Each time HTMX swaps in a components/auction_detail
+// fragment, init() reads the auction from the data-* attributes on its root
+// element ([data-auction-detail]), so the fragment itself carries no script.
+// ============================================================================
+
+(function () {
+    let auction = null;
+    let carouselImages = [];
+    let currentImageIndex = 0;
+    let countdownTimer = null;
+
+    // ========================================================================
+    // CAROUSEL MANAGEMENT - MULTIPLE IMAGES SUPPORT
+    // ========================================================================
+
+    function initializeCarousel() {
+        carouselImages = auction.imageUrls.length > 0
+            ? auction.imageUrls
+            : (auction.primaryImage ? [auction.primaryImage] : []);
+        currentImageIndex = 0;
+
+        if (!document.getElementById('carousel-image') || carouselImages.length === 0) {
+            return;
+        }
+
+        // Show controls only when there is more than one image
+        if (carouselImages.length > 1) {
+            document.getElementById('carousel-prev').style.display = 'block';
+            document.getElementById('carousel-next').style.display = 'block';
+            document.getElementById('carousel-indicators').style.display = 'flex';
+            createIndicators();
+        }
+
+        updateCarousel(0);
+    }
+
+    function createIndicators() {
+        const indicatorContainer = document.getElementById('carousel-indicators');
+        indicatorContainer.innerHTML = '';
+
+        carouselImages.forEach((_, index) => {
+            const dot = document.createElement('button');
+            dot.type = 'button';
+            dot.onclick = (e) => {
+                e.preventDefault();
+                updateCarousel(index);
+            };
+            indicatorContainer.appendChild(dot);
+        });
+    }
+
+    function updateCarousel(index) {
+        if (carouselImages.length === 0) {
+            return;
+        }
+
+        // Wrap around at both ends
+        if (index < 0) index = carouselImages.length - 1;
+        if (index >= carouselImages.length) index = 0;
+        currentImageIndex = index;
+
+        const imgElement = document.getElementById('carousel-image');
+        imgElement.src = carouselImages[index];
+        imgElement.alt = `${auction.title} - Image ${index + 1}`;
+
+        updateIndicators();
+    }
+
+    function updateIndicators() {
+        const dots = document.querySelectorAll('#carousel-indicators button');
+        dots.forEach((dot, index) => {
+            if (index === currentImageIndex) {
+                dot.className = 'w-6 h-2 rounded-full transition-all bg-slate-700';
+            } else {
+                dot.className = 'w-2 h-2 rounded-full transition-all bg-slate-400 hover:bg-slate-500';
+            }
+        });
+    }
+
+    window.prevImage = function () {
+        updateCarousel(currentImageIndex - 1);
+    };
+
+    window.nextImage = function () {
+        updateCarousel(currentImageIndex + 1);
+    };
+
+    // ========================================================================
+    // COUNTDOWN TIMER
+    // ========================================================================
+
+    function updateCountdown() {
+        const countdownEl = document.getElementById('countdown');
+        if (!countdownEl) {
+            // The detail view was swapped out
+            clearInterval(countdownTimer);
+            countdownTimer = null;
+            return;
+        }
+
+        const diff = auction.endsAt - new Date();
+        if (diff <= 0) {
+            countdownEl.textContent = '⏰ Auction Ended';
+            countdownEl.parentElement.classList.add('bg-red-50', 'border-red-200');
+            const bidForm = document.getElementById('bid-form');
+            if (bidForm) {
+                bidForm.style.display = 'none';
+            }
+            return;
+        }
+
+        const days = Math.floor(diff / (1000 * 60 * 60 * 24));
+        const hours = Math.floor((diff / (1000 * 60 * 60)) % 24);
+        const minutes = Math.floor((diff / 1000 / 60) % 60);
+        const seconds = Math.floor((diff / 1000) % 60);
+
+        countdownEl.textContent = `${days}d ${hours}h ${minutes}m ${seconds}s`;
+    }
+
+    // ========================================================================
+    // LOAD BID HISTORY
+    // ========================================================================
+
+    async function loadBidHistory() {
+        const container = document.getElementById('bid-history-container');
+        try {
+            const response = await fetch(`/api/auctions/${auction.id}/bids`);
+            if (!response.ok) {
+                console.error('Failed to load bids:', response.status);
+                return;
+            }
+
+            const bids = await response.json();
+            container.innerHTML = '';
+
+            if (bids.length === 0) {
+                container.innerHTML = '<p class="text-center text-slate-500 py-8">No bids yet. Be the first to bid!</p>';
+                return;
+            }
+
+            // Highest first
+            bids.sort((a, b) => b.amount - a.amount);
+
+            bids.forEach((bid, index) => {
+                const bidEl = document.createElement('div');
+                bidEl.className = `flex items-center justify-between p-3 rounded-lg ${
+                    index === 0 ? 'bg-blue-50 border-2 border-blue-200' : 'bg-slate-50 border border-slate-200'
+                }`;
+                bidEl.innerHTML = `
+                    <div class="flex-1">
+                        <div class="flex items-center gap-2">
+                            ${index === 0 ? '🏆' : ''}
+                            <p class="font-semibold text-slate-900">$${Number(bid.amount).toFixed(2)}</p>
+                            ${index === 0 ? '<span class="text-xs bg-blue-100 text-blue-700 px-2 py-1 rounded font-semibold">Highest</span>' : ''}
+                        </div>
+                        <p class="text-xs text-slate-600 mt-1">User #${bid.bidder_id}</p>
+                    </div>
+                    <div class="text-right">
+                        <p class="text-xs text-slate-500">${new Date(bid.bid_time).toLocaleString()}</p>
+                    </div>
+                `;
+                container.appendChild(bidEl);
+            });
+        } catch (error) {
+            console.error('[BIDS] Error loading:', error);
+            container.innerHTML = '<p class="text-center text-red-500 py-8">Failed to load bid history</p>';
+        }
+    }
+
+    // ========================================================================
+    // SUBMIT BID
+    // ========================================================================
+
+    window.submitBid = async function (event) {
+        event.preventDefault();
+
+        if (!auction.username) {
+            window.location.href = '/login';
+            return false;
+        }
+
+        const bidAmountInput = document.getElementById('bid-amount');
+        const bidAmount = parseFloat(bidAmountInput.value);
+        const minBid = parseFloat(bidAmountInput.min);
+
+        // Client-side validation
+        if (isNaN(bidAmount) || bidAmount < minBid) {
+            showBidError(`Bid must be at least $${minBid.toFixed(2)}`);
+            return false;
+        }
+
+        const submitBtn = document.getElementById('bid-submit-btn');
+        const btnText = document.getElementById('btn-text');
+        const btnSpinner = document.getElementById('btn-spinner');
+
+        submitBtn.disabled = true;
+        btnText.classList.add('hidden');
+        btnSpinner.classList.remove('hidden');
+
+        try {
+            const response = await fetch(`/api/auctions/${auction.id}/bid`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ amount: bidAmount }),
+                credentials: 'same-origin'
+            });
+            const result = await response.json();
+
+            if (response.ok) {
+                showBidSuccess(`Your bid of $${bidAmount.toFixed(2)} has been placed!`);
+                bidAmountInput.value = '';
+
+                setTimeout(() => {
+                    loadBidHistory();
+                    updateMinimumBid(result.new_minimum);
+                }, 500);
+            } else {
+                showBidError(result.detail || 'Failed to place bid');
+            }
+        } catch (error) {
+            console.error('[BID] Error:', error);
+            showBidError('Network error: ' + error.message);
+        } finally {
+            submitBtn.disabled = false;
+            btnText.classList.remove('hidden');
+            btnSpinner.classList.add('hidden');
+        }
+
+        return false;
+    };
+
+    // ========================================================================
+    // HELPER FUNCTIONS
+    // ========================================================================
+
+    function updateMinimumBid(newMinimum) {
+        const bidAmountInput = document.getElementById('bid-amount');
+        const minimum = Number(newMinimum).toFixed(2);
+        bidAmountInput.min = minimum;
+        bidAmountInput.placeholder = minimum;
+    }
+
+    function showBidError(message) {
+        const errorEl = document.getElementById('bid-error');
+        document.getElementById('error-message').textContent = message;
+        errorEl.classList.remove('hidden');
+        document.getElementById('bid-success').classList.add('hidden');
+        setTimeout(() => errorEl.classList.add('hidden'), 5000);
+    }
+
+    function showBidSuccess(message) {
+        const successEl = document.getElementById('bid-success');
+        document.getElementById('success-message').textContent = message;
+        successEl.classList.remove('hidden');
+        document.getElementById('bid-error').classList.add('hidden');
+        setTimeout(() => successEl.classList.add('hidden'), 5000);
+    }
+
+    // ========================================================================
+    // LOAD WINNER INFO (if auction ended)
+    // ========================================================================
+
+    async function loadWinnerInfo() {
+        const winnerEl = document.getElementById('winner-name');
+        const endedWinnerEl = document.getElementById('ended-winner-name');
+        if (!winnerEl && !endedWinnerEl) return;
+
+        try {
+            const response = await fetch(`/api/auctions/${auction.id}/winner`);
+            if (response.ok) {
+                const data = await response.json();
+                if (data.winner_name) {
+                    if (winnerEl) winnerEl.textContent = data.winner_name;
+                    if (endedWinnerEl) endedWinnerEl.textContent = data.winner_name;
+                }
+            }
+        } catch (error) {
+            console.error('Failed to load winner info:', error);
+        }
+    }
+
+    // ========================================================================
+    // INITIALIZATION
+    // ========================================================================
+
+    function init(root) {
+        const data = root.dataset;
+        auction = {
+            id: Number(data.auctionId),
+            title: data.title,
+            username: data.username || null,
+            isActive: data.active === 'true',
+            endsAt: new Date(data.endsAt),
+            primaryImage: data.primaryImage || '',
+            imageUrls: JSON.parse(data.imageUrls || '[]')
+        };
+
+        initializeCarousel();
+
+        clearInterval(countdownTimer);
+        updateCountdown();
+        countdownTimer = setInterval(updateCountdown, 1000);
+
+        loadBidHistory();
+        if (!auction.isActive) {
+            loadWinnerInfo();
+        }
+    }
+
+    htmx.onLoad((element) => {
+        const root = element.matches('[data-auction-detail]')
+            ? element
+            : element.querySelector('[data-auction-detail]');
+        if (root) {
+            init(root);
+        }
+    });
+})();
@@ -0,0 +1,285 @@
+// ============================================================================
+// AUCTION FORM - image uploads (multiple images) and client-side validation
+//
+// Loaded once by the page; init() runs for every components/auction_form
+// fragment HTMX swaps in ([data-auction-form]).
+// ============================================================================
+
+(function () {
+    const ALLOWED_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp'];
+    const MAX_FILE_SIZE = 5 * 1024 * 1024;
+
+    let elements = {};
+    // Storage keys of the uploaded images, in display order
+    let uploadedImages = [];
+
+    // ========================================================================
+    // UPLOAD IMAGE FUNCTION
+    // ========================================================================
+
+    async function handleImageUpload(file) {
+        if (!ALLOWED_TYPES.includes(file.type)) {
+            showUploadError('Invalid file type: ' + file.name + '. Please upload JPG, PNG, GIF, or WebP');
+            return;
+        }
+        if (file.size > MAX_FILE_SIZE) {
+            showUploadError('File too large: ' + file.name + '. Maximum size is 5MB');
+            return;
+        }
+
+        const reader = new FileReader();
+        reader.onload = async (e) => {
+            const fileData = e.target.result;
+
+            // Simple duplicate check by file name
+            const isDuplicate = Array.from(elements.imageGallery.querySelectorAll('img'))
+                .some(img => img.alt === file.name);
+            if (isDuplicate) {
+                showUploadError('Image "' + file.name + '" already uploaded');
+                return;
+            }
+
+            hideUploadError();
+            elements.uploadStatus.classList.remove('hidden');
+            elements.statusText.textContent = `Uploading ${file.name}...`;
+
+            try {
+                const result = await uploadImageFile(file);
+
+                if (result.success) {
+                    uploadedImages.push(result.filename);
+                    updateImageFilenames();
+                    addImageToGallery(fileData, result.filename, file.name);
+
+                    const statusText = elements.statusText;
+                    statusText.textContent = `✓ ${file.name} uploaded successfully!`;
+                    statusText.parentElement.classList.add('bg-green-50', 'border-green-200');
+                    statusText.classList.add('text-green-700');
+
+                    setTimeout(() => {
+                        elements.uploadStatus.classList.add('hidden');
+                        statusText.parentElement.classList.remove('bg-green-50', 'border-green-200');
+                        statusText.classList.remove('text-green-700');
+                    }, 2000);
+                } else {
+                    showUploadError('Upload failed for ' + file.name + ': ' + (result.error || 'Unknown error'));
+                }
+            } catch (error) {
+                console.error('Upload error:', error);
+                showUploadError('Upload error: ' + error.message);
+            }
+        };
+        reader.readAsDataURL(file);
+    }
+
+    // Upload straight to object storage when the backend hands out a presigned
+    // target, otherwise through the app
+    async function uploadImageFile(file) {
+        const presignResponse = await fetch('/api/auctions/upload-url', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, content_type: file.type, size: file.size })
+        });
+        const presign = await presignResponse.json();
+
+        if (!presign.direct) {
+            const formData = new FormData();
+            formData.append('file', file);
+            const response = await fetch('/api/auctions/upload-image', {
+                method: 'POST',
+                body: formData
+            });
+            return response.json();
+        }
+
+        const storageForm = new FormData();
+        Object.entries(presign.upload.fields).forEach(([name, value]) => storageForm.append(name, value));
+        storageForm.append('file', file);
+        const stored = await fetch(presign.upload.url, { method: 'POST', body: storageForm });
+        if (!stored.ok) {
+            return { success: false, error: 'Storage rejected the upload' };
+        }
+
+        const response = await fetch('/api/auctions/upload-complete', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ key: presign.key })
+        });
+        return response.json();
+    }
+
+    // ========================================================================
+    // GALLERY
+    // ========================================================================
+
+    function addImageToGallery(imageData, filename, originalName) {
+        const imageItem = document.createElement('div');
+        imageItem.className = 'relative group';
+        imageItem.dataset.filename = filename;
+        imageItem.innerHTML = `
+            <div class="aspect-square bg-slate-100 rounded-lg overflow-hidden border-2 border-slate-300 hover:border-slate-400 transition">
+                <img class="w-full h-full object-cover">
+            </div>
+            <button
+                type="button"
+                onclick="removeImageFromGallery(this, false)"
+                class="absolute top-1 right-1 bg-red-600 text-white rounded-full p-1 opacity-0 group-hover:opacity-100 transition-opacity hover:bg-red-700"
+                title="Remove image"
+            >
+                <svg class="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M6 18L18 6M6 6l12 12"></path>
+                </svg>
+            </button>
+            <p class="text-xs text-slate-600 mt-1 text-center truncate"></p>
+        `;
+        const img = imageItem.querySelector('img');
+        img.src = imageData;
+        img.alt = originalName;
+        imageItem.querySelector('p').textContent = originalName;
+
+        elements.imageGallery.appendChild(imageItem);
+    }
+
+    window.removeImageFromGallery = function (button, isExisting) {
+        const imageItem = button.closest('.relative');
+        const filename = imageItem.dataset.filename;
+
+        if (isExisting) {
+            // The image the auction already had (edit mode)
+            uploadedImages = [];
+            elements.imagePrimaryFilename.value = '';
+        } else {
+            uploadedImages = uploadedImages.filter(f => f !== filename);
+        }
+
+        updateImageFilenames();
+        imageItem.remove();
+    };
+
+    // ========================================================================
+    // HIDDEN INPUTS
+    // ========================================================================
+
+    function updateImageFilenames() {
+        // JSON list of every image, plus the first one as the primary image
+        elements.imageFilenames.value = JSON.stringify(uploadedImages);
+        elements.imagePrimaryFilename.value = uploadedImages.length > 0 ? uploadedImages[0] : '';
+    }
+
+    // ========================================================================
+    // ERROR HANDLING
+    // ========================================================================
+
+    function showUploadError(message) {
+        elements.uploadError.classList.remove('hidden');
+        elements.errorText.textContent = '⚠️ ' + message;
+        elements.uploadStatus.classList.add('hidden');
+    }
+
+    function hideUploadError() {
+        elements.uploadError.classList.add('hidden');
+        elements.errorText.textContent = '';
+    }
+
+    // ========================================================================
+    // FORM VALIDATION
+    // ========================================================================
+
+    function reject(event, message) {
+        event.preventDefault();
+        alert(message);
+        return false;
+    }
+
+    window.validateForm = function (event) {
+        const title = document.getElementById('title').value.trim();
+        const content = document.getElementById('content').value.trim();
+        const startPrice = parseFloat(document.getElementById('start_price').value);
+        const endsAt = document.getElementById('ends_at').value;
+
+        if (!title) {
+            return reject(event, 'Please enter a title');
+        }
+        if (!content) {
+            return reject(event, 'Please enter a description');
+        }
+        if (title.length > 255) {
+            return reject(event, 'Title must be 255 characters or less');
+        }
+        if (isNaN(startPrice) || startPrice <= 0) {
+            return reject(event, 'Please enter a valid starting price (must be greater than 0)');
+        }
+        if (!endsAt) {
+            return reject(event, 'Please select an end time for the auction');
+        }
+        if (new Date(endsAt) <= new Date()) {
+            return reject(event, 'Auction end time must be in the future');
+        }
+        if (uploadedImages.length === 0) {
+            return reject(event, 'Please upload at least one image');
+        }
+        return true;
+    };
+
+    // ========================================================================
+    // INITIALIZATION
+    // ========================================================================
+
+    function init(form) {
+        elements = {
+            imageUpload: form.querySelector('#image_upload'),
+            uploadBtn: form.querySelector('#upload-btn'),
+            uploadStatus: form.querySelector('#upload-status'),
+            statusText: form.querySelector('#status-text'),
+            uploadError: form.querySelector('#upload-error'),
+            errorText: form.querySelector('#error-text'),
+            imageGallery: form.querySelector('#image-gallery'),
+            imageFilenames: form.querySelector('#image_filenames'),
+            imagePrimaryFilename: form.querySelector('#image_filename')
+        };
+
+        // Start from the existing image in edit mode
+        const existingPrimary = elements.imagePrimaryFilename.value;
+        uploadedImages = existingPrimary ? [existingPrimary] : [];
+
+        elements.imageUpload.addEventListener('change', (e) => {
+            Array.from(e.target.files).forEach(handleImageUpload);
+            // Reset so the same file can be selected again
+            elements.imageUpload.value = '';
+        });
+
+        const uploadBtn = elements.uploadBtn;
+        uploadBtn.addEventListener('dragover', (e) => {
+            e.preventDefault();
+            uploadBtn.classList.add('border-slate-500', 'bg-slate-100');
+        });
+        uploadBtn.addEventListener('dragleave', () => {
+            uploadBtn.classList.remove('border-slate-500', 'bg-slate-100');
+        });
+        uploadBtn.addEventListener('drop', (e) => {
+            e.preventDefault();
+            uploadBtn.classList.remove('border-slate-500', 'bg-slate-100');
+            Array.from(e.dataTransfer.files).forEach(handleImageUpload);
+        });
+
+        form.querySelector('#title').focus();
+    }
+
+    // A 409 from the edit endpoint is the form again, with the current values
+    // and a conflict message; HTMX would not swap it in by default
+    document.body.addEventListener('htmx:beforeSwap', (e) => {
+        if (e.detail.xhr.status === 409 && e.detail.elt.matches('[data-auction-form]')) {
+            e.detail.shouldSwap = true;
+            e.detail.isError = false;
+        }
+    });
+
+    htmx.onLoad((element) => {
+        const form = element.matches('[data-auction-form]')
+            ? element
+            : element.querySelector('[data-auction-form]');
+        if (form) {
+            init(form);
+        }
+    });
+})();
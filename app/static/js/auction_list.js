@@ -0,0 +1,27 @@
+// ============================================================================
+// AUCTION LIST - auto-refresh every 30 seconds
+//
+// One timer for the page, however often the list fragment is swapped in.
+// It only refreshes while the list (not a detail view) is on screen.
+// ============================================================================
+
+(function () {
+    const REFRESH_MS = 30000;
+    let refreshTimer = null;
+
+    function refreshList() {
+        const container = document.getElementById('auctions-container');
+        if (container && container.querySelector('[data-auction-list]')) {
+            htmx.ajax('GET', '/api/auctions/list', {
+                target: '#auctions-container',
+                swap: 'innerHTML'
+            });
+        }
+    }
+
+    htmx.onLoad((element) => {
+        if (refreshTimer === null && (element.matches('[data-auction-list]') || element.querySelector('[data-auction-list]'))) {
+            refreshTimer = setInterval(refreshList, REFRESH_MS);
+        }
+    });
+})();
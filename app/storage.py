@@ -0,0 +1,176 @@
+"""
+Object storage for uploaded images.
+
+STORAGE_BACKEND selects the driver:
+
+- `local` (default): files under app/uploads, sharded into two levels of
+  subdirectories derived from a hash of the key (uploads/3f/a2/<key>), so
+  no single directory grows to millions of entries. Served by the app at
+  /uploads.
+- `s3`: any S3-compatible service (AWS, MinIO, ...), configured with
+  S3_BUCKET, S3_ENDPOINT_URL, S3_REGION, S3_PUBLIC_URL and the usual AWS
+  credential variables. Browsers upload straight to the bucket with a
+  presigned POST, so image bytes never pass through the app workers; the
+  bucket needs a CORS rule allowing POST from the site origin.
+"""
+
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator, Optional, Tuple
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOAD_DIR = os.path.join(BASE_DIR, "app", "uploads")
+PRESIGN_EXPIRES = 300
+
+
+class Storage(ABC):
+    """Interface shared by the storage drivers"""
+
+    @abstractmethod
+    def save(self, key: str, contents: bytes, content_type: Optional[str] = None):
+        ...
+
+    @abstractmethod
+    def delete_many(self, keys: Iterable[str]):
+        ...
+
+    @abstractmethod
+    def size(self, key: str) -> Optional[int]:
+        """Size in bytes, or None if the object does not exist"""
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        ...
+
+    @abstractmethod
+    def iter_objects(self) -> Iterator[Tuple[str, float]]:
+        """Yield (key, last modified unix time) for every stored object"""
+
+    def presign_upload(self, key: str, content_type: str, max_bytes: int) -> Optional[dict]:
+        """Direct upload target ({"url", "fields"}), or None to upload through the app"""
+        return None
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: str = UPLOAD_DIR, base_url: str = "/uploads"):
+        self.root = root
+        self.base_url = base_url
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def shard(key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(digest[:2], digest[2:4], key)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, self.shard(os.path.basename(key)))
+
+    def save(self, key: str, contents: bytes, content_type: Optional[str] = None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(contents)
+
+    def delete_many(self, keys: Iterable[str]):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(key))
+        except OSError:
+            return None
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{self.shard(key).replace(os.sep, '/')}"
+
+    def shard_flat_files(self) -> int:
+        """Move files saved before sharding (uploads/<key>) into the sharded layout"""
+        with os.scandir(self.root) as entries:
+            flat = [entry.name for entry in entries if entry.is_file()]
+        for name in flat:
+            target = os.path.join(self.root, self.shard(name))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(os.path.join(self.root, name), target)
+        return len(flat)
+
+    def iter_objects(self) -> Iterator[Tuple[str, float]]:
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                yield filename, os.path.getmtime(os.path.join(directory, filename))
+
+
+class S3Storage(Storage):
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, public_url: Optional[str] = None):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        base = public_url or (f"{endpoint_url}/{bucket}" if endpoint_url else f"https://{bucket}.s3.amazonaws.com")
+        self.public_url = base.rstrip("/")
+
+    def save(self, key: str, contents: bytes, content_type: Optional[str] = None):
+        extra = {"ContentType": content_type} if content_type else {}
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=contents, **extra)
+
+    def delete_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        # DeleteObjects accepts at most 1000 keys per call
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in keys[start:start + 1000]], "Quiet": True}
+            )
+
+    def size(self, key: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+        except ClientError:
+            return None
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def iter_objects(self) -> Iterator[Tuple[str, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket):
+            for item in page.get("Contents", []):
+                yield item["Key"], item["LastModified"].timestamp()
+
+    def presign_upload(self, key: str, content_type: str, max_bytes: int) -> Optional[dict]:
+        return self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_bytes]],
+            ExpiresIn=PRESIGN_EXPIRES
+        )
+
+
+def create_storage() -> Storage:
+    backend = os.getenv("STORAGE_BACKEND", "local")
+    if backend == "s3":
+        return S3Storage(
+            bucket=os.environ["S3_BUCKET"],
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            region=os.getenv("S3_REGION"),
+            public_url=os.getenv("S3_PUBLIC_URL")
+        )
+    if backend != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND: {backend}")
+    return LocalStorage()
+
+
+storage = create_storage()
@@ -0,0 +1,77 @@
+"""
+Shared Jinja2 template environment.
+
+Every router renders through this one environment. Compiled templates are
+kept in a filesystem bytecode cache shared by all workers, so a fresh
+worker loads bytecode instead of parsing the sources again. The cache
+executes what it finds, so it lives in a directory only this user can
+write: Jinja's per-user default, or TEMPLATE_CACHE_DIR, which must be
+owned by this user with mode 0700.
+
+`warm_templates()` compiles everything at startup rather than on the first
+request each template sees. Templates are only re-checked on disk
+(auto_reload) when APP_ENV=development.
+"""
+
+import os
+import stat
+import time
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from compression import static_url
+from log import get_logger
+from storage import storage
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(BASE_DIR, "app", "templates")
+CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR")
+DEVELOPMENT = os.getenv("APP_ENV", "production") == "development"
+
+log = get_logger("templates")
+
+
+def _bytecode_cache() -> FileSystemBytecodeCache:
+    if not CACHE_DIR:
+        # Per-user directory, created 0700 and checked by Jinja
+        return FileSystemBytecodeCache()
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    info = os.lstat(CACHE_DIR)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise RuntimeError(f"TEMPLATE_CACHE_DIR {CACHE_DIR} must be a directory owned by this user with mode 0700")
+    return FileSystemBytecodeCache(CACHE_DIR)
+
+
+env = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=True,
+    auto_reload=DEVELOPMENT,
+    bytecode_cache=_bytecode_cache(),
+    # Keep every template compiled in memory; there are only a few dozen
+    cache_size=-1,
+)
+env.globals["image_url"] = storage.url
+env.globals["static_url"] = static_url
+
+templates = Jinja2Templates(env=env)
+
+
+def warm_templates() -> dict:
+    """Compile every template (pages and components) and log a timing report"""
+    timings = {}
+    started = time.perf_counter()
+    for name in env.list_templates(extensions=["html"]):
+        template_started = time.perf_counter()
+        env.get_template(name)
+        timings[name] = (time.perf_counter() - template_started) * 1000
+    total_ms = (time.perf_counter() - started) * 1000
+
+    slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:3]
+    log.info(
+        "templates_warmed",
+        templates=len(timings),
+        total_ms=round(total_ms, 1),
+        slowest={name: round(ms, 1) for name, ms in slowest},
+        auto_reload=env.auto_reload,
+    )
+    return timings
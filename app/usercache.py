@@ -0,0 +1,141 @@
+"""
+Read-through cache of user records.
+
+Almost every authenticated request needs the current user's id and role,
+and user rows only change through crud.update_user_role and
+crud.delete_user. Each worker keeps immutable UserSnapshot tuples in an
+LRU of USER_CACHE_SIZE entries that also expire after USER_CACHE_TTL
+seconds, as a backstop for changes made outside crud.
+
+crud invalidates a user with invalidate_user(), which drops the local
+copy and publishes a `user_changed` event so the other workers drop
+theirs once the change commits.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from fastapi import Request
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import events
+from metrics import Counter, Gauge
+from schemas import Role, UserModel
+from sessions import current_session
+
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "50000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+
+USER_CACHE_LOOKUPS = Counter(
+    "user_cache_lookups_total",
+    "User lookups by whether the cache answered them",
+    ["result"]
+)
+USER_CACHE_ENTRIES = Gauge("user_cache_entries", "Users cached by this worker")
+
+
+class UserSnapshot(NamedTuple):
+    id: int
+    username: str
+    role: Role
+
+
+_lock = threading.Lock()
+# user id -> (snapshot, monotonic expiry)
+_by_id: "OrderedDict[int, Tuple[UserSnapshot, float]]" = OrderedDict()
+_ids_by_name: Dict[str, int] = {}
+# Bumped by every invalidation; a load that raced one is not cached
+_generation = 0
+
+
+def _cached(user_id: int) -> Optional[UserSnapshot]:
+    with _lock:
+        entry = _by_id.get(user_id)
+        if entry is None:
+            return None
+        snapshot, expires = entry
+        if expires <= time.monotonic():
+            _drop(user_id)
+            return None
+        _by_id.move_to_end(user_id)
+        return snapshot
+
+
+def _drop(user_id: int):
+    """Remove one user; caller holds _lock"""
+    entry = _by_id.pop(user_id, None)
+    if entry is not None and _ids_by_name.get(entry[0].username) == user_id:
+        del _ids_by_name[entry[0].username]
+    USER_CACHE_ENTRIES.set(len(_by_id))
+
+
+def _load(db: Session, condition) -> Optional[UserSnapshot]:
+    generation = _generation
+    row = db.execute(select(UserModel.id, UserModel.username, UserModel.role).where(condition)).first()
+    if row is None:
+        return None
+    snapshot = UserSnapshot(row.id, row.username, row.role)
+    with _lock:
+        if generation == _generation:
+            _drop(snapshot.id)
+            _by_id[snapshot.id] = (snapshot, time.monotonic() + USER_CACHE_TTL)
+            _ids_by_name[snapshot.username] = snapshot.id
+            while len(_by_id) > USER_CACHE_SIZE:
+                _drop(next(iter(_by_id)))
+            USER_CACHE_ENTRIES.set(len(_by_id))
+    return snapshot
+
+
+def get_by_id(db: Session, user_id: int) -> Optional[UserSnapshot]:
+    snapshot = _cached(user_id)
+    if snapshot is not None:
+        USER_CACHE_LOOKUPS.inc(result="hit")
+        return snapshot
+    USER_CACHE_LOOKUPS.inc(result="miss")
+    return _load(db, UserModel.id == user_id)
+
+
+def get_by_name(db: Session, username: str) -> Optional[UserSnapshot]:
+    user_id = _ids_by_name.get(username)
+    snapshot = _cached(user_id) if user_id is not None else None
+    if snapshot is not None and snapshot.username == username:
+        USER_CACHE_LOOKUPS.inc(result="hit")
+        return snapshot
+    USER_CACHE_LOOKUPS.inc(result="miss")
+    return _load(db, UserModel.username == username)
+
+
+def current_user(request: Request, db: Session) -> Optional[UserSnapshot]:
+    """The logged-in user of a request, or None"""
+    session = current_session(request)
+    if session is None:
+        return None
+    return get_by_id(db, session.user_id)
+
+
+# ============================================================================
+# INVALIDATION
+# ============================================================================
+
+def _forget(user_ids: set):
+    global _generation
+    with _lock:
+        _generation += 1
+        for user_id in user_ids:
+            _drop(user_id)
+
+
+def invalidate_user(db: Session, user_id: int):
+    """Drop a user from every worker's cache once `db` commits"""
+    _forget({user_id})
+    events.publish(db, "user_changed", user_id=user_id)
+
+
+@events.subscribe
+def _on_user_changed(batch: List[dict]):
+    user_ids = {message["user_id"] for message in batch if message["kind"] == "user_changed"}
+    if user_ids:
+        _forget(user_ids)
@@ -0,0 +1,103 @@
+"""
+Worker boot time: how long a fresh process takes to import the app and run
+its lifespan startup, plus the `python -X importtime` profile of `import main`.
+
+Each run is a new interpreter, like a freshly forked or autoscaled worker.
+DATABASE_URL is inherited; without it a throwaway SQLite file is used.
+
+Usage: python benchmarks/bench_import.py [--runs 5] [--top 15]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+# Runs inside the child interpreter
+BOOT_SCRIPT = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def boot():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+t2 = asyncio.run(boot())
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "startup_ms": (t2 - t1) * 1000}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def child_env():
+    env = dict(os.environ)
+    if not env.get("DATABASE_URL"):
+        path = os.path.join(tempfile.gettempdir(), "bench_import.db")
+        env["DATABASE_URL"] = f"sqlite:///{path}"
+        env.setdefault("DB_AUTO_CREATE", "1")
+    env.setdefault("SECRET_KEY", "bench")
+    env.setdefault("ALGORITHM", "HS256")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return env
+
+
+def boot_times(runs: int, env: dict) -> list:
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", BOOT_SCRIPT], cwd=APP_DIR, env=env,
+            capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def import_profile(env: dict) -> list:
+    """(self_us, cumulative_us, depth, module) for every module imported by main"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], cwd=APP_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, module))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules to list by cumulative time")
+    args = parser.parse_args()
+
+    env = child_env()
+    samples = boot_times(args.runs, env)
+    for key in ("import_ms", "startup_ms"):
+        values = [sample[key] for sample in samples]
+        print(f"{key:<12} median {statistics.median(values):8.1f}  min {min(values):8.1f}")
+    total = [sample["import_ms"] + sample["startup_ms"] for sample in samples]
+    print(f"{'ready_ms':<12} median {statistics.median(total):8.1f}  min {min(total):8.1f}")
+
+    rows = import_profile(env)
+    app_modules = {name[:-3] for name in os.listdir(APP_DIR) if name.endswith(".py")}
+    print(f"\nslowest top-level imports (cumulative), of {len(rows)} modules")
+    top_level = sorted((row for row in rows if row[2] <= 1), key=lambda row: -row[1])
+    for self_us, cumulative_us, _, module in top_level[:args.top]:
+        marker = "*" if module in app_modules else " "
+        print(f"{cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {marker} {module}")
+    print("\n* = app module")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Micro-benchmark of the minimum-bid check in place_bid.
+
+Compares the integer-cents path used by the bid engine against the same
+check done with Decimal and with float.
+
+Usage: python benchmarks/bench_money.py [--number 1000000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from money import CENTS_PER_UNIT, to_cents  # noqa: E402
+
+
+def bench(label, stmt, setup_globals, number):
+    seconds = min(timeit.repeat(stmt, globals=setup_globals, number=number, repeat=5))
+    print(f"{label:<28} {seconds / number * 1e9:8.1f} ns/op")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    env = {
+        "current_cents": 12_345, "bid_cents": 12_445, "step_cents": CENTS_PER_UNIT,
+        "current_dec": Decimal("123.45"), "bid_dec": Decimal("124.45"), "step_dec": Decimal("1.00"),
+        "current_f": 123.45, "bid_f": 124.45,
+        "to_cents": to_cents,
+    }
+
+    print(f"min-bid check, best of 5 x {args.number} iterations")
+    base = bench("int cents", "bid_cents >= current_cents + step_cents", env, args.number)
+    dec = bench("Decimal", "bid_dec >= current_dec + step_dec", env, args.number)
+    flt = bench("float", "bid_f >= current_f + 1.0", env, args.number)
+    bench("to_cents('124.45') (once/req)", "to_cents('124.45')", env, args.number // 10)
+    print(f"Decimal / int ratio: {dec / base:.2f}x, float / int ratio: {flt / base:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
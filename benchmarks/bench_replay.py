@@ -0,0 +1,101 @@
+"""
+Replay throughput of the bid log (app/replay.py).
+
+Loads a datagen dataset into a fresh database, then times:
+
+- fold:       folding the bids in memory, no database
+- full:       replaying every auction from its first bid
+- snapshot:   take_snapshots() over the whole log
+- after_snap: replaying every auction from its latest snapshot
+- recover:    the startup recovery of the live auctions
+
+The `full` rate (bids/s, database reads included) is what
+REPLAY_EVENTS_PER_SECOND should be set to on the same hardware.
+
+DATABASE_URL is inherited (its tables must be empty); without it a
+throwaway SQLite file is used.
+
+Usage: python benchmarks/bench_replay.py [--users 10000] [--auctions 20000] \\
+           [--bids 1000000] [--every 500] [--output replay.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+
+def timed(label: str, fn, bids=None) -> dict:
+    """Run fn once; `bids` extracts the number of bids processed from its result"""
+    started = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - started
+    count = bids(result) if bids else None
+    rate = f"{count / seconds:>12,.0f} bids/s" if count else ""
+    print(f"{label:<12} {seconds:8.3f} s {rate}")
+    return {"seconds": round(seconds, 3), "bids": count, "bids_per_second": round(count / seconds) if count else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--auctions", type=int, default=20_000)
+    parser.add_argument("--bids", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--every", type=int, default=500, help="SNAPSHOT_EVERY_BIDS for the snapshot step")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(prefix="bench-replay-"), "replay.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    sys.path.insert(0, APP_DIR)
+    import datagen
+    import replay
+    from database import SessionLocal, engine, init_db
+    from schemas import Auction
+
+    init_db()
+    dataset = datagen.generate(args.users, args.auctions, args.bids, args.seed)
+    results = {"bids": args.bids, "auctions": args.auctions, "database": engine.dialect.name}
+    results["load"] = timed("load", lambda: datagen.load(engine, dataset))
+
+    b = dataset.bids
+    auction_ids = b["auction"] + 1
+    bid_ids = 1 + np.arange(len(b["bid_time"]))
+    bid_times = (b["bid_time"] * 1e6).astype("int64").astype("datetime64[us]")
+
+    def fold_only():
+        states = {
+            auction_id: replay.AuctionState(int(start), None, 0, 0, None)
+            for auction_id, start in enumerate(dataset.auctions["start_price_cents"].tolist(), start=1)
+        }
+        return replay.fold(states, auction_ids, bid_ids, b["bidder"] + 1, b["amount_cents"], bid_times)
+
+    results["fold"] = timed("fold", fold_only, bids=lambda folded: folded)
+
+    everything = Auction.id.isnot(None)
+    with SessionLocal() as db:
+        results["full"] = timed("full", lambda: replay.replay(db, everything), bids=lambda r: r[1])
+        snapshotted = []
+        results["snapshot"] = timed("snapshot", lambda: snapshotted.append(replay.take_snapshots(db, args.every)))
+        results["snapshot"]["auctions"] = snapshotted[0]
+        results["after_snap"] = timed("after_snap", lambda: replay.replay(db, everything), bids=lambda r: r[1])
+        results["recover"] = timed("recover", lambda: replay.recover(db), bids=lambda r: r["bids"])
+
+    print(f"suggested REPLAY_EVENTS_PER_SECOND={results['full']['bids_per_second']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
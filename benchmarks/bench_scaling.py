@@ -0,0 +1,162 @@
+"""
+Throughput scaling of serve.py from 1 to N worker processes.
+
+For each worker count it starts `python app/serve.py --workers W`, waits
+until /healthz answers, drives the same closed-loop load from several
+client processes (so the client is not the bottleneck) and stops the
+server again. Reports req/s, p50/p99 and the speedup over one worker.
+
+DATABASE_URL is inherited; without it a throwaway SQLite file is used.
+Requests are sent as bench_user_0, which is created by the seeding step.
+
+Usage: python benchmarks/bench_scaling.py [--max-workers 8] [--duration 10] \\
+           [--concurrency 64] [--path /api/auctions/list] [--output scaling.json]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from load_test import APP_DIR, login, seed, summarize
+
+
+def worker_counts(maximum: int) -> list:
+    counts, workers = [], 1
+    while workers < maximum:
+        counts.append(workers)
+        workers *= 2
+    return counts + [maximum]
+
+
+def server_env() -> dict:
+    env = dict(os.environ)
+    if not env.get("DATABASE_URL"):
+        path = os.path.join(tempfile.gettempdir(), "bench_scaling.db")
+        env["DATABASE_URL"] = f"sqlite:///{path}"
+        env.setdefault("DB_AUTO_CREATE", "1")
+    env.setdefault("SECRET_KEY", "bench")
+    env.setdefault("ALGORITHM", "HS256")
+    env.setdefault("LOG_LEVEL", "WARNING")
+    return env
+
+
+def start_server(workers: int, port: int, env: dict) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=APP_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/healthz", timeout=1).status_code == 200:
+                # Give the remaining workers a moment to finish their lifespan startup
+                time.sleep(1)
+                return server
+        except httpx.HTTPError:
+            pass
+        if server.poll() is not None:
+            break
+        time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError(f"server with {workers} workers did not become ready")
+
+
+def stop_server(server: subprocess.Popen):
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+async def _drive(base_url: str, path: str, concurrency: int, duration: float):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async def user(client):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        # The HTMX endpoints need a logged-in session
+        await login(client, "bench_user_0")
+        await asyncio.gather(*(user(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def client_process(args) -> tuple:
+    return asyncio.run(_drive(*args))
+
+
+def measure(base_url: str, path: str, clients: int, concurrency: int, duration: float) -> dict:
+    per_client = max(concurrency // clients, 1)
+    started = time.monotonic()
+    with multiprocessing.Pool(clients) as pool:
+        results = pool.map(client_process, [(base_url, path, per_client, duration)] * clients)
+    elapsed = time.monotonic() - started
+    latencies = [latency for client_latencies, _ in results for latency in client_latencies]
+    return summarize(latencies, sum(errors for _, errors in results), elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=min(4, os.cpu_count() or 1),
+                        help="load generator processes")
+    parser.add_argument("--path", default="/api/auctions/list")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--seed-auctions", type=int, default=50)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    env = server_env()
+    os.environ["DATABASE_URL"] = env["DATABASE_URL"]
+    seed(1, args.seed_auctions)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    rows = []
+    for workers in worker_counts(args.max_workers):
+        server = start_server(workers, args.port, env)
+        try:
+            stats = measure(base_url, args.path, args.clients, args.concurrency, args.duration)
+        finally:
+            stop_server(server)
+        stats["workers"] = workers
+        rows.append(stats)
+
+    base = rows[0]["throughput_rps"] or 1
+    print(f"{'workers':>7} {'rps':>9} {'p50ms':>8} {'p99ms':>8} {'err%':>7} {'speedup':>8} {'eff':>6}")
+    for row in rows:
+        speedup = row["throughput_rps"] / base
+        print(
+            f"{row['workers']:>7} {row['throughput_rps']:>9.1f} {row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+            f"{row['error_rate'] * 100:>6.2f}% {speedup:>7.2f}x {speedup / row['workers']:>6.0%}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"path": args.path, "concurrency": args.concurrency, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
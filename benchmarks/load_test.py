@@ -0,0 +1,266 @@
+"""
+Load test for the bidding hot path.
+
+Seeds bench users and auctions straight into the database the server uses,
+logs every virtual user in through /api/login, then drives a weighted mix
+of bids, list polls and detail views against a running server.
+Reports p50/p95/p99 latency, throughput, error rate and the SQL query count
+scraped from /metrics, and writes everything to a JSON file.
+
+    # terminal 1 (SQLite or Postgres)
+    cd app && DATABASE_URL=sqlite:///bench.db uvicorn main:app
+    # terminal 2, same DATABASE_URL so seeding hits the same database
+    DATABASE_URL=sqlite:///app/bench.db python benchmarks/load_test.py \\
+        --seed --duration 30 --concurrency 50 --mix bid=5,list=3,detail=2 \\
+        --output results.json --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+BENCH_PASSWORD = "bench-password"
+DEFAULT_MIX = "bid=5,list=3,detail=2"
+
+
+# ============================================================================
+# SEEDING
+# ============================================================================
+
+def seed(users: int, auctions: int) -> list:
+    """Create bench users/auctions if missing; returns the auction ids"""
+    sys.path.insert(0, APP_DIR)
+    import crud
+    from database import SessionLocal, init_db
+    from models import AuctionCreate
+
+    init_db()
+    db = SessionLocal()
+    try:
+        for i in range(users):
+            username = f"bench_user_{i}"
+            if not crud.get_user_by_name(db, username):
+                crud.create_user(db, username, f"{username}@bench.local", BENCH_PASSWORD)
+        auction_ids = []
+        for i in range(auctions):
+            auction = crud.create_auction(db, AuctionCreate(
+                title=f"Bench auction {i}",
+                content="Seeded by benchmarks/load_test.py",
+                author="bench",
+                start_price="10.00",
+                ends_at=datetime.utcnow() + timedelta(days=1),
+            ))
+            auction_ids.append(auction.id)
+        return auction_ids
+    finally:
+        db.close()
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def scrape_query_count(client: httpx.AsyncClient) -> float:
+    """Sum of db_queries_total over all routes; -1 if /metrics is unavailable"""
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return -1
+    if response.status_code != 200:
+        return -1
+    pattern = re.compile(r"^db_queries_total\{.*\} (\S+)$", re.M)
+    return sum(float(value) for value in pattern.findall(response.text))
+
+
+# ============================================================================
+# VIRTUAL USERS
+# ============================================================================
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.rejected = defaultdict(int)
+        self.shed = defaultdict(int)
+
+    def record(self, op: str, started: float, status: int):
+        self.latencies[op].append(time.perf_counter() - started)
+        if status == 503:
+            # Turned away by admission control (app/admission.py), not a failure
+            self.shed[op] += 1
+        elif status >= 500 or status == 0:
+            self.errors[op] += 1
+        elif status >= 400:
+            self.rejected[op] += 1
+
+
+async def login(client: httpx.AsyncClient, username: str):
+    response = await client.post("/api/login", json={"username": username, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+
+
+async def virtual_user(client, auction_ids, ops, weights, deadline, recorder, rng):
+    next_bid = {auction_id: 0.0 for auction_id in auction_ids}
+    while time.perf_counter() < deadline:
+        op = rng.choices(ops, weights)[0]
+        auction_id = rng.choice(auction_ids)
+        started = time.perf_counter()
+        try:
+            if op == "bid":
+                amount = max(next_bid[auction_id], 10.0) + rng.choice((1, 2, 5, 10))
+                response = await client.post(f"/api/auctions/{auction_id}/bid", json={"amount": f"{amount:.2f}"})
+                body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+                next_bid[auction_id] = float(body.get("new_minimum") or body.get("minimum_bid") or amount)
+            elif op == "list":
+                response = await client.get("/api/auctions/list")
+            else:
+                response = await client.get(f"/api/auctions/{auction_id}")
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        recorder.record(op, started, status)
+
+
+async def run(args) -> dict:
+    mix = dict(part.split("=") for part in args.mix.split(","))
+    ops = list(mix)
+    weights = [float(mix[op]) for op in ops]
+    auction_ids = seed(args.users, args.auctions) if args.seed else [int(i) for i in args.auction_ids.split(",")]
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    clients = [
+        httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout)
+        for _ in range(args.concurrency)
+    ]
+    try:
+        await asyncio.gather(*(
+            login(client, f"bench_user_{i % args.users}") for i, client in enumerate(clients)
+        ))
+        queries_before = await scrape_query_count(clients[0])
+
+        recorder = Recorder()
+        rng = random.Random(args.random_seed)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            virtual_user(client, auction_ids, ops, weights, deadline, recorder, random.Random(rng.random()))
+            for client in clients
+        ))
+        elapsed = time.perf_counter() - started
+        queries_after = await scrape_query_count(clients[0])
+    finally:
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    all_latencies = [value for values in recorder.latencies.values() for value in values]
+    total = summarize(all_latencies, sum(recorder.errors.values()), elapsed)
+    if queries_before >= 0 and queries_after >= 0 and total["requests"]:
+        total["db_queries"] = int(queries_after - queries_before)
+        total["db_queries_per_request"] = round(total["db_queries"] / total["requests"], 2)
+
+    per_op = {}
+    for op in ops:
+        per_op[op] = summarize(recorder.latencies[op], recorder.errors[op], elapsed)
+        per_op[op]["rejected"] = recorder.rejected[op]
+        per_op[op]["shed"] = recorder.shed[op]
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "commit": _git_commit(),
+            "base_url": args.base_url,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+        },
+        "total": total,
+        "ops": per_op,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(results: dict, baseline: dict = None):
+    print(f"{'op':<8} {'reqs':>8} {'rps':>9} {'err%':>7} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}")
+    rows = list(results["ops"].items()) + [("total", results["total"])]
+    for op, stats in rows:
+        line = (
+            f"{op:<8} {stats['requests']:>8} {stats['throughput_rps']:>9.1f} "
+            f"{stats['error_rate'] * 100:>6.2f}% {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}"
+        )
+        base = baseline and (baseline["total"] if op == "total" else baseline["ops"].get(op))
+        if base and base["throughput_rps"] and base["p95_ms"]:
+            line += (
+                f"   rps {stats['throughput_rps'] / base['throughput_rps'] - 1:+.1%}"
+                f" p95 {stats['p95_ms'] / base['p95_ms'] - 1:+.1%}"
+            )
+        print(line)
+    if "db_queries_per_request" in results["total"]:
+        print(f"SQL queries per request: {results['total']['db_queries_per_request']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bidding load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--seed", action="store_true", help="seed bench users/auctions via DATABASE_URL")
+    parser.add_argument("--auction-ids", default="1", help="auction ids to target when not seeding")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--auctions", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weighted ops, e.g. bid=5,list=3,detail=2")
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON results here")
+    parser.add_argument("--compare", help="baseline JSON results to diff against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
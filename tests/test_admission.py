@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from admission import Admission, classify
+
+
+@pytest.mark.parametrize("method, path, lane", [
+    ("POST", "/api/auctions/12/bid", "bid"),
+    ("POST", "/api/login", "auth"),
+    ("GET", "/logout", "auth"),
+    ("GET", "/api/auctions/12", "detail"),
+    ("GET", "/api/auctions/12/bids", "detail"),
+    ("GET", "/api/auctions/list", "list"),
+    ("GET", "/api/check-username/alice", "list"),
+    ("GET", "/api/auctions/12/bid", "other"),
+    ("POST", "/api/auctions/create", "other"),
+])
+def test_classify(method, path, lane):
+    assert classify(method, path) == lane
+
+
+def test_freed_slot_goes_to_highest_priority_waiter():
+    async def scenario():
+        admission = Admission(max_concurrency=1)
+        bid, listing = admission.by_name["bid"], admission.by_name["list"]
+        admitted = []
+
+        async def request(lane):
+            assert await admission.acquire(lane) is None
+            admitted.append(lane.name)
+
+        assert await admission.acquire(listing) is None
+        # The list request queues first, the bid overtakes it
+        waiting = [asyncio.create_task(request(listing)), asyncio.create_task(request(bid))]
+        await asyncio.sleep(0)
+        assert admission.in_flight == 1 and not admitted
+
+        # Slots are handed over at release time
+        admission.release(listing, 0.01)
+        assert (bid.in_flight, listing.in_flight) == (1, 0)
+        admission.release(bid, 0.01)
+        assert (bid.in_flight, listing.in_flight) == (0, 1)
+        await asyncio.gather(*waiting)
+        assert admitted == ["bid", "list"]
+        admission.release(listing, 0.01)
+        assert admission.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_shed_when_budget_is_exceeded():
+    async def scenario():
+        admission = Admission(max_concurrency=1)
+        listing = admission.by_name["list"]
+        listing.budget = 0.01
+        assert await admission.acquire(listing) is None
+
+        # Nobody ahead, so it queues, then gives up when the budget runs out
+        assert await admission.acquire(listing) == "timeout"
+        assert not listing.waiters
+
+        # With a waiter ahead the expected wait is already over budget
+        admission.service_time = 1.0
+        queued = asyncio.create_task(admission.acquire(listing))
+        await asyncio.sleep(0)
+        assert await admission.acquire(listing) == "predicted"
+        assert await queued == "timeout"
+
+    asyncio.run(scenario())
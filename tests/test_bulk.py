@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import func, select
+
+import crud
+from models import AuctionFilter, BulkAuctionDelete, BulkAuctionUpdate
+from querycount import assert_max_queries
+from schemas import Auction, Bid
+
+
+@pytest.mark.parametrize("criteria", [
+    {},
+    {"title_contains": ""},
+    {"title_contains": "   "},
+    {"author": ""},
+    {"ids": []},
+    {"is_active": None},
+])
+def test_filter_needs_a_narrowing_criterion(criteria):
+    with pytest.raises(ValidationError):
+        AuctionFilter(**criteria)
+
+
+def test_conditions_refuse_an_empty_filter():
+    # Bypasses validation, as a caller building the model by hand could
+    with pytest.raises(ValueError):
+        crud.auction_conditions(AuctionFilter.model_construct())
+
+
+def test_update_needs_exactly_one_kind_of_change():
+    with pytest.raises(ValidationError):
+        BulkAuctionUpdate(filter={"ids": [1]})
+    with pytest.raises(ValidationError):
+        BulkAuctionUpdate(filter={"ids": [1]}, extend_minutes=5, ends_at=datetime(2030, 1, 1))
+    assert BulkAuctionDelete(filter={"author": "gen_user_1"}).dry_run is False
+
+
+def test_dry_run_counts(db):
+    auction_filter = AuctionFilter(author="gen_user_1")
+    counted = crud.count_bulk_targets(db, auction_filter)
+    assert counted["auctions"] == db.scalar(
+        select(func.count()).select_from(Auction).where(Auction.author == "gen_user_1")
+    )
+    assert counted["bids"] == db.scalar(
+        select(func.count()).select_from(Bid).join(Auction, Auction.id == Bid.auction_id)
+        .where(Auction.author == "gen_user_1")
+    )
+
+
+def test_bulk_extend_touches_only_matches(db):
+    before = dict(db.execute(select(Auction.id, Auction.ends_at).where(Auction.id <= 20)).all())
+    with assert_max_queries(1):
+        changed = crud.bulk_update_auctions(db, AuctionFilter(ids=[3, 5, 7]), extend_minutes=30)
+    assert sorted(changed) == [3, 5, 7]
+
+    after = dict(db.execute(select(Auction.id, Auction.ends_at).where(Auction.id <= 20)).all())
+    for auction_id, ends_at in before.items():
+        moved = (after[auction_id] - ends_at).total_seconds()
+        assert moved == (1800 if auction_id in changed else 0)
+
+
+def test_bulk_delete_and_purge(db):
+    auction_filter = AuctionFilter(ids=[1, 2])
+    bids = crud.count_bulk_targets(db, auction_filter)["bids"]
+    deleted = crud.bulk_delete_auctions(db, auction_filter)
+    assert sorted(auction_id for auction_id, _ in deleted) == [1, 2]
+    assert db.scalar(select(func.count()).select_from(Auction).where(Auction.id.in_([1, 2]))) == 0
+    # Bids stay until the background purge
+    assert db.scalar(select(func.count()).select_from(Bid).where(Bid.auction_id.in_([1, 2]))) == bids
+
+    crud.purge_auction_children(db, [1, 2])
+    assert db.scalar(select(func.count()).select_from(Bid).where(Bid.auction_id.in_([1, 2]))) == 0
@@ -0,0 +1,39 @@
+from sqlalchemy import select
+
+import crud
+from schemas import AuctionImage
+
+
+def _owners(db, keys):
+    return dict(db.execute(
+        select(AuctionImage.storage_key, AuctionImage.auction_id).where(AuctionImage.storage_key.in_(keys))
+    ).all())
+
+
+def test_attach_in_order(db):
+    keys = ["test-b.png", "test-a.png"]
+    for key in keys:
+        crud.create_image(db, key, 10, None)
+    crud.attach_images(db, 1, keys)
+    db.commit()
+    assert crud.get_auction_image_keys(db, 1) == keys
+
+
+def test_attach_never_takes_another_auctions_images(db):
+    crud.create_image(db, "test-owned.png", 10, None)
+    crud.create_image(db, "test-orphan.png", 10, None)
+    crud.attach_images(db, 1, ["test-owned.png"])
+
+    crud.attach_images(db, 2, ["test-owned.png", "test-orphan.png"])
+    db.commit()
+    assert _owners(db, ["test-owned.png", "test-orphan.png"]) == {"test-owned.png": 1, "test-orphan.png": 2}
+
+
+def test_replace_detaches_dropped_images(db):
+    for key in ("test-keep.png", "test-drop.png"):
+        crud.create_image(db, key, 10, None)
+    crud.attach_images(db, 1, ["test-keep.png", "test-drop.png"])
+
+    crud.replace_images(db, 1, ["test-keep.png"])
+    db.commit()
+    assert _owners(db, ["test-keep.png", "test-drop.png"]) == {"test-keep.png": 1, "test-drop.png": None}
@@ -0,0 +1,49 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from increments import GLOBAL_LADDER, IncrementLadder, ladder_for, minimum_bid_cents, parse_ladder
+
+
+def test_bands_switch_at_thresholds():
+    ladder = parse_ladder(json.dumps([[0, "0.05"], [1, "0.25"], [5, "0.50"]]))
+    assert ladder.increment_for(0) == 5
+    assert ladder.increment_for(99) == 5
+    assert ladder.increment_for(100) == 25
+    assert ladder.increment_for(499) == 25
+    assert ladder.increment_for(500) == 50
+    assert ladder.increment_for(10 ** 9) == 50
+    assert ladder.minimum_bid(100) == 125
+
+
+def test_bands_are_sorted():
+    ladder = IncrementLadder([(500, 50), (0, 5), (100, 25)])
+    assert ladder.thresholds == [0, 100, 500]
+    assert ladder.increment_for(250) == 25
+
+
+@pytest.mark.parametrize("raw", [
+    "not json",
+    "[]",
+    '[[1, "0.05"]]',
+    '[[0, "0"]]',
+    '[[0, "-0.05"]]',
+    '[[0, "abc"]]',
+])
+def test_invalid_ladders(raw):
+    with pytest.raises(ValueError):
+        parse_ladder(raw)
+
+
+def test_identical_ladders_are_shared():
+    raw = '[[0, "1.00"]]'
+    assert parse_ladder(raw) is parse_ladder(raw)
+
+
+def test_auction_override():
+    plain = SimpleNamespace(increment_ladder=None, current_price_cents=1000)
+    custom = SimpleNamespace(increment_ladder='[[0, "1.00"], [10, "5.00"]]', current_price_cents=1000)
+    assert ladder_for(plain) is GLOBAL_LADDER
+    assert minimum_bid_cents(plain) == GLOBAL_LADDER.minimum_bid(1000)
+    assert minimum_bid_cents(custom) == 1500
@@ -0,0 +1,35 @@
+from decimal import Decimal
+
+import pytest
+
+from money import format_cents, from_cents, to_cents
+
+
+@pytest.mark.parametrize("value, cents", [
+    ("12.50", 1250),
+    ("12.5", 1250),
+    (12.5, 1250),
+    (Decimal("0.1"), 10),
+    (" 3 ", 300),
+    # Half a cent rounds up, never to even
+    ("0.005", 1),
+    ("0.015", 2),
+    ("12.344", 1234),
+    ("12.345", 1235),
+    # 0.1 + 0.2 as a float is 0.30000000000000004
+    (0.1 + 0.2, 30),
+])
+def test_to_cents(value, cents):
+    assert to_cents(value) == cents
+
+
+@pytest.mark.parametrize("value", ["", "abc", "1,50", None, "nan", "inf"])
+def test_to_cents_rejects(value):
+    with pytest.raises(ValueError):
+        to_cents(value)
+
+
+def test_from_cents_is_exact():
+    assert from_cents(1235) == Decimal("12.35")
+    assert format_cents(5) == "0.05"
+    assert format_cents(to_cents("19.99")) == "19.99"
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+import crud
+from models import AuctionCreate
+from querycount import QueryStats, assert_max_queries, normalize
+from schemas import Auction, UserModel
+
+
+def test_normalize_collapses_placeholders_and_in_lists():
+    assert normalize("SELECT a FROM t WHERE id IN (?, ?, ?)") == normalize("SELECT a FROM t WHERE id IN (?)")
+    assert normalize("SELECT a FROM t WHERE id = %(id_1)s") == "SELECT a FROM t WHERE id = ?"
+    assert normalize("SELECT a\n  FROM t") == "SELECT a FROM t"
+
+
+def test_most_repeated():
+    stats = QueryStats()
+    for ids in ("(?)", "(?, ?)", "(?, ?, ?)"):
+        stats.record(f"SELECT * FROM bids WHERE auction_id IN {ids}", 0.0)
+    stats.record("SELECT * FROM auctions", 0.0)
+    assert stats.most_repeated() == ("SELECT * FROM bids WHERE auction_id IN (?)", 3)
+    assert QueryStats().most_repeated() == (None, 0)
+
+
+def test_transaction_control_is_not_counted(db):
+    with assert_max_queries(1) as stats:
+        with db.begin_nested():
+            db.execute(select(1))
+    assert stats.count == 1
+
+
+def test_create_auction_budget(db):
+    auction = AuctionCreate(
+        title="Budget", content="Query budget", author="gen_user_1",
+        start_price=10, ends_at=datetime.utcnow() + timedelta(days=1),
+    )
+    # Insert and reload
+    with assert_max_queries(2):
+        crud.create_auction(db, auction)
+
+
+def test_create_bid_budget(db):
+    auction = db.scalars(
+        select(Auction).where(Auction.is_active.is_(True), Auction.winner_id.isnot(None)).order_by(Auction.id).limit(1)
+    ).one()
+    bidder_id = db.scalar(select(UserModel.id).where(UserModel.id != auction.winner_id).limit(1))
+    # Load the auction, insert and reload the bid, reload the auction after that commit,
+    # update it, queue the outbid notification, reload it
+    with assert_max_queries(7):
+        crud.create_bid(db, auction.id, bidder_id, auction.current_price_cents + 100)
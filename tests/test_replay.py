@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import select
+
+import replay
+from replay import AuctionState, fold
+from schemas import Auction, Bid
+
+
+def _times(*seconds):
+    return np.array([datetime(2026, 1, 1, 0, 0, s) for s in seconds], dtype="datetime64[us]")
+
+
+def test_fold_applies_latest_bid_per_auction():
+    states = {1: AuctionState(1000, None, 0, 0, None), 2: AuctionState(500, None, 0, 0, None)}
+    applied = fold(
+        states,
+        auction_ids=np.array([1, 2, 1, 3]),
+        bid_ids=np.array([10, 11, 12, 13]),
+        bidder_ids=np.array([7, 9, 8, 6]),
+        amounts=np.array([1100, 600, 1200, 999]),
+        bid_times=_times(1, 2, 3, 4),
+    )
+    # Auction 3 is not being replayed
+    assert applied == 3
+    assert states[1] == AuctionState(1200, 8, 2, 12, datetime(2026, 1, 1, 0, 0, 3))
+    assert states[2] == AuctionState(600, 9, 1, 11, datetime(2026, 1, 1, 0, 0, 2))
+    assert 3 not in states
+
+
+def test_fold_skips_bids_already_folded():
+    states = {1: AuctionState(1200, 8, 2, 12, None)}
+    applied = fold(
+        states,
+        auction_ids=np.array([1, 1]),
+        bid_ids=np.array([12, 14]),
+        bidder_ids=np.array([8, 5]),
+        amounts=np.array([1200, 1300]),
+        bid_times=_times(3, 5),
+    )
+    assert applied == 1
+    assert states[1][:4] == (1300, 5, 3, 14)
+
+
+def test_replay_matches_projection(db):
+    auctions = db.execute(
+        select(Auction.id, Auction.current_price_cents, Auction.winner_id).where(Auction.id <= 200)
+    ).all()
+    states, folded = replay.replay(db, Auction.id <= 200)
+    assert folded == db.query(Bid).filter(Bid.auction_id <= 200).count()
+    for auction_id, price, winner in auctions:
+        assert (states[auction_id].current_price_cents, states[auction_id].winner_id) == (price, winner)
+
+
+def test_state_at_a_bid(db):
+    bids = db.execute(
+        select(Bid.auction_id, Bid.id, Bid.bidder_id, Bid.amount_cents)
+        .where(Bid.auction_id == select(Bid.auction_id).limit(1).scalar_subquery())
+        .order_by(Bid.id)
+    ).all()
+    auction_id, bid_id, bidder_id, amount_cents = bids[len(bids) // 2]
+    state = replay.state_at(db, auction_id, through_bid_id=bid_id)
+    assert (state.current_price_cents, state.winner_id) == (amount_cents, bidder_id)
+    assert state.bid_count == len(bids) // 2 + 1
+
+
+def test_recover_repairs_a_drifted_row(db):
+    auction = db.scalars(
+        select(Auction).where(Auction.is_active.is_(True), Auction.winner_id.isnot(None)).limit(1)
+    ).one()
+    price, winner = auction.current_price_cents, auction.winner_id
+    auction.current_price_cents = 1
+    db.commit()
+
+    result = replay.recover(db)
+    assert result["repaired"] >= 1
+    db.refresh(auction)
+    assert (auction.current_price_cents, auction.winner_id) == (price, winner)
@@ -0,0 +1,113 @@
+"""
+Storage drivers. The S3 tests run against an S3-compatible service, by
+default the MinIO of docker-compose.yml (`moto_server -p 9000` works too),
+and are skipped when it is not reachable or boto3 is missing:
+
+    docker compose up -d minio
+    S3_TEST_ENDPOINT=http://localhost:9000 pytest tests/test_storage.py
+"""
+
+import base64
+import json
+import os
+import socket
+import uuid
+from urllib.parse import urlparse
+
+import httpx
+import pytest
+
+from storage import LocalStorage, S3Storage, Storage
+
+S3_TEST_ENDPOINT = os.getenv("S3_TEST_ENDPOINT", "http://localhost:9000")
+
+
+def test_incomplete_driver_fails_on_instantiation():
+    class NoDelete(Storage):
+        def save(self, key, contents, content_type=None): ...
+        def size(self, key): ...
+        def url(self, key): ...
+        def iter_objects(self): ...
+
+    with pytest.raises(TypeError):
+        NoDelete()
+
+
+# ============================================================================
+# LOCAL
+# ============================================================================
+
+def test_local_layout_and_lifecycle(tmp_path):
+    local = LocalStorage(root=str(tmp_path), base_url="/uploads")
+    shard = LocalStorage.shard("photo.png")
+    assert shard.split(os.sep)[-1] == "photo.png" and len(shard.split(os.sep)) == 3
+    assert local.url("photo.png") == "/uploads/" + shard.replace(os.sep, "/")
+
+    local.save("photo.png", b"12345")
+    assert (tmp_path / shard).read_bytes() == b"12345"
+    assert local.size("photo.png") == 5 and local.exists("photo.png")
+    assert [key for key, _ in local.iter_objects()] == ["photo.png"]
+    assert local.presign_upload("photo.png", "image/png", 100) is None
+
+    local.delete_many(["photo.png", "missing.png"])
+    assert not local.exists("photo.png")
+
+
+def test_local_shards_flat_files(tmp_path):
+    (tmp_path / "old.png").write_bytes(b"x")
+    local = LocalStorage(root=str(tmp_path))
+    assert local.shard_flat_files() == 1
+    assert local.exists("old.png") and not (tmp_path / "old.png").exists()
+
+
+# ============================================================================
+# S3
+# ============================================================================
+
+def _reachable(url: str) -> bool:
+    parsed = urlparse(url)
+    try:
+        with socket.create_connection((parsed.hostname, parsed.port or 80), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    pytest.importorskip("boto3")
+    if not _reachable(S3_TEST_ENDPOINT):
+        pytest.skip(f"no S3-compatible service at {S3_TEST_ENDPOINT}")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", os.getenv("S3_TEST_ACCESS_KEY", "minioadmin"))
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", os.getenv("S3_TEST_SECRET_KEY", "minioadmin"))
+    bucket = f"auction-test-{uuid.uuid4().hex[:12]}"
+    driver = S3Storage(bucket, endpoint_url=S3_TEST_ENDPOINT, region="us-east-1")
+    driver.client.create_bucket(Bucket=bucket)
+    yield driver
+    driver.delete_many(key for key, _ in driver.iter_objects())
+    driver.client.delete_bucket(Bucket=bucket)
+
+
+def test_s3_layout_and_lifecycle(s3):
+    # Keys are stored as given, at the bucket root
+    assert s3.url("photo.png") == f"{S3_TEST_ENDPOINT}/{s3.bucket}/photo.png"
+
+    s3.save("photo.png", b"12345", "image/png")
+    assert s3.size("photo.png") == 5 and s3.exists("photo.png")
+    assert [key for key, _ in s3.iter_objects()] == ["photo.png"]
+
+    s3.delete_many(["photo.png", "missing.png"])
+    assert not s3.exists("photo.png")
+
+
+def test_s3_presigned_upload(s3):
+    upload = s3.presign_upload("direct.png", "image/png", 10)
+    assert upload["fields"]["key"] == "direct.png"
+    # The service enforces the signed policy: this type, 1 to 10 bytes
+    policy = json.loads(base64.b64decode(upload["fields"]["policy"]))
+    assert {"Content-Type": "image/png"} in policy["conditions"]
+    assert ["content-length-range", 1, 10] in policy["conditions"]
+
+    response = httpx.post(upload["url"], data=upload["fields"], files={"file": ("direct.png", b"12345")})
+    assert response.status_code < 300
+    assert s3.exists("direct.png") and s3.size("direct.png") == 5
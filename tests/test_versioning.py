@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import crud
+import notifications
+from models import AuctionFilter, AuctionUpdate
+from querycount import assert_max_queries
+
+
+def test_edit_bumps_version(db):
+    version = crud.get_auction_by_id(db, 1).version
+    with assert_max_queries(1):
+        updated = crud.update_auction(db, 1, AuctionUpdate(title="Renamed"), expected_version=version)
+    assert (updated.title, updated.version) == ("Renamed", version + 1)
+
+
+def test_stale_edit_conflicts(db):
+    version = crud.get_auction_by_id(db, 1).version
+    crud.update_auction(db, 1, AuctionUpdate(title="First"), expected_version=version)
+
+    with pytest.raises(crud.AuctionConflict) as conflict:
+        crud.update_auction(db, 1, AuctionUpdate(title="Second"), expected_version=version)
+    assert (conflict.value.auction.title, conflict.value.auction.version) == ("First", version + 1)
+
+
+def test_bulk_update_invalidates_open_edits(db):
+    version = crud.get_auction_by_id(db, 1).version
+    crud.bulk_update_auctions(db, AuctionFilter(ids=[1]), is_active=False)
+    with pytest.raises(crud.AuctionConflict):
+        crud.update_auction(db, 1, AuctionUpdate(title="Stale"), expected_version=version)
+
+
+def test_closing_invalidates_open_edits(db):
+    auction = crud.get_auction_by_id(db, 1)
+    version = auction.version
+    auction.ends_at = datetime.utcnow() - timedelta(seconds=1)
+    auction.is_active = True
+    db.flush()
+    assert notifications.close_expired_auctions(db) >= 1
+    with pytest.raises(crud.AuctionConflict):
+        crud.update_auction(db, 1, AuctionUpdate(title="Stale"), expected_version=version)
+
+
+def test_unversioned_edit_and_missing_auction(db):
+    assert crud.update_auction(db, 1, AuctionUpdate(content="No version check")) is not None
+    assert crud.update_auction(db, 10 ** 9, AuctionUpdate(title="Nope"), expected_version=1) is None